@@ -0,0 +1,116 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+class DagScheduler:
+    """Executa etapas com dependências em paralelo, respeitando a ordem do grafo.
+
+    Cada etapa é uma função sem argumentos que retorna False (ou lança
+    exceção) em caso de falha. Etapas prontas rodam em um pool de threads;
+    na primeira falha nenhuma etapa nova é iniciada.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._stages = {}
+        self.durations = {}
+
+    def add(self, name, func, depends=()):
+        """Registra uma etapa e as etapas das quais ela depende"""
+        self._stages[name] = (func, tuple(depends))
+
+    def topological_order(self):
+        """Ordem topológica das etapas (erro se houver dependência ausente ou ciclo)"""
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Ciclo de dependências: {' -> '.join(path + [name])}")
+            if name not in self._stages:
+                raise ValueError(f"Etapa desconhecida: {name}")
+            state[name] = 'visiting'
+            for dep in self._stages[name][1]:
+                visit(dep, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self._stages:
+            visit(name, [])
+        return order
+
+    def critical_path(self):
+        """Caminho mais longo do grafo segundo as durações medidas"""
+        best = {}
+        for name in self.topological_order():
+            if name not in self.durations:
+                continue
+            previous = max(
+                (best[dep] for dep in self._stages[name][1] if dep in best),
+                key=lambda item: item[0],
+                default=(0.0, [])
+            )
+            best[name] = (previous[0] + self.durations[name], previous[1] + [name])
+        return max(best.values(), key=lambda item: item[0], default=(0.0, []))
+
+    def _run_stage(self, name):
+        func = self._stages[name][0]
+        start = time.perf_counter()
+        try:
+            return func() is not False
+        finally:
+            self.durations[name] = time.perf_counter() - start
+
+    def run(self):
+        """Executa todas as etapas. Retorna True se todas terminaram com sucesso"""
+        self.topological_order()  # valida o grafo antes de iniciar
+        self.durations = {}
+        pending = dict(self._stages)
+        done = set()
+        failed = []
+        running = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='etl') as executor:
+            while pending or running:
+                if not failed:
+                    for name in [n for n, (_, deps) in pending.items() if set(deps) <= done]:
+                        del pending[name]
+                        running[executor.submit(self._run_stage, name)] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        logger.error(f"Etapa {name} falhou: {e}")
+                        ok = False
+                    if ok:
+                        done.add(name)
+                    else:
+                        failed.append(name)
+
+        elapsed = time.perf_counter() - start
+        if failed:
+            logger.error(
+                f"Execução interrompida por falha em: {', '.join(failed)}. "
+                f"Etapas não iniciadas: {', '.join(pending) or 'nenhuma'}"
+            )
+            return False
+
+        length, path = self.critical_path()
+        logger.info(f"Caminho crítico: {' -> '.join(path)} ({length:.2f}s)")
+        logger.info(
+            f"Etapas concluídas em {elapsed:.2f}s "
+            f"(soma das durações: {sum(self.durations.values()):.2f}s)"
+        )
+        return True
@@ -0,0 +1,107 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Métricas somadas em todas as tabelas agregadas
+_METRICS = """
+    SUM(f.quantidade_vendida), COUNT(*), COUNT(DISTINCT f.id_venda),
+    SUM(f.valor_total_item), COALESCE(SUM(f.valor_desconto), 0), SUM(f.valor_final),
+    COALESCE(SUM(f.custo_total_item), 0), COALESCE(SUM(f.lucro_bruto), 0)
+"""
+_METRIC_COLUMNS = ('quantidade_vendida', 'itens', 'vendas', 'valor_total_item', 'valor_desconto',
+                   'valor_final', 'custo_total_item', 'lucro_bruto')
+
+
+class AggregateManager:
+    """Mantém as tabelas agregadas mensais de fato_vendas e indica qual responde a cada agrupamento.
+
+    Cada agregado soma as métricas da fato por ano, mês e um atributo. A
+    atualização recalcula apenas os meses informados (DELETE + INSERT ...
+    SELECT restritos a eles), ou todos quando nenhum é informado. Nada é
+    confirmado aqui.
+    """
+
+    # tabela -> (atributos que responde, coluna do agrupamento, expressão, junção extra)
+    AGGREGATES = {
+        'agg_vendas_mes_loja': (('ano', 'mes', 'loja'), 'sk_loja', 'f.sk_loja', ''),
+        'agg_vendas_mes_categoria': (
+            ('ano', 'mes', 'categoria_produto'), 'sk_categoria_produto', 'p.sk_categoria_produto',
+            'LEFT JOIN dim_produto p ON p.sk_produto = f.sk_produto'
+        ),
+        'agg_vendas_mes_vendedor': (('ano', 'mes', 'vendedor'), 'sk_vendedor', 'f.sk_vendedor', ''),
+    }
+    REGISTRY = 'etl_agregados'
+
+    def affected_months(self, connection, since_id):
+        """Meses (ano, mês) das vendas com id_venda > since_id já gravadas na fato (idx_fato_vendas_id_venda)"""
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT DISTINCT t.ano, t.mes
+            FROM fato_vendas f
+            JOIN dim_tempo t ON t.sk_tempo = f.sk_tempo
+            WHERE f.id_venda > %s
+        """, (since_id,))
+        months = sorted(cursor.fetchall())
+        cursor.close()
+        return months
+
+    def refresh(self, connection, months=None):
+        """Recalcula os agregados dos meses informados (todos, se months for None). Retorna as linhas gravadas"""
+        if months is not None and not months:
+            return 0
+
+        cursor = connection.cursor()
+        params = None
+        month_filter = ""
+        if months is not None:
+            month_filter = "WHERE (t.ano, t.mes) IN (SELECT * FROM unnest(%s::int[], %s::int[]))"
+            params = ([ano for ano, _ in months], [mes for _, mes in months])
+
+        total = 0
+        try:
+            for table, (attributes, column, expression, join) in self.AGGREGATES.items():
+                if months is None:
+                    cursor.execute(f"TRUNCATE {table}")
+                else:
+                    cursor.execute(f"""
+                        DELETE FROM {table} a
+                        WHERE (a.ano, a.mes) IN (SELECT * FROM unnest(%s::int[], %s::int[]))
+                    """, params)
+
+                cursor.execute(f"""
+                    INSERT INTO {table} (ano, mes, {column}, {', '.join(_METRIC_COLUMNS)})
+                    SELECT t.ano, t.mes, {expression}, {_METRICS}
+                    FROM fato_vendas f
+                    JOIN dim_tempo t ON t.sk_tempo = f.sk_tempo
+                    {join}
+                    {month_filter}
+                    GROUP BY t.ano, t.mes, {expression}
+                """, params)
+                total += cursor.rowcount
+                logger.info(f"Agregado {table}: {cursor.rowcount} linhas "
+                            f"({'todos os meses' if months is None else f'{len(months)} meses'})")
+
+                cursor.execute(f"""
+                    INSERT INTO {self.REGISTRY} (tabela, atributos, atualizado_em)
+                    VALUES (%s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (tabela) DO UPDATE
+                    SET atributos = EXCLUDED.atributos, atualizado_em = EXCLUDED.atualizado_em
+                """, (table, ','.join(attributes)))
+        finally:
+            cursor.close()
+        return total
+
+    @classmethod
+    def table_for(cls, *attributes):
+        """Tabela agregada que responde ao agrupamento pelos atributos (ex.: 'mes', 'loja'), ou None.
+
+        Serve qualquer agregado que contenha todos os atributos pedidos
+        (um agrupamento só por ano é obtido somando os meses); havendo mais
+        de um, prefere o de menos atributos.
+        """
+        wanted = set(attributes)
+        candidates = [
+            (len(info[0]), table) for table, info in cls.AGGREGATES.items()
+            if wanted <= set(info[0])
+        ]
+        return min(candidates)[1] if candidates else None
@@ -0,0 +1,150 @@
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+from etl_completo import ETLProcessor
+from instrumentacao import StageProfiler
+from indices import read_index_statements
+from dados_sinteticos import SyntheticCRM, SCALES, parse_scale
+
+logger = logging.getLogger(__name__)
+
+
+def run_benchmark(items, seed=42, trace_memory=False, **etl_options):
+    """Recria as bases, gera o CRM sintético e executa cada etapa do ETL medindo-a.
+    Retorna o perfil da execução (dict) acrescido da configuração usada"""
+    profiler = StageProfiler(enabled=True, trace_memory=trace_memory)
+    etl = ETLProcessor(profiler=profiler, **etl_options)
+    scripts_dir = Path(__file__).resolve().parent / "sql"
+    etl.scripts_dir = scripts_dir
+    generator = SyntheticCRM(items, seed=seed)
+    success = False
+
+    try:
+        if not etl.setup_databases():
+            return None
+        if not etl.connect_to_crm() or not etl.connect_to_dw():
+            return None
+
+        if not etl.migrate('crm'):
+            return None
+        with profiler.stage("dados_sinteticos", crm=etl.conn_crm):
+            tables = generator.load(etl.conn_crm)
+        logger.info(f"CRM sintético: {tables['vendas']} vendas, {tables['item_vendas']} itens")
+
+        if not etl.migrate('dw'):
+            return None
+
+        with profiler.stage("dimensoes"):
+            if not etl.load_dimensions():
+                return None
+
+        if not etl.load_facts():
+            return None
+
+        with profiler.stage("indices"):
+            etl.build_indexes(read_index_statements(scripts_dir / "cria_indices_dw.sql"))
+        with profiler.stage("agregados", dw=etl.conn_dw):
+            etl.refresh_aggregates()
+        success = True
+
+    finally:
+        etl.close_connections()
+        etl.connections.close_all()
+
+    result = profiler.to_dict()
+    result.update({
+        'sucesso': success,
+        'itens_venda': items,
+        'semente': seed,
+        'tabelas_crm': tables,
+        'opcoes': etl_options,
+    })
+    return result
+
+
+def compare(result, baseline, tolerance, min_seconds=0.5):
+    """Compara as vazões por etapa com uma execução de referência.
+    Etapas que levaram menos de min_seconds na referência são ignoradas (só ruído).
+    Retorna a lista de etapas cuja vazão caiu mais que a tolerância"""
+    if baseline.get('itens_venda') != result['itens_venda']:
+        logger.warning(
+            f"Referência com escala diferente ({baseline.get('itens_venda')} itens x "
+            f"{result['itens_venda']}); a comparação de vazão é só indicativa"
+        )
+    reference = {stage['etapa']: stage for stage in baseline['etapas']}
+    regressions = []
+    for stage in result['etapas']:
+        previous = reference.get(stage['etapa'])
+        if not previous or not previous['linhas_por_s'] or previous['tempo_s'] < min_seconds:
+            continue
+        change = stage['linhas_por_s'] / previous['linhas_por_s'] - 1
+        logger.info(
+            f"{stage['etapa']}: {stage['linhas_por_s']:.0f} linhas/s "
+            f"(referência {previous['linhas_por_s']:.0f}, {change:+.1%})"
+        )
+        if change < -tolerance:
+            regressions.append(stage['etapa'])
+    return regressions
+
+
+def print_report(result):
+    print(f"\n{'ETAPA':<24}{'TEMPO (s)':>11}{'BANCO (s)':>11}{'LINHAS':>12}{'LINHAS/S':>12}{'MEMÓRIA (MB)':>14}")
+    for stage in result['etapas']:
+        rows = max(stage['linhas_lidas'], stage['linhas_gravadas'])
+        memory = stage.get('pico_memoria_bytes', stage.get('rss_maximo_bytes', 0)) / 1024 / 1024
+        print(f"{stage['etapa']:<24}{stage['tempo_s']:>11.2f}{stage['tempo_banco_s']:>11.2f}"
+              f"{rows:>12}{stage['linhas_por_s']:>12.0f}{memory:>14.1f}")
+    print(f"{'total':<24}{result['tempo_total_s']:>11.2f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark do ETL com dados sintéticos do CRM")
+    parser.add_argument("--scale", default="10k",
+                        help=f"itens de venda: {', '.join(SCALES)} ou um número (padrão: 10k)")
+    parser.add_argument("--seed", type=int, default=42, help="semente do gerador (padrão: 42)")
+    parser.add_argument("--dimension-workers", type=int, default=4)
+    parser.add_argument("--fact-workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--no-streaming", action="store_true",
+                        help="extrai com fetchall em vez de cursores nomeados")
+    parser.add_argument("--fact-engine", choices=("python", "sql"), default="python",
+                        help="carga da fato em Python ou em SQL no DW (staging)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="carrega os fatos com extração, transformação e carga concorrentes")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="mede o pico de memória de cada etapa com tracemalloc (mais lento); "
+                             "sem ele, a memória informada é o máximo residente do processo")
+    parser.add_argument("--output", metavar="ARQUIVO", help="grava o resultado em JSON")
+    parser.add_argument("--baseline", metavar="ARQUIVO",
+                        help="resultado JSON de referência para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="queda de vazão tolerada em relação à referência (padrão: 0.2)")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        parse_scale(args.scale), seed=args.seed, trace_memory=args.trace_memory,
+        dimension_workers=args.dimension_workers, fact_workers=args.fact_workers,
+        batch_size=args.batch_size, streaming=not args.no_streaming, pipeline=args.pipeline,
+        fact_engine=args.fact_engine,
+    )
+    if result is None or not result['sucesso']:
+        print("\n❌ Benchmark interrompido. Verifique os logs.")
+        sys.exit(1)
+
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        logger.info(f"Resultado gravado em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(result, json.load(file), args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressão de desempenho em: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Sem regressões em relação à referência")
@@ -0,0 +1,119 @@
+import sys
+import logging
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# Dimensões consultadas pelos carregadores da tabela de fato (promoções não são aplicadas)
+FACT_DIMENSIONS = ['tempo', 'cliente', 'produto', 'vendedor', 'loja']
+
+
+class SurrogateKeyCache:
+    """Cache em memória das chaves surrogadas das dimensões do DW"""
+
+    # dimensão -> (tabela, expressão da chave natural, coluna sk, atributos)
+    DIMENSIONS = {
+        'tempo': ('dim_tempo', 'data_completa', 'sk_tempo', ()),
+        'localidade': ('dim_localidade', 'id_localidade', 'sk_localidade', ()),
+        'localidade_cidade': ('dim_localidade', 'LOWER(cidade), LOWER(estado)', 'sk_localidade', ()),
+        'categoria_cliente': ('dim_categoria_cliente', 'id_categoria_cliente', 'sk_categoria_cliente', ()),
+        'categoria_produto': ('dim_categoria_produto', 'id_categoria_produto', 'sk_categoria_produto', ()),
+        'cliente': ('dim_cliente', 'id_cliente', 'sk_cliente', ()),
+        'produto': ('dim_produto', 'id_produto', 'sk_produto', ('custo_unitario',)),
+        'vendedor': ('dim_vendedor', 'id_vendedor', 'sk_vendedor', ()),
+        'loja': ('dim_loja', 'id_loja', 'sk_loja', ()),
+        'promocao': ('dim_promocao', 'id_promocao', 'sk_promocao', ('percentual_desconto',)),
+    }
+
+    # Dimensões com histórico (SCD tipo 2): só as versões atuais entram no cache
+    VERSIONED = {
+        'dim_localidade', 'dim_categoria_cliente', 'dim_categoria_produto', 'dim_fornecedor',
+        'dim_cliente', 'dim_produto', 'dim_vendedor', 'dim_loja', 'dim_promocao',
+    }
+
+    def __init__(self):
+        self._maps = {}
+        self.hits = {}
+        self.misses = {}
+
+    def load(self, connection, dimensions=None):
+        """Carrega (ou recarrega) o mapeamento chave natural -> (sk, atributos) das dimensões"""
+        cursor = connection.cursor()
+        for dimension in dimensions or self.DIMENSIONS:
+            table, key_expr, sk_column, attributes = self.DIMENSIONS[dimension]
+            columns = ', '.join((key_expr, sk_column) + attributes)
+            where = "WHERE registro_atual" if table in self.VERSIONED else ""
+            cursor.execute(f"SELECT {columns} FROM {table} {where} ORDER BY {sk_column}")
+
+            key_size = key_expr.count(',') + 1
+            mapping = {}
+            for row in cursor:
+                key = row[0] if key_size == 1 else tuple(row[:key_size])
+                # Mantém a primeira ocorrência, como nas buscas originais
+                mapping.setdefault(key, tuple(
+                    float(value) if isinstance(value, Decimal) else value
+                    for value in row[key_size:]
+                ))
+
+            self._maps[dimension] = mapping
+            self.hits.setdefault(dimension, 0)
+            self.misses.setdefault(dimension, 0)
+            logger.info(f"Cache de chaves {dimension}: {len(mapping)} registros carregados")
+        cursor.close()
+
+    def get(self, dimension, natural_key):
+        """Retorna a tupla (sk, atributos...) da chave natural ou None"""
+        if natural_key is None:
+            return None
+        entry = self._maps[dimension].get(natural_key)
+        if entry is None:
+            self.misses[dimension] += 1
+        else:
+            self.hits[dimension] += 1
+        return entry
+
+    def sk(self, dimension, natural_key):
+        """Retorna apenas a chave surrogada da chave natural ou None"""
+        entry = self.get(dimension, natural_key)
+        return entry[0] if entry else None
+
+    def sk_map(self, dimension):
+        """Mapeamento chave natural -> sk da dimensão (sem contagem de hits)"""
+        return {key: entry[0] for key, entry in self._maps[dimension].items()}
+
+    def stats(self):
+        """Estatísticas de uso do cache por dimensão"""
+        result = {}
+        for dimension, mapping in self._maps.items():
+            hits = self.hits[dimension]
+            misses = self.misses[dimension]
+            lookups = hits + misses
+            result[dimension] = {
+                'registros': len(mapping),
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+            }
+        return result
+
+    def memory_usage(self):
+        """Estimativa em bytes da memória ocupada pelos mapeamentos"""
+        total = 0
+        for mapping in self._maps.values():
+            total += sys.getsizeof(mapping)
+            for key, entry in mapping.items():
+                total += sys.getsizeof(key) + sys.getsizeof(entry)
+                if isinstance(key, tuple):
+                    total += sum(sys.getsizeof(part) for part in key)
+                total += sum(sys.getsizeof(value) for value in entry)
+        return total
+
+    def log_stats(self):
+        """Registra no log as estatísticas do cache"""
+        for dimension, info in self.stats().items():
+            logger.info(
+                f"Cache {dimension}: {info['registros']} registros, "
+                f"{info['hits']} hits, {info['misses']} misses "
+                f"({info['hit_rate']:.1%})"
+            )
+        logger.info(f"Memória do cache de chaves: {self.memory_usage() / 1024:.1f} KB")
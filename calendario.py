@@ -0,0 +1,117 @@
+import logging
+from datetime import date, timedelta
+
+from datas import parse_date
+
+logger = logging.getLogger(__name__)
+
+# Nomes na ordem de EXTRACT(ISODOW) (1=Segunda ... 7=Domingo) e de EXTRACT(MONTH)
+WEEKDAY_NAMES = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+MONTH_NAMES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+               'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+
+class CalendarDimension:
+    """Mantém dim_tempo cobrindo as datas presentes no CRM.
+
+    O intervalo vem do menor e do maior valor interpretável das datas de
+    venda e de promoção, acrescido de `margin_days` e arredondado para anos
+    inteiros. Os dias são gerados no servidor com um único INSERT ... SELECT
+    sobre generate_series, e somente os que ainda não existem são inseridos;
+    assim a dimensão é estendida, nunca regerada, quando chegam datas novas.
+    """
+
+    TABLE = 'dim_tempo'
+
+    def __init__(self, margin_days=365):
+        self.margin_days = margin_days
+
+    def source_date_range(self, connection, since_id=None):
+        """Menor e maior data válida das vendas (id_venda > since_id) e das promoções, ou (None, None)"""
+        return self._date_range(connection, """
+            SELECT DISTINCT data_venda FROM vendas WHERE %(since)s IS NULL OR id_venda > %(since)s
+            UNION
+            SELECT data_inicio FROM promocoes
+            UNION
+            SELECT data_fim FROM promocoes
+        """, since_id)
+
+    def sales_date_range(self, connection, since_id=None):
+        """Menor e maior data válida das vendas (id_venda > since_id), ou (None, None)"""
+        return self._date_range(connection, """
+            SELECT DISTINCT data_venda FROM vendas WHERE %(since)s IS NULL OR id_venda > %(since)s
+        """, since_id)
+
+    def _date_range(self, connection, query, since_id):
+        cursor = connection.cursor()
+        # As datas são texto em formatos variados; cada valor distinto é interpretado uma vez
+        cursor.execute(query, {'since': since_id})
+
+        first = last = None
+        for (raw,) in cursor:
+            parsed, _ = parse_date(raw)
+            if parsed is None:
+                continue
+            if first is None or parsed < first:
+                first = parsed
+            if last is None or parsed > last:
+                last = parsed
+        cursor.close()
+        return first, last
+
+    def covering_range(self, first, last):
+        """Intervalo de anos inteiros que cobre [first, last] com a margem configurada"""
+        if first is None:
+            first = last = date.today()
+        start = first - timedelta(days=self.margin_days)
+        end = last + timedelta(days=self.margin_days)
+        return date(start.year, 1, 1), date(end.year, 12, 31)
+
+    def current_range(self, connection):
+        """Menor e maior data já presentes em dim_tempo, ou (None, None)"""
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT MIN(data_completa), MAX(data_completa) FROM {self.TABLE}")
+        result = cursor.fetchone()
+        cursor.close()
+        return result
+
+    def ensure(self, connection, start, end):
+        """Insere em dim_tempo os dias de [start, end] que ainda não existem (sem commit).
+        Retorna o número de dias inseridos"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            INSERT INTO {self.TABLE} (data_completa, ano, mes, dia, trimestre, semestre, dia_semana,
+                                      nome_dia_semana, nome_mes, eh_fim_semana)
+            SELECT d,
+                   EXTRACT(YEAR FROM d)::int,
+                   EXTRACT(MONTH FROM d)::int,
+                   EXTRACT(DAY FROM d)::int,
+                   EXTRACT(QUARTER FROM d)::int,
+                   CASE WHEN EXTRACT(MONTH FROM d) <= 6 THEN 1 ELSE 2 END,
+                   EXTRACT(ISODOW FROM d)::int,
+                   (%(weekdays)s::text[])[EXTRACT(ISODOW FROM d)::int],
+                   (%(months)s::text[])[EXTRACT(MONTH FROM d)::int],
+                   EXTRACT(ISODOW FROM d) IN (6, 7)
+            FROM generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS g(dia),
+                 LATERAL (SELECT g.dia::date AS d) AS datas
+            WHERE NOT EXISTS (SELECT 1 FROM {self.TABLE} t WHERE t.data_completa = d)
+            ORDER BY d
+        """, {'weekdays': WEEKDAY_NAMES, 'months': MONTH_NAMES, 'start': start, 'end': end})
+        inserted = cursor.rowcount
+        cursor.close()
+        return inserted
+
+    def extend(self, conn_crm, conn_dw, since_id=None):
+        """Estende dim_tempo para cobrir as datas do CRM (sem commit). Retorna (início, fim, dias inseridos)"""
+        first, last = self.source_date_range(conn_crm, since_id)
+        start, end = self.covering_range(first, last)
+
+        current_start, current_end = self.current_range(conn_dw)
+        if current_start is not None:
+            # Mantém o calendário contínuo: só cresce nas pontas
+            start = min(start, current_start)
+            end = max(end, current_end)
+
+        inserted = self.ensure(conn_dw, start, end)
+        logger.info(f"Calendário dim_tempo de {start} a {end}: {inserted} dias inseridos")
+        return start, end, inserted
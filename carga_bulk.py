@@ -0,0 +1,128 @@
+import io
+import logging
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+# Caracteres que precisam de escape no formato texto do COPY
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def format_copy_value(value):
+    """Converte um valor Python para o formato texto do COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    return str(value)
+
+
+def format_copy_row(row):
+    """Converte uma linha (tupla) para uma linha do COPY"""
+    return '\t'.join(format_copy_value(value) for value in row) + '\n'
+
+
+class BulkLoader:
+    """Acumula linhas transformadas e as envia ao DW em lote.
+
+    Por padrão usa COPY ... FROM STDIN; quando a tabela precisa de
+    ON CONFLICT, usa execute_values em lotes do mesmo tamanho.
+    """
+
+    def __init__(self, connection, table, columns, buffer_size=10000, on_conflict=None):
+        self.connection = connection
+        self.table = table
+        self.columns = tuple(columns)
+        self.buffer_size = buffer_size
+        self.on_conflict = on_conflict
+        self.rows_loaded = 0
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def add(self, row):
+        """Adiciona uma linha ao buffer. Retorna o número de linhas enviadas (0 se não houve envio)"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.buffer_size:
+            return self.flush()
+        return 0
+
+    def add_many(self, rows):
+        """Adiciona várias linhas ao buffer"""
+        flushed = 0
+        for row in rows:
+            flushed += self.add(row)
+        return flushed
+
+    def add_batch(self, batch):
+        """Envia ao DW um lote por colunas (colunas.ColumnBatch) com as colunas da carga.
+
+        O buffer de linhas é enviado antes, para manter a ordem. Retorna o
+        número de linhas enviadas.
+        """
+        flushed = self.flush()
+        if not len(batch):
+            return flushed
+
+        cursor = self.connection.cursor()
+        try:
+            if self.on_conflict:
+                self._insert_values(cursor, list(batch.rows(self.columns)))
+            else:
+                cursor.copy_expert(
+                    f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN",
+                    batch.copy_source(self.columns)
+                )
+        finally:
+            cursor.close()
+
+        self.rows_loaded += len(batch)
+        return flushed + len(batch)
+
+    def flush(self):
+        """Envia o conteúdo do buffer ao DW (sem commit)"""
+        if not self._buffer:
+            return 0
+
+        rows = self._buffer
+        self._buffer = []
+        cursor = self.connection.cursor()
+        try:
+            if self.on_conflict:
+                self._insert_values(cursor, rows)
+            else:
+                self._copy(cursor, rows)
+        finally:
+            cursor.close()
+
+        self.rows_loaded += len(rows)
+        return len(rows)
+
+    def _copy(self, cursor, rows):
+        data = io.StringIO(''.join(format_copy_row(row) for row in rows))
+        cursor.copy_expert(
+            f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN",
+            data
+        )
+
+    def _insert_values(self, cursor, rows):
+        execute_values(
+            cursor,
+            f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES %s {self.on_conflict}",
+            rows,
+            page_size=len(rows)
+        )
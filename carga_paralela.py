@@ -0,0 +1,136 @@
+import copy
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache_chaves import FACT_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def partition_bounds(connection, partitions, since_id=None):
+    """Divide as vendas com id_venda > since_id em faixas (início exclusivo, fim inclusivo)
+    com quantidades semelhantes de vendas"""
+    bounds = []
+    if partitions > 1:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY id_venda)
+            FROM vendas
+            WHERE %s IS NULL OR id_venda > %s
+        """, ([i / partitions for i in range(1, partitions)], since_id, since_id))
+        result = cursor.fetchone()[0]
+        cursor.close()
+        bounds = sorted(set(b for b in result or [] if b is not None))
+
+    ranges = []
+    lower = since_id
+    for bound in bounds:
+        ranges.append((lower, bound))
+        lower = bound
+    ranges.append((lower, None))
+    return ranges
+
+
+def discard_ranges(connection, since_id=None):
+    """Remove da fato as vendas com id_venda > since_id (todas as faixas da carga) e confirma.
+    Retorna as linhas removidas"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM fato_vendas WHERE %s IS NULL OR id_venda > %s", (since_id, since_id))
+        removed = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return removed
+
+
+def _load_partition(processor, method_name, since_id, until_id):
+    """Executa, em um processo do pool, a carga de uma faixa de vendas"""
+    result = {'faixa': (since_id, until_id), 'ok': False, 'linhas': 0, 'max_id': None}
+    if not processor.connect_to_crm() or not processor.connect_to_dw():
+        result['erro'] = "falha ao conectar às bases"
+        return result
+
+    try:
+        result['ok'] = getattr(processor, method_name)(
+            since_id=since_id, until_id=until_id, partitioned=True
+        )
+        result['linhas'], result['max_id'] = processor.load_stats.get('fato_vendas', (0, None))
+        if not result['ok']:
+            result['erro'] = "carga da faixa falhou (ver log do processo)"
+        return result
+    finally:
+        processor.close_connections()
+        processor.connections.close_all()
+
+
+def load_facts_partitioned(processor, method_name, workers, since_id=None):
+    """Carrega a tabela de fato dividindo as vendas em faixas de id_venda, uma por processo.
+
+    O coordenador carrega o cache de chaves uma única vez e envia uma cópia a
+    cada processo, que abre suas próprias conexões. A marca d'água só avança
+    quando todas as faixas terminam com sucesso; se alguma falhar, as linhas
+    das faixas já confirmadas são removidas.
+    """
+    logger.info(f"Iniciando carga particionada da tabela de fato com {workers} processos...")
+
+    processor.sk_cache.load(processor.conn_dw, FACT_DIMENSIONS)
+    ranges = partition_bounds(processor.conn_crm, workers, since_id)
+
+    # Cópia sem conexões para ser serializada e enviada aos processos
+    template = copy.copy(processor)
+    template.conn_crm = None
+    template.conn_dw = None
+    template.load_stats = {}
+
+    results = []
+    errors = []
+    start = time.perf_counter()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as executor:
+        futures = {
+            executor.submit(_load_partition, template, method_name, low, high): (low, high)
+            for low, high in ranges
+        }
+        for future in as_completed(futures):
+            low, high = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(f"faixa ({low}, {high}]: {e}")
+                continue
+
+            if result['ok']:
+                results.append(result)
+                logger.info(f"Faixa ({low}, {high}] concluída: {result['linhas']} registros")
+            else:
+                errors.append(f"faixa ({low}, {high}]: {result.get('erro')}")
+
+    elapsed = time.perf_counter() - start
+    rows = sum(result['linhas'] for result in results)
+    logger.info(
+        f"Carga particionada: {rows} registros em {elapsed:.2f}s "
+        f"({rows / elapsed if elapsed else 0:.0f} registros/s, {len(ranges)} faixas)"
+    )
+
+    if errors:
+        for error in errors:
+            logger.error(f"Erro na carga particionada, {error}")
+        # Faixas concluídas já foram confirmadas pelos processos: sem a marca
+        # d'água, a próxima carga as inseriria de novo
+        removed = discard_ranges(processor.conn_dw, since_id)
+        logger.error(f"Marca d'água não avançada: há faixas com falha ({removed} registros das faixas removidos)")
+        return False
+
+    max_id = max((result['max_id'] for result in results if result['max_id'] is not None), default=None)
+    if max_id is not None:
+        processor.watermarks.advance(processor.conn_dw, 'vendas', 'id_venda', max_id)
+        processor.conn_dw.commit()
+    processor.load_stats['fato_vendas'] = (rows, max_id)
+    return True
@@ -0,0 +1,169 @@
+import io
+import os
+import logging
+import threading
+
+from carga_bulk import format_copy_row
+from datas import REJECTED
+
+logger = logging.getLogger(__name__)
+
+STAGING_COLUMNS = ('id_venda', 'data_venda', 'id_cliente', 'id_vendedor', 'id_loja',
+                   'id_produto', 'qtd_vendida', 'preco_venda')
+
+FACT_COLUMNS = ('id_venda', 'sk_tempo', 'data_venda', 'sk_cliente', 'sk_vendedor', 'sk_loja', 'sk_produto',
+                'quantidade_vendida', 'preco_unitario_venda', 'valor_total_item', 'custo_unitario',
+                'custo_total_item', 'lucro_bruto', 'valor_final')
+
+# Mesmas regras de extract_and_transform_vendas, sobre as versões atuais das dimensões:
+# quantidade inválida vira 0, vendas com data rejeitada ignoradas. Promoções ficam fora
+# da fato de propósito (nenhuma carga as aplica): sk_promocao fica nulo e
+# percentual_desconto/valor_desconto ficam com o padrão 0 da tabela
+_INSERT_FACTS = f"""
+    INSERT INTO {{target}} ({', '.join(FACT_COLUMNS)})
+    SELECT s.id_venda, dt.sk_tempo, dt.data_completa, c.sk_cliente, ve.sk_vendedor, l.sk_loja, p.sk_produto,
+           m.qtd, m.preco, m.qtd * m.preco, m.custo,
+           m.qtd * m.custo, m.qtd * m.preco - m.qtd * m.custo, m.qtd * m.preco
+    FROM stg_vendas s
+    LEFT JOIN stg_datas_venda dt ON dt.data_venda = s.data_venda
+    LEFT JOIN dim_cliente c ON c.id_cliente = s.id_cliente AND c.registro_atual
+    LEFT JOIN dim_vendedor ve ON ve.id_vendedor = s.id_vendedor AND ve.registro_atual
+    LEFT JOIN dim_loja l ON l.id_loja = s.id_loja AND l.registro_atual
+    LEFT JOIN dim_produto p ON p.id_produto = s.id_produto AND p.registro_atual
+    CROSS JOIN LATERAL (
+        SELECT CASE WHEN s.qtd_vendida > 0 THEN s.qtd_vendida ELSE 0 END AS qtd,
+               CASE WHEN s.preco_venda > 0 THEN s.preco_venda ELSE 0 END AS preco,
+               COALESCE(p.custo_unitario, 0) AS custo
+    ) m
+    WHERE NOT COALESCE(dt.rejeitada, {{null_rejected}})
+"""
+
+
+def copy_between(source, query, target, table, columns):
+    """Copia o resultado de `query` na conexão `source` para `table` na conexão `target`.
+
+    Os dois COPY rodam ao mesmo tempo ligados por um pipe do sistema, no
+    formato texto do PostgreSQL, sem passar as linhas pelo Python nem
+    guardá-las em memória. Retorna as linhas copiadas. Nada é confirmado.
+    """
+    read_fd, write_fd = os.pipe()
+    reader = os.fdopen(read_fd, 'rb')
+    writer = os.fdopen(write_fd, 'wb')
+    errors = []
+
+    def produce():
+        cursor = source.cursor()
+        try:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT", writer)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            cursor.close()
+            # Fim dos dados para o COPY de destino (também em caso de erro)
+            writer.close()
+
+    thread = threading.Thread(target=produce, name='copia-crm-dw', daemon=True)
+    thread.start()
+
+    cursor = target.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", reader)
+        rows = cursor.rowcount
+    finally:
+        cursor.close()
+        # Com o destino interrompido, a escrita no pipe falha e libera a origem
+        reader.close()
+        thread.join()
+
+    if errors:
+        # Dados incompletos no destino: quem chamou deve desfazer a transação
+        raise errors[0]
+    return rows
+
+
+class StagedFactLoader:
+    """Carga de fato_vendas com as chaves e métricas resolvidas no próprio DW.
+
+    As linhas de vendas x item_vendas são copiadas do CRM, sem
+    transformação, para a tabela UNLOGGED stg_vendas. Só as datas (texto
+    em formatos variados) são interpretadas em Python, uma vez por valor
+    distinto, em uma tabela temporária data_venda -> sk_tempo. Um único
+    INSERT ... SELECT junta a staging às dimensões e calcula as métricas,
+    com as regras de extract_and_transform_vendas (a carga padrão);
+    a staging é esvaziada ao final. Nada é confirmado: a carga, a limpeza
+    da staging e a marca d'água ficam na mesma transação.
+    """
+
+    def __init__(self, crm, dw):
+        self.crm = crm
+        self.dw = dw
+        self.staged = 0
+        self.inserted = 0
+        self.max_id = None
+
+    def load(self, date_normalizer, since_id=None, until_id=None, target='fato_vendas', raw_dates=None):
+        """Carrega as vendas com since_id < id_venda <= until_id em `target`. Retorna as linhas inseridas.
+        
+        Com raw_dates, só as vendas com data_venda entre esses valores brutos
+        são copiadas (ex.: as datas de um mês, na recarga de uma partição).
+        """
+        cursor = self.dw.cursor()
+        try:
+            cursor.execute("TRUNCATE stg_vendas")
+            self.staged = copy_between(self.crm, self._source_query(since_id, until_id, raw_dates),
+                                       self.dw, 'stg_vendas', STAGING_COLUMNS)
+            logger.info(f"Staging da fato: {self.staged} linhas copiadas do CRM")
+
+            null_rejected = self._map_dates(cursor, date_normalizer)
+            cursor.execute("ANALYZE stg_vendas")
+
+            cursor.execute(_INSERT_FACTS.format(target=target, null_rejected='TRUE' if null_rejected else 'FALSE'))
+            self.inserted = cursor.rowcount
+            cursor.execute("SELECT MAX(id_venda) FROM stg_vendas")
+            self.max_id = cursor.fetchone()[0]
+            cursor.execute("TRUNCATE stg_vendas")
+        finally:
+            cursor.close()
+        return self.inserted
+
+    def _source_query(self, since_id, until_id, raw_dates=None):
+        conditions = []
+        if raw_dates is not None:
+            cursor = self.crm.cursor()
+            conditions.append(cursor.mogrify("v.data_venda = ANY(%s)", (list(raw_dates),)).decode())
+            cursor.close()
+        if since_id is not None:
+            conditions.append(f"v.id_venda > {int(since_id)}")
+        if until_id is not None:
+            conditions.append(f"v.id_venda <= {int(until_id)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"""
+            SELECT v.id_venda, v.data_venda, v.id_cliente, v.id_vendedor, v.id_loja,
+                   iv.id_produto, iv.qtd_vendida, iv.preco_venda
+            FROM vendas v
+            JOIN item_vendas iv ON v.id_venda = iv.id_venda
+            {where}
+        """
+
+    def _map_dates(self, cursor, date_normalizer):
+        """Cria stg_datas_venda com a sk_tempo, a data e a rejeição de cada data_venda distinta
+        da staging. Retorna se a data nula é rejeitada"""
+        cursor.execute("SELECT data_venda, COUNT(*) FROM stg_vendas GROUP BY data_venda")
+        mapping = []
+        null_rejected = False
+        for raw, rows in cursor.fetchall():
+            parsed, sk_tempo, status = date_normalizer.resolve(raw, rows)
+            if raw is None:
+                null_rejected = status == REJECTED
+            else:
+                mapping.append((raw, sk_tempo, parsed if sk_tempo is not None else None, status == REJECTED))
+
+        cursor.execute("""
+            CREATE TEMP TABLE stg_datas_venda (
+                data_venda VARCHAR(50) PRIMARY KEY, sk_tempo INTEGER, data_completa DATE, rejeitada BOOLEAN
+            ) ON COMMIT DROP
+        """)
+        data = io.StringIO(''.join(format_copy_row(row) for row in mapping))
+        cursor.copy_expert("COPY stg_datas_venda (data_venda, sk_tempo, data_completa, rejeitada) FROM STDIN", data)
+        cursor.execute("ANALYZE stg_datas_venda")
+        return null_rejected
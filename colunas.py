@@ -0,0 +1,278 @@
+import sys
+from array import array
+from decimal import Decimal
+from itertools import compress
+from collections import Counter
+
+from carga_bulk import format_copy_value
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: sem ela as colunas continuam em array.array
+    np = None
+
+NULL = '\\N'
+# Tipo da coluna em from_rows: códigos do módulo array ('q', 'd', ...) ou DICT
+DICT = 'dict'
+
+_NUMPY_TYPES = {'b': 'int8', 'h': 'int16', 'i': 'int32', 'l': 'int64', 'q': 'int64', 'f': 'float32', 'd': 'float64'}
+
+
+class NumericColumn:
+    """Coluna numérica em um buffer contíguo (array.array), com máscara de nulos.
+
+    `typecode` segue o módulo array ('q' para inteiros de 64 bits, 'd'
+    para float). Nulos ficam como 0 no buffer e marcados em `nulls`
+    (bytearray, 1 = nulo), que só existe quando há algum. Com scale > 0,
+    os inteiros são valores decimais escalados (ex.: centavos com
+    scale=2), lidos como Decimal e gravados no COPY com `scale` casas.
+    """
+
+    def __init__(self, typecode, data=None, nulls=None, scale=0):
+        self.typecode = typecode
+        self.data = data if data is not None else array(typecode)
+        self.nulls = nulls
+        self.scale = scale
+
+    @classmethod
+    def from_values(cls, values, typecode):
+        """Coluna a partir de uma sequência de valores (None = nulo)"""
+        data = array(typecode)
+        try:
+            data.extend(values)
+            return cls(typecode, data)
+        except TypeError:
+            pass
+
+        data = array(typecode)
+        nulls = bytearray(len(values))
+        for position, value in enumerate(values):
+            if value is None:
+                nulls[position] = 1
+                data.append(0)
+            else:
+                data.append(value)
+        return cls(typecode, data, nulls)
+
+    @classmethod
+    def from_numpy(cls, values, nulls=None, scale=0):
+        """Coluna a partir de um ndarray (copiado para um array.array do mesmo tipo)"""
+        typecode = 'd' if values.dtype.kind == 'f' else 'q'
+        data = array(typecode)
+        data.frombytes(values.astype(_NUMPY_TYPES[typecode]).tobytes())
+        if nulls is not None:
+            nulls = bytearray(nulls.astype('uint8').tobytes()) if nulls.any() else None
+        return cls(typecode, data, nulls, scale)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        values = iter(self.data)
+        if self.scale:
+            values = (Decimal(value).scaleb(-self.scale) for value in self.data)
+        if self.nulls is None:
+            return values
+        return (None if null else value for value, null in zip(values, self.nulls))
+
+    def to_list(self):
+        return list(self)
+
+    def to_numpy(self):
+        """(valores, máscara de nulos ou None) como ndarrays; os valores compartilham o buffer da coluna"""
+        if np is None:
+            raise RuntimeError("to_numpy requer o pacote numpy (pip install numpy)")
+        values = np.frombuffer(self.data, dtype=_NUMPY_TYPES[self.typecode])
+        nulls = np.frombuffer(self.nulls, dtype='bool') if self.nulls is not None else None
+        return values, nulls
+
+    def map(self, func, typecode=None):
+        """Nova coluna com func aplicada uma vez por valor distinto (None incluído)"""
+        results = {}
+
+        def apply(value):
+            if value not in results:
+                results[value] = func(value)
+            return results[value]
+
+        return NumericColumn.from_values([apply(value) for value in self], typecode or self.typecode)
+
+    def filter(self, keep):
+        """Nova coluna só com as linhas em que keep (sequência de bool) é verdadeiro"""
+        nulls = bytearray(compress(self.nulls, keep)) if self.nulls is not None else None
+        return NumericColumn(self.typecode, array(self.typecode, compress(self.data, keep)), nulls, self.scale)
+
+    def format_values(self, start=0, end=None):
+        """Valores de [start, end) no formato texto do COPY"""
+        data = self.data[start:end]
+        if self.scale:
+            unit = 10 ** self.scale
+            texts = [f"{'-' if value < 0 else ''}{abs(value) // unit}.{abs(value) % unit:0{self.scale}d}"
+                     for value in data]
+        else:
+            # repr de float é exato na volta (o NUMERIC do destino arredonda o texto)
+            texts = list(map(repr if self.typecode in 'fd' else str, data))
+        if self.nulls is not None:
+            nulls = self.nulls[start:end]
+            position = nulls.find(1)
+            while position >= 0:
+                texts[position] = NULL
+                position = nulls.find(1, position + 1)
+        return texts
+
+    @property
+    def nbytes(self):
+        return len(self.data) * self.data.itemsize + (len(self.nulls) if self.nulls is not None else 0)
+
+
+class DictionaryColumn:
+    """Coluna codificada por dicionário: cada linha guarda o código (array 'i')
+    de um valor distinto em `values`. Serve a textos, datas e qualquer valor
+    hashable que se repita (None é um valor como os outros e vira nulo no COPY).
+    """
+
+    def __init__(self, codes=None, values=None):
+        self.codes = codes if codes is not None else array('i')
+        self.values = values if values is not None else []
+        self._formatted = None
+
+    @classmethod
+    def from_values(cls, values):
+        index = {}
+        codes = array('i', [index.setdefault(value, len(index)) for value in values])
+        return cls(codes, list(index))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def to_list(self):
+        return list(self)
+
+    def value_counts(self):
+        """Pares (valor, linhas) dos valores distintos, na ordem do dicionário"""
+        counts = Counter(self.codes)
+        return [(value, counts[code]) for code, value in enumerate(self.values)]
+
+    def map(self, func, with_counts=False):
+        """Nova coluna com func aplicada uma vez por valor distinto (os códigos são compartilhados).
+
+        Com with_counts, func recebe também quantas linhas têm o valor.
+        """
+        if with_counts:
+            values = [func(value, rows) for value, rows in self.value_counts()]
+        else:
+            values = [func(value) for value in self.values]
+        return DictionaryColumn(self.codes, values)
+
+    def filter(self, keep):
+        """Nova coluna só com as linhas em que keep (sequência de bool) é verdadeiro"""
+        return DictionaryColumn(array('i', compress(self.codes, keep)), self.values)
+
+    def to_numeric(self, typecode):
+        """Materializa a coluna como NumericColumn"""
+        return NumericColumn.from_values(list(self), typecode)
+
+    def format_values(self, start=0, end=None):
+        # Cada valor distinto é formatado uma única vez
+        if self._formatted is None:
+            self._formatted = [format_copy_value(value) for value in self.values]
+        return list(map(self._formatted.__getitem__, self.codes[start:end]))
+
+    @property
+    def nbytes(self):
+        return (len(self.codes) * self.codes.itemsize + sys.getsizeof(self.values)
+                + sum(sys.getsizeof(value) for value in self.values))
+
+
+class ColumnBatch:
+    """Lote de linhas guardado por colunas (NumericColumn ou DictionaryColumn).
+
+    As transformações trabalham sobre colunas inteiras, e o lote é lido
+    diretamente pelo COPY (copy_source), sem voltar a ser uma lista de
+    tuplas. Números ocupam 8 bytes por valor em vez de um objeto Python
+    por célula; valores repetidos são guardados uma única vez.
+    """
+
+    def __init__(self, columns=None):
+        self.columns = dict(columns or {})
+
+    @classmethod
+    def from_rows(cls, rows, schema):
+        """Lote a partir de tuplas, com schema = [(nome, tipo)] na ordem das tuplas.
+
+        O tipo é um código do módulo array ('q', 'd', ...) ou DICT.
+        """
+        columns = {}
+        transposed = list(zip(*rows)) if rows else [()] * len(schema)
+        for (name, kind), values in zip(schema, transposed):
+            if kind == DICT:
+                columns[name] = DictionaryColumn.from_values(values)
+            else:
+                columns[name] = NumericColumn.from_values(values, kind)
+        return cls(columns)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, column):
+        if self.columns and len(column) != len(self):
+            raise ValueError(f"Coluna {name} com {len(column)} linhas em um lote de {len(self)}")
+        self.columns[name] = column
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def filter(self, keep):
+        """Novo lote só com as linhas em que keep (sequência de bool) é verdadeiro"""
+        return ColumnBatch({name: column.filter(keep) for name, column in self.columns.items()})
+
+    def rows(self, names=None):
+        """Linhas como tuplas, com as colunas na ordem de names (todas, por padrão)"""
+        return zip(*(self.columns[name] for name in (names or self.columns)))
+
+    def copy_source(self, names=None, chunk_rows=10000):
+        """Arquivo de leitura no formato texto do COPY, com as colunas na ordem de names"""
+        return CopySource([self.columns[name] for name in (names or self.columns)], len(self), chunk_rows)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class CopySource:
+    """Objeto com read() para cursor.copy_expert, que gera as linhas do COPY
+    em blocos de `chunk_rows` a partir das colunas, sob demanda."""
+
+    def __init__(self, columns, rows, chunk_rows=10000):
+        self.columns = columns
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self._position = 0
+        self._pending = ''
+
+    def _next_chunk(self):
+        start = self._position
+        end = min(start + self.chunk_rows, self.rows)
+        self._position = end
+        fields = [column.format_values(start, end) for column in self.columns]
+        return '\n'.join(map('\t'.join, zip(*fields))) + '\n'
+
+    def read(self, size=-1):
+        parts = [self._pending]
+        available = len(self._pending)
+        while (size < 0 or available < size) and self._position < self.rows:
+            chunk = self._next_chunk()
+            parts.append(chunk)
+            available += len(chunk)
+        data = ''.join(parts)
+        if size < 0:
+            self._pending = ''
+            return data
+        self._pending = data[size:]
+        return data[:size]
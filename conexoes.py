@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+import threading
+import configparser
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Prefixo das variáveis de ambiente (ex.: ETL_DB_HOST, ETL_WORK_MEM)
+ENV_PREFIX = 'ETL_'
+# Arquivo de configuração lido quando ETL_CONFIG não é informado (se existir)
+DEFAULT_CONFIG_FILE = 'etl.ini'
+# Seção do arquivo de configuração
+CONFIG_SECTION = 'conexao'
+
+DEFAULTS = {
+    'db_host': 'localhost',
+    'db_port': '5432',
+    'db_user': 'postgres',
+    'db_password': 'postgres',
+    'crm_database': 'global_retail_transacional',
+    'dw_database': 'global_retail_dw',
+    'admin_database': 'postgres',
+    'application_name': 'etl_global_retail',
+    'connect_timeout': '10',
+    'pool_min': '1',
+    'pool_max': '8',
+    'health_check_interval': '30',
+    # Parâmetros de sessão (vazio = padrão do servidor)
+    'work_mem': '',
+    'maintenance_work_mem': '',
+    'statement_timeout': '',
+    'lock_timeout': '',
+}
+
+SESSION_PARAMETERS = ('work_mem', 'maintenance_work_mem', 'statement_timeout', 'lock_timeout')
+
+
+class ConnectionSettings:
+    """Configuração das conexões: padrões, arquivo de configuração e variáveis de ambiente,
+    nessa ordem de precedência crescente"""
+
+    def __init__(self, values=None):
+        self.values = dict(DEFAULTS)
+        self.values.update(values or {})
+
+    @classmethod
+    def load(cls, path=None, environ=None):
+        """Carrega a configuração do arquivo (ETL_CONFIG ou etl.ini) e das variáveis ETL_*"""
+        environ = os.environ if environ is None else environ
+        values = {}
+
+        path = path or environ.get(f'{ENV_PREFIX}CONFIG')
+        if path is None and os.path.exists(DEFAULT_CONFIG_FILE):
+            path = DEFAULT_CONFIG_FILE
+        if path:
+            parser = configparser.ConfigParser()
+            if not parser.read(path, encoding='utf-8'):
+                raise FileNotFoundError(f"Arquivo de configuração não encontrado: {path}")
+            if parser.has_section(CONFIG_SECTION):
+                values.update((key, value) for key, value in parser.items(CONFIG_SECTION) if key in DEFAULTS)
+
+        for key in DEFAULTS:
+            env_value = environ.get(f'{ENV_PREFIX}{key.upper()}')
+            if env_value is not None:
+                values[key] = env_value
+        return cls(values)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def get_int(self, key):
+        return int(self.values[key])
+
+    def connect_kwargs(self, database):
+        """Argumentos de psycopg2.connect para a base ('crm', 'dw' ou 'admin')"""
+        kwargs = {
+            'host': self['db_host'],
+            'port': self.get_int('db_port'),
+            'dbname': self[f'{database}_database'],
+            'user': self['db_user'],
+            'password': self['db_password'],
+            'application_name': self['application_name'],
+            'connect_timeout': self.get_int('connect_timeout'),
+        }
+        # Parâmetros de sessão enviados na conexão, sem comandos SET adicionais
+        options = ' '.join(
+            f"-c {name}={self[name]}" for name in SESSION_PARAMETERS if self[name]
+        )
+        if options:
+            kwargs['options'] = options
+        return kwargs
+
+
+class ConnectionManager:
+    """Pools de conexões (ThreadedConnectionPool) por base, compartilhados pelos workers.
+
+    `get` bloqueia enquanto o pool estiver esgotado, em vez de falhar, e
+    devolve apenas conexões saudáveis: conexões quebradas são descartadas e
+    as ociosas há mais de health_check_interval segundos são testadas com
+    SELECT 1. `put` desfaz transações pendentes antes de devolver a conexão.
+    Os pools não são copiados para outros processos: cada processo cria os seus.
+    """
+
+    def __init__(self, settings=None, connection_factory=None):
+        self.settings = settings or ConnectionSettings.load()
+        self.connection_factory = connection_factory
+        self._pools = {}
+        self._slots = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pools'] = {}
+        state['_slots'] = {}
+        state['_last_used'] = {}
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _pool(self, database):
+        with self._lock:
+            pool = self._pools.get(database)
+            if pool is None:
+                kwargs = self.settings.connect_kwargs(database)
+                if self.connection_factory is not None:
+                    kwargs['connection_factory'] = self.connection_factory
+                maxconn = self.settings.get_int('pool_max')
+                pool = ThreadedConnectionPool(min(self.settings.get_int('pool_min'), maxconn), maxconn, **kwargs)
+                self._pools[database] = pool
+                self._slots[database] = threading.BoundedSemaphore(maxconn)
+                logger.info(f"Pool de conexões {database} criado ({kwargs['host']}:{kwargs['port']}/{kwargs['dbname']}, até {maxconn} conexões)")
+            return pool
+
+    def _is_healthy(self, connection):
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        last_used = self._last_used.get(id(connection))
+        if last_used is None or time.monotonic() - last_used < self.settings.get_int('health_check_interval'):
+            return True  # conexão recém-aberta ou usada há pouco
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def get(self, database, autocommit=False):
+        """Retira uma conexão saudável do pool da base ('crm', 'dw' ou 'admin')"""
+        pool = self._pool(database)
+        slots = self._slots[database]
+        slots.acquire()
+        try:
+            for _ in range(pool.maxconn + 1):
+                connection = pool.getconn()
+                if self._is_healthy(connection):
+                    connection.autocommit = autocommit
+                    return connection
+                logger.warning(f"Conexão {database} inválida descartada do pool")
+                self._last_used.pop(id(connection), None)
+                pool.putconn(connection, close=True)
+            raise psycopg2.OperationalError(f"Não foi possível obter uma conexão saudável com {database}")
+        except Exception:
+            slots.release()
+            raise
+
+    def put(self, database, connection):
+        """Devolve a conexão ao pool, desfazendo transações pendentes"""
+        pool = self._pools[database]
+        close = connection.closed != 0
+        if not close:
+            try:
+                if connection.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                connection.autocommit = False
+            except psycopg2.Error:
+                close = True
+        self._last_used[id(connection)] = time.monotonic()
+        if close:
+            self._last_used.pop(id(connection), None)
+        pool.putconn(connection, close=close)
+        self._slots[database].release()
+
+    @contextmanager
+    def connection(self, database, autocommit=False):
+        """Conexão do pool durante o bloco `with`"""
+        connection = self.get(database, autocommit=autocommit)
+        try:
+            yield connection
+        finally:
+            self.put(database, connection)
+
+    def health_check(self, database):
+        """Testa a conexão com a base; retorna (ok, mensagem)"""
+        try:
+            with self.connection(database) as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT version()")
+                version = cursor.fetchone()[0]
+                cursor.close()
+            return True, version
+        except Exception as e:
+            return False, str(e)
+
+    def close_all(self):
+        """Fecha todas as conexões de todos os pools"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.closeall()
+            self._pools.clear()
+            self._slots.clear()
+            self._last_used.clear()
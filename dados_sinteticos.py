@@ -0,0 +1,286 @@
+import random
+import logging
+import argparse
+from decimal import Decimal
+
+from carga_bulk import BulkLoader
+
+logger = logging.getLogger(__name__)
+
+# Escalas nomeadas: quantidade de linhas em item_vendas
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# Colunas de cada tabela do CRM (sql/create_tables.sql), na ordem de carga
+TABLES = {
+    'localidade': ('id_localidade', 'cidade', 'estado', 'regiao'),
+    'categoria_cliente': ('id_categoria_cliente', 'nome_categoria_cliente'),
+    'categoria_produto': ('id_categoria_produto', 'nome_categoria_produto'),
+    'vendedor': ('id_vendedor', 'nome_vendedor'),
+    'lojas': ('id_loja', 'nome_loja', 'gerente_loja', 'cidade', 'estado'),
+    'promocoes': ('id_promocao', 'nome_promocao', 'tipo_desconto', 'data_inicio', 'data_fim'),
+    'fornecedores': ('id_fornecedor', 'nome_fornecedor', 'pais_origem'),
+    'cliente': ('id_cliente', 'nome_cliente', 'idade', 'genero', 'id_categoria_cliente', 'id_localidade'),
+    'produto': ('id_produto', 'nome_produto', 'id_categoria_produto'),
+    'produto_fornecedor': ('id_produto', 'id_fornecedor', 'custo_compra_unitario'),
+    'vendas': ('id_venda', 'data_venda', 'id_vendedor', 'id_cliente', 'id_loja', 'valor_total'),
+    'item_vendas': ('id_venda', 'id_produto', 'qtd_vendida', 'preco_venda', 'id_promocao_aplicada'),
+}
+
+# (cidade, UF, região)
+CITIES = [
+    ('São Paulo', 'SP', 'Sudeste'), ('Rio de Janeiro', 'RJ', 'Sudeste'),
+    ('Belo Horizonte', 'MG', 'Sudeste'), ('Vitória', 'ES', 'Sudeste'),
+    ('Campinas', 'SP', 'Sudeste'), ('Niterói', 'RJ', 'Sudeste'),
+    ('Curitiba', 'PR', 'Sul'), ('Porto Alegre', 'RS', 'Sul'),
+    ('Florianópolis', 'SC', 'Sul'), ('Joinville', 'SC', 'Sul'),
+    ('Salvador', 'BA', 'Nordeste'), ('Recife', 'PE', 'Nordeste'),
+    ('Fortaleza', 'CE', 'Nordeste'), ('Natal', 'RN', 'Nordeste'),
+    ('Manaus', 'AM', 'Norte'), ('Belém', 'PA', 'Norte'),
+    ('Brasília', 'DF', 'Centro-Oeste'), ('Goiânia', 'GO', 'Centro-Oeste'),
+    ('Cuiabá', 'MT', 'Centro-Oeste'), ('Campo Grande', 'MS', 'Centro-Oeste'),
+]
+
+CUSTOMER_CATEGORIES = ['VIP', 'premium', 'Gold', 'ouro', 'Silver', 'prata', 'Comum', None]
+PRODUCT_CATEGORIES = ['eletrônicos', 'Móveis', 'ROUPAS', 'alimentos', 'Esportes', 'livros', 'Brinquedos', None]
+STORE_PREFIXES = ['Shopping', 'Centro', 'Outlet', 'Loja', 'Mall']
+PROMOTIONS = [
+    ('Black Friday', 'percentual'), ('Natal', 'percentual'), ('Liquidação de Verão', 'percentual'),
+    ('Dia das Mães', 'valor fixo'), ('Volta às Aulas', 'percentual'), ('Aniversário da Loja', 'percentual'),
+]
+FIRST_NAMES = ['joão', 'Maria', 'ANA', 'pedro', 'Lucas', 'juliana', 'CARLOS', 'fernanda', 'Rafael', 'beatriz']
+LAST_NAMES = ['da silva', 'dos Santos', 'OLIVEIRA', 'de souza', 'Pereira', 'lima', 'COSTA', 'de almeida']
+PRODUCT_WORDS = ['notebook', 'Cadeira', 'CAMISETA', 'arroz', 'bola', 'Livro', 'boneca', 'mesa', 'Tênis', 'fone']
+INVALID_DATES = ['Data Inválida', '', 'N/A', '31/02/2024', '2024-13-01', 'ontem']
+
+FIRST_YEAR = 2020
+LAST_YEAR = 2025
+
+
+def parse_scale(text):
+    """Converte uma escala nomeada (10k, 1m, 10m...) ou um inteiro na quantidade de itens de venda"""
+    key = str(text).lower()
+    if key in SCALES:
+        return SCALES[key]
+    try:
+        items = int(key.replace('_', ''))
+    except ValueError:
+        raise ValueError(f"Escala inválida: {text} (use {', '.join(SCALES)} ou um número de itens)")
+    if items <= 0:
+        raise ValueError(f"Escala inválida: {text}")
+    return items
+
+
+def _dirty(rng, text):
+    """Suja um nome como no CRM: caixa trocada e espaços sobrando"""
+    choice = rng.random()
+    if choice < 0.15:
+        text = text.upper()
+    elif choice < 0.30:
+        text = text.lower()
+    if rng.random() < 0.15:
+        text = f"  {text.replace(' ', '  ')} "
+    return text
+
+
+def _dirty_date(rng, year, month, day, invalid_rate):
+    """Data em um dos formatos encontrados no CRM, ou um valor inválido"""
+    if rng.random() < invalid_rate:
+        return rng.choice(INVALID_DATES)
+    fmt = rng.random()
+    if fmt < 0.70:
+        return f"{year}-{month:02d}-{day:02d}"
+    if fmt < 0.85:
+        return f"{day:02d}/{month:02d}/{year}"
+    if fmt < 0.92:
+        return f"{day:02d}-{month:02d}-{year}"
+    if fmt < 0.97:
+        return f"{year}{month:02d}{day:02d}"
+    return f"{year}-{month:02d}-{day:02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+
+
+class SyntheticCRM:
+    """Gera dados sintéticos e determinísticos do CRM na escala pedida.
+
+    A escala é a quantidade de linhas de item_vendas; as demais tabelas
+    crescem proporcionalmente. A mesma semente gera sempre os mesmos dados,
+    com datas em vários formatos (e inválidas) e nomes com caixa e espaços
+    irregulares, como no CRM real. As linhas são geradas sob demanda, sem
+    manter as tabelas em memória.
+    """
+
+    def __init__(self, items=SCALES['10k'], seed=42, invalid_date_rate=0.03, items_per_sale=3):
+        self.items = items
+        self.seed = seed
+        self.invalid_date_rate = invalid_date_rate
+        self.items_per_sale = items_per_sale
+
+        self.sales = max(1, items // items_per_sale)
+        self.customers = max(300, self.sales // 10)
+        self.products = max(100, min(50_000, items // 100))
+        self.sellers = max(20, min(5_000, self.sales // 500))
+        self.stores = max(8, min(500, self.sales // 5_000))
+        self.suppliers = max(5, min(1_000, self.products // 20))
+
+    def sizes(self):
+        """Quantidade aproximada de linhas por tabela"""
+        return {
+            'localidade': len(CITIES),
+            'categoria_cliente': len(CUSTOMER_CATEGORIES),
+            'categoria_produto': len(PRODUCT_CATEGORIES),
+            'vendedor': self.sellers,
+            'lojas': self.stores,
+            'promocoes': len(PROMOTIONS),
+            'fornecedores': self.suppliers,
+            'cliente': self.customers,
+            'produto': self.products,
+            'produto_fornecedor': self.products * 2,
+            'vendas': self.sales,  # aproximado
+            'item_vendas': self.items,
+        }
+
+    def rows(self):
+        """Gera (tabela, linha) de todas as tabelas, na ordem de TABLES"""
+        rng = random.Random(self.seed)
+
+        for i, (city, state, region) in enumerate(CITIES, 1):
+            yield 'localidade', (i, _dirty(rng, city), state, _dirty(rng, region))
+
+        for i, name in enumerate(CUSTOMER_CATEGORIES, 1):
+            yield 'categoria_cliente', (i, name)
+
+        for i, name in enumerate(PRODUCT_CATEGORIES, 1):
+            yield 'categoria_produto', (i, name)
+
+        for i in range(1, self.sellers + 1):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+            yield 'vendedor', (i, _dirty(rng, name))
+
+        for i in range(1, self.stores + 1):
+            city, state, _ = CITIES[i % len(CITIES)]
+            name = f"{rng.choice(STORE_PREFIXES)} {city} {i}"
+            manager = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            yield 'lojas', (i, _dirty(rng, name), _dirty(rng, manager), city, state)
+
+        for i, (name, kind) in enumerate(PROMOTIONS, 1):
+            year = rng.randint(FIRST_YEAR, LAST_YEAR)
+            month = rng.randint(1, 11)
+            discount = rng.choice(['5%', '10', '15.5%', '20 %', '25%', 'desconto'])
+            yield 'promocoes', (
+                i, name, f"{kind} {discount}",
+                _dirty_date(rng, year, month, rng.randint(1, 28), 0.2),
+                _dirty_date(rng, year, month + 1, rng.randint(1, 28), 0.2),
+            )
+
+        for i in range(1, self.suppliers + 1):
+            yield 'fornecedores', (i, _dirty(rng, f"fornecedor {rng.choice(LAST_NAMES)} {i}"),
+                                   rng.choice(['Brasil', 'China', 'EUA', 'Alemanha']))
+
+        for i in range(1, self.customers + 1):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            yield 'cliente', (
+                i, _dirty(rng, name), rng.randint(18, 80), rng.choice(['M', 'F', 'm', 'f', None]),
+                rng.randint(1, len(CUSTOMER_CATEGORIES)), rng.randint(1, len(CITIES)),
+            )
+
+        costs = []
+        for i in range(1, self.products + 1):
+            name = f"{rng.choice(PRODUCT_WORDS)} modelo {i}"
+            costs.append(rng.randint(500, 20_000))
+            yield 'produto', (i, _dirty(rng, name), rng.randint(1, len(PRODUCT_CATEGORIES)))
+
+        for i in range(1, self.products + 1):
+            for supplier in rng.sample(range(1, self.suppliers + 1), 2):
+                cents = costs[i - 1] + rng.randint(-200, 200)
+                yield 'produto_fornecedor', (i, supplier, Decimal(max(cents, 100)) / 100)
+
+        yield from self._sales(rng, costs)
+
+    def _sales(self, rng, costs):
+        """Vendas e seus itens; gera vendas até completar exatamente self.items itens"""
+        remaining = self.items
+        max_items = min(self.items_per_sale * 2 - 1, self.products)
+        sale = 0
+        while remaining > 0:
+            sale += 1
+            count = min(rng.randint(1, max_items), remaining)
+            products = rng.sample(range(1, self.products + 1), count)
+            remaining -= count
+
+            items = []
+            total = 0
+            for product in products:
+                quantity = rng.choice([1, 1, 1, 2, 2, 3, 5, 0, -1])
+                cents = costs[product - 1] * rng.randint(120, 250) // 100
+                promotion = rng.randint(1, len(PROMOTIONS)) if rng.random() < 0.3 else None
+                total += max(quantity, 0) * cents
+                items.append((sale, product, quantity, Decimal(cents) / 100, promotion))
+
+            date = _dirty_date(rng, rng.randint(FIRST_YEAR, LAST_YEAR), rng.randint(1, 12),
+                               rng.randint(1, 28), self.invalid_date_rate)
+            yield 'vendas', (
+                sale, date, rng.randint(1, self.sellers), rng.randint(1, self.customers),
+                rng.randint(1, self.stores), Decimal(total) / 100,
+            )
+            for item in items:
+                yield 'item_vendas', item
+
+    def load(self, connection, buffer_size=10000):
+        """Carrega os dados no CRM via COPY (as tabelas já devem existir e estar vazias).
+        Retorna {tabela: linhas}"""
+        loaders = {
+            table: BulkLoader(connection, table, columns, buffer_size=buffer_size)
+            for table, columns in TABLES.items()
+        }
+        for table, row in self.rows():
+            loaders[table].add(row)
+        for loader in loaders.values():
+            loader.flush()
+        connection.commit()
+        return {table: loader.rows_loaded for table, loader in loaders.items()}
+
+    def write_sql(self, path, batch_size=1000):
+        """Grava os dados como script SQL de INSERTs (formato de sql/dados_completos_padronizado.sql)"""
+        batch_table = None
+        batch = []
+
+        def write_batch(file):
+            columns = ', '.join(TABLES[batch_table])
+            values = ',\n'.join(f"({', '.join(_sql_literal(v) for v in row)})" for row in batch)
+            file.write(f"INSERT INTO {batch_table} ({columns}) VALUES\n{values};\n")
+
+        with open(path, 'w', encoding='utf-8') as file:
+            for table, row in self.rows():
+                if batch and (table != batch_table or len(batch) >= batch_size):
+                    write_batch(file)
+                    batch = []
+                batch_table = table
+                batch.append(row)
+            if batch:
+                write_batch(file)
+        logger.info(f"Dados sintéticos gravados em {path}")
+
+
+def _sql_literal(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos do CRM")
+    parser.add_argument("--scale", default="10k",
+                        help=f"itens de venda: {', '.join(SCALES)} ou um número (padrão: 10k)")
+    parser.add_argument("--seed", type=int, default=42, help="semente do gerador (padrão: 42)")
+    parser.add_argument("--output", default="sql/dados_completos_padronizado.sql",
+                        help="script SQL gerado (padrão: sql/dados_completos_padronizado.sql)")
+    args = parser.parse_args()
+
+    SyntheticCRM(parse_scale(args.scale), seed=args.seed).write_sql(args.output)
@@ -0,0 +1,100 @@
+import re
+import logging
+from collections import Counter
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+# Situação de cada valor de data
+VALID = 'valida'
+EMPTY = 'vazia'
+REJECTED = 'rejeitada'
+OUT_OF_CALENDAR = 'fora_calendario'
+
+# Marcadores usados no CRM para datas ausentes
+EMPTY_MARKERS = frozenset(['', 'data inválida', 'data invalida', 'n/a', 'null', 'none', '-'])
+
+# Formatos aceitos: (padrão, posição dos grupos de ano, mês e dia)
+DATE_PATTERNS = [
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T][\d:.+-]*)?'), (1, 2, 3)),  # YYYY-MM-DD[ HH:MM:SS]
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), (3, 2, 1)),                    # DD/MM/YYYY
+    (re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})'), (3, 2, 1)),                    # DD-MM-YYYY
+    (re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})'), (3, 2, 1)),                  # DD.MM.YYYY
+    (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), (1, 2, 3)),                    # YYYY/MM/DD
+    (re.compile(r'(\d{4})(\d{2})(\d{2})'), (1, 2, 3)),                          # YYYYMMDD
+]
+
+
+def parse_date(raw):
+    """Converte um valor de data do CRM em (date, situação), sem cache"""
+    if raw is None:
+        return None, EMPTY
+    if isinstance(raw, datetime):
+        return raw.date(), VALID
+    if isinstance(raw, date):
+        return raw, VALID
+
+    text = str(raw).strip()
+    if text.lower() in EMPTY_MARKERS:
+        return None, EMPTY
+
+    for pattern, (year, month, day) in DATE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            try:
+                return date(int(match.group(year)), int(match.group(month)), int(match.group(day))), VALID
+            except ValueError:
+                return None, REJECTED
+    return None, REJECTED
+
+
+class DateNormalizer:
+    """Normaliza datas em texto do CRM, com cache por valor bruto.
+
+    Cada valor distinto é interpretado uma única vez e mapeado diretamente
+    para sk_tempo (quando recebe o mapeamento data -> sk_tempo), de modo que
+    cada linha custa uma consulta a dicionário. Conta as linhas por situação,
+    inclusive as rejeitadas.
+    """
+
+    def __init__(self, sk_map=None):
+        self.sk_map = sk_map
+        self._cache = {}
+        self.counts = Counter()
+        self.rejected_values = Counter()
+
+    def resolve(self, raw, rows=1):
+        """Retorna (date, sk_tempo, situação) do valor bruto, contando-o `rows` vezes"""
+        entry = self._cache.get(raw)
+        if entry is None:
+            parsed, status = parse_date(raw)
+            sk_tempo = None
+            if parsed is not None and self.sk_map is not None:
+                sk_tempo = self.sk_map.get(parsed)
+                if sk_tempo is None:
+                    status = OUT_OF_CALENDAR
+            entry = self._cache[raw] = (parsed, sk_tempo, status)
+
+        self.counts[entry[2]] += rows
+        if entry[2] == REJECTED:
+            self.rejected_values[raw] += rows
+        return entry
+
+    def parse(self, raw):
+        """Retorna a data do valor bruto ou None"""
+        return self.resolve(raw)[0]
+
+    def sk_tempo(self, raw):
+        """Retorna a sk_tempo do valor bruto ou None"""
+        return self.resolve(raw)[1]
+
+    def log_stats(self, label):
+        """Registra no log as contagens por situação e os valores rejeitados mais comuns"""
+        logger.info(
+            f"Datas {label}: {self.counts[VALID]} válidas, {self.counts[EMPTY]} vazias, "
+            f"{self.counts[REJECTED]} rejeitadas, {self.counts[OUT_OF_CALENDAR]} fora do calendário "
+            f"({len(self._cache)} valores distintos)"
+        )
+        if self.rejected_values:
+            examples = ', '.join(f"{value!r} ({count})" for value, count in self.rejected_values.most_common(5))
+            logger.warning(f"Datas rejeitadas em {label}: {examples}")
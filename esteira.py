@@ -0,0 +1,188 @@
+import time
+import queue
+import logging
+import threading
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+# Marca o fim dos lotes em uma fila
+_END = object()
+# Intervalo para as threads verificarem se outra etapa falhou enquanto esperam
+_POLL_INTERVAL = 0.1
+
+
+def batched(rows, size):
+    """Agrupa as linhas em listas de até `size` linhas"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class StageStats:
+    """Contadores de uma etapa da esteira"""
+
+    __slots__ = ('batches', 'rows', 'busy_time', 'wait_input', 'wait_output',
+                 'queue_samples', 'queue_total', 'queue_max')
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.busy_time = 0.0
+        self.wait_input = 0.0    # parada sem lote para processar
+        self.wait_output = 0.0   # parada com a fila seguinte cheia (contrapressão)
+        self.queue_samples = 0
+        self.queue_total = 0
+        self.queue_max = 0
+
+    def sample_queue(self, depth):
+        self.queue_samples += 1
+        self.queue_total += depth
+        self.queue_max = max(self.queue_max, depth)
+
+    def to_dict(self):
+        return {
+            'lotes': self.batches,
+            'linhas': self.rows,
+            'tempo_ativo_s': round(self.busy_time, 4),
+            'espera_entrada_s': round(self.wait_input, 4),
+            'espera_saida_s': round(self.wait_output, 4),
+            'fila_media': round(self.queue_total / self.queue_samples, 2) if self.queue_samples else 0.0,
+            'fila_maxima': self.queue_max,
+        }
+
+
+class Pipeline:
+    """Executa extração, transformação e carga como etapas concorrentes.
+
+    A extração e a transformação rodam em threads próprias e a carga na
+    thread que chamou run(); as etapas são ligadas por filas de até
+    `queue_size` lotes, de modo que a leitura do lote N+1 no CRM acontece
+    enquanto o lote N é gravado no DW. Com a fila cheia a etapa anterior
+    espera (contrapressão), e a memória fica limitada a poucos lotes.
+    O psycopg2 libera o GIL durante as idas ao servidor, o que permite a
+    sobreposição. Na primeira exceção as demais etapas param e ela é
+    relançada em run().
+    """
+
+    STAGES = ('extracao', 'transformacao', 'carga')
+
+    def __init__(self, queue_size=4):
+        self.queue_size = queue_size
+        self.stats = {name: StageStats() for name in self.STAGES}
+        self._stop = threading.Event()
+        self._errors = []
+
+    def run(self, batches, transform, sink):
+        """Lê os lotes de `batches`, aplica `transform` a cada um e entrega o resultado a `sink`"""
+        extracted = queue.Queue(self.queue_size)
+        transformed = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self._guard, args=(self._extract, batches, extracted),
+                             name='esteira-extracao', daemon=True),
+            threading.Thread(target=self._guard, args=(self._transform, transform, extracted, transformed),
+                             name='esteira-transformacao', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._load(sink, transformed)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    def _guard(self, target, *args):
+        try:
+            target(*args)
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, stats, output, item):
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                output.put(item, timeout=_POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        stats.wait_output += time.perf_counter() - start
+        stats.sample_queue(output.qsize())
+
+    def _get(self, stats, source):
+        start = time.perf_counter()
+        item = _END
+        while not self._stop.is_set():
+            try:
+                item = source.get(timeout=_POLL_INTERVAL)
+                break
+            except queue.Empty:
+                continue
+        stats.wait_input += time.perf_counter() - start
+        return item
+
+    def _extract(self, batches, output):
+        stats = self.stats['extracao']
+        iterator = iter(batches)
+        while not self._stop.is_set():
+            # A leitura no CRM acontece dentro de next()
+            start = time.perf_counter()
+            batch = next(iterator, _END)
+            stats.busy_time += time.perf_counter() - start
+            if batch is _END:
+                break
+            stats.batches += 1
+            stats.rows += len(batch)
+            self._put(stats, output, batch)
+        self._put(stats, output, _END)
+
+    def _transform(self, transform, source, output):
+        stats = self.stats['transformacao']
+        while True:
+            batch = self._get(stats, source)
+            if batch is _END:
+                break
+            start = time.perf_counter()
+            result = transform(batch)
+            stats.busy_time += time.perf_counter() - start
+            stats.batches += 1
+            stats.rows += len(result)
+            self._put(stats, output, result)
+        self._put(stats, output, _END)
+
+    def _load(self, sink, source):
+        stats = self.stats['carga']
+        while True:
+            rows = self._get(stats, source)
+            if rows is _END:
+                break
+            start = time.perf_counter()
+            sink(rows)
+            stats.busy_time += time.perf_counter() - start
+            stats.batches += 1
+            stats.rows += len(rows)
+
+    def to_dict(self):
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def log_stats(self, label):
+        """Registra no log o tempo ativo, as esperas e a ocupação das filas de cada etapa"""
+        for name, stats in self.stats.items():
+            logger.info(
+                f"Esteira {label} - {name}: {stats.batches} lotes, {stats.rows} linhas, "
+                f"ativo {stats.busy_time:.2f}s, sem entrada {stats.wait_input:.2f}s, "
+                f"fila cheia {stats.wait_output:.2f}s"
+                + (f", fila seguinte média {stats.queue_total / stats.queue_samples:.1f} "
+                   f"(máx. {stats.queue_max})" if stats.queue_samples else "")
+            )
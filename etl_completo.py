@@ -1,44 +1,134 @@
-import psycopg2
+import argparse
+import copy
+import threading
+from collections import deque
 from pathlib import Path
-import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 
+from cache_chaves import SurrogateKeyCache, FACT_DIMENSIONS
+from carga_bulk import BulkLoader
+from historico import DimensionHistory
+from esteira import Pipeline, batched
+from colunas import ColumnBatch, DICT
+from metricas import FactMetrics
+from carga_sql import StagedFactLoader
+from retomada import CheckpointStore
+from exportacao import ParquetExporter
+from agregados import AggregateManager
+from particoes import FactPartitionManager
+from migracoes import SchemaMigrator
+from extracao import stream_rows
+from incremental import WatermarkStore
+from agendador import DagScheduler
+from carga_paralela import load_facts_partitioned
+from datas import DateNormalizer, parse_date, REJECTED as DATE_REJECTED
+from instrumentacao import StageProfiler
+from calendario import CalendarDimension
+from indices import IndexManager, read_index_statements
+from conexoes import ConnectionManager, ConnectionSettings
+from scripts_sql import ScriptExecutor, strip_leading_comments
+import transformacoes
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Colunas das vendas extraídas do CRM para a fato, na ordem da consulta, e o tipo de
+# cada uma no lote por colunas (colunas.ColumnBatch)
+VENDAS_COLUMNS = [
+    ('id_venda', 'q'), ('data_venda', DICT), ('id_cliente', 'q'), ('id_produto', 'q'), ('id_vendedor', 'q'),
+    ('id_loja', 'q'), ('qtd_vendida', 'q'), ('preco_venda', 'd'),
+]
+_VENDAS_SELECT = """
+    SELECT v.id_venda, v.data_venda, v.id_cliente, iv.id_produto,
+           v.id_vendedor, v.id_loja, iv.qtd_vendida, iv.preco_venda
+    FROM vendas v
+    INNER JOIN item_vendas iv ON v.id_venda = iv.id_venda
+"""
+# Colunas gravadas na fato pelas cargas em Python, na ordem das linhas de _transform_sales.
+# Promoções não são aplicadas: percentual_desconto e valor_desconto ficam com o padrão 0
+FACT_LOAD_COLUMNS = [
+    'id_venda', 'sk_tempo', 'data_venda', 'sk_cliente', 'sk_produto', 'sk_vendedor', 'sk_loja',
+    'quantidade_vendida', 'preco_unitario_venda', 'valor_total_item', 'valor_final',
+    'custo_unitario', 'custo_total_item', 'lucro_bruto'
+]
+
 class ETLProcessor:
-    def __init__(self):
+    # Etapas da carga das dimensões: (nome, método, dependências)
+    DIMENSION_STAGES = [
+        ('localidade', 'extract_and_transform_localidade', ()),
+        ('categoria_cliente', 'extract_and_transform_categoria_cliente', ()),
+        ('categoria_produto', 'extract_and_transform_categoria_produto', ()),
+        ('fornecedor', 'extract_and_transform_fornecedor', ()),
+        ('vendedor', 'extract_and_transform_vendedor', ()),
+        ('promocao', 'extract_and_transform_promocao', ()),
+        ('tempo', 'generate_dim_tempo', ()),
+        ('cliente', 'extract_and_transform_cliente', ('localidade', 'categoria_cliente')),
+        ('produto', 'extract_and_transform_produto', ('categoria_produto',)),
+        ('loja', 'extract_and_transform_loja', ('localidade',)),
+    ]
+    
+    def __init__(self, batch_size=10000, streaming=True, itersize=10000, supplier_costs=False,
+                 dimension_workers=4, fact_workers=1, profiler=None, calendar_margin_days=365,
+                 index_workers=4, index_defer_ratio=0.1, settings=None, script_batch_size=1000,
+                 pipeline=False, pipeline_queue_size=4, fact_engine='python', checkpoint=False,
+                 export_dir=None, export_batch_rows=100000, rebuild=False, columnar=False):
         self.conn_crm = None
         self.conn_dw = None
+        self.batch_size = batch_size
+        self.streaming = streaming
+        self.itersize = itersize
+        self.supplier_costs = supplier_costs
+        self.dimension_workers = dimension_workers
+        self.fact_workers = fact_workers
+        self.index_workers = index_workers
+        self.index_defer_ratio = index_defer_ratio
+        self.script_batch_size = script_batch_size
+        self.pipeline = pipeline
+        self.pipeline_queue_size = pipeline_queue_size
+        self.pipeline_stats = {}
+        self.columnar = columnar
+        self.metrics = FactMetrics() if columnar else None
+        self.fact_engine = fact_engine
+        self.checkpoint = checkpoint
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        self.checkpoints = CheckpointStore()
+        self.export_dir = export_dir
+        self.export_batch_rows = export_batch_rows
+        self.aggregates = AggregateManager()
+        self.partitions = FactPartitionManager()
+        self.rebuild = rebuild
+        self.scripts_dir = Path("sql")
+        self.load_stats = {}
+        self.sk_cache = SurrogateKeyCache()
+        self.watermarks = WatermarkStore()
+        self.calendar = CalendarDimension(margin_days=calendar_margin_days)
+        self.profiler = profiler or StageProfiler()
+        self.connections = ConnectionManager(settings, connection_factory=self.profiler.connection_factory)
         
     def connect_to_crm(self):
-        """Conecta ao banco CRM (origem)"""
+        """Conecta ao banco CRM (origem), com uma conexão do pool"""
         try:
-            self.conn_crm = psycopg2.connect(
-                host="localhost",
-                port=5432,
-                database="global_retail_transacional",
-                user="postgres",
-                password="postgres"
-            )
+            self.conn_crm = self.connections.get('crm')
             logger.info("Conexão com CRM estabelecida com sucesso")
             return True
         except Exception as e:
             logger.error(f"Erro ao conectar com CRM: {e}")
             return False
     
+    def open_dw_connection(self):
+        """Retira uma conexão do pool do Data Warehouse (devolver com release_dw_connection)"""
+        return self.connections.get('dw')
+    
+    def release_dw_connection(self, connection):
+        """Devolve ao pool uma conexão obtida com open_dw_connection"""
+        self.connections.put('dw', connection)
+    
     def connect_to_dw(self):
-        """Conecta ao Data Warehouse"""
+        """Conecta ao Data Warehouse, com uma conexão do pool"""
         try:
-            self.conn_dw = psycopg2.connect(
-                host='localhost',
-                database='global_retail_dw',
-                user='postgres',
-                password='postgres'
-            )
-            self.conn_dw.autocommit = False
+            self.conn_dw = self.open_dw_connection()
             logger.info("Conexão com DW estabelecida com sucesso")
             return True
         except Exception as e:
@@ -46,90 +136,97 @@ class ETLProcessor:
             return False
     
     def reset_dw_connection(self):
-        """Reseta a conexão do DW em caso de erro"""
+        """Troca a conexão do DW por outra saudável do pool"""
         try:
             if self.conn_dw:
-                self.conn_dw.close()
+                self.release_dw_connection(self.conn_dw)
+                self.conn_dw = None
             return self.connect_to_dw()
         except Exception as e:
             logger.error(f"Erro ao resetar conexão DW: {e}")
             return False
     
-    def setup_databases(self):
-        """Configura as bases de dados"""
+    def _spawn_worker(self):
+        """Cria uma cópia do processador com conexões próprias para uso em outra thread"""
+        worker = copy.copy(self)
+        worker.conn_crm = None
+        worker.conn_dw = None
+        worker.sk_cache = SurrogateKeyCache()
+        if not worker.connect_to_crm() or not worker.connect_to_dw():
+            worker.close_connections()
+            raise RuntimeError("Não foi possível conectar o worker às bases")
+        return worker
+    
+    def close_connections(self):
+        """Devolve ao pool as conexões com o CRM e o DW"""
+        if self.conn_crm:
+            self.connections.put('crm', self.conn_crm)
+            self.conn_crm = None
+        if self.conn_dw:
+            self.connections.put('dw', self.conn_dw)
+            self.conn_dw = None
+    
+    def setup_databases(self, rebuild=True):
+        """Configura as bases de dados. Com rebuild=False, só cria as que não existem"""
         try:
             # Conecta ao PostgreSQL para criar as bases
-            conn_admin = psycopg2.connect(
-                host="localhost",
-                port=5432,
-                database="postgres",
-                user="postgres",
-                password="postgres"
-            )
-            conn_admin.autocommit = True
-            cursor = conn_admin.cursor()
-            
-            # Criar base CRM
-            cursor.execute("DROP DATABASE IF EXISTS global_retail_transacional")
-            cursor.execute("CREATE DATABASE global_retail_transacional")
-            logger.info("Base global_retail_transacional criada")
-            
-            # Criar base DW
-            cursor.execute("DROP DATABASE IF EXISTS global_retail_dw")
-            cursor.execute("CREATE DATABASE global_retail_dw")
-            logger.info("Base global_retail_dw criada")
-            
-            cursor.close()
-            conn_admin.close()
+            with self.connections.connection('admin', autocommit=True) as conn_admin:
+                cursor = conn_admin.cursor()
+                
+                for database in ('crm', 'dw'):
+                    name = self.connections.settings[f'{database}_database']
+                    if rebuild:
+                        cursor.execute(f'DROP DATABASE IF EXISTS "{name}"')
+                    else:
+                        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (name,))
+                        if cursor.fetchone():
+                            logger.info(f"Base {name} existente mantida")
+                            continue
+                    cursor.execute(f'CREATE DATABASE "{name}"')
+                    logger.info(f"Base {name} criada")
+                
+                cursor.close()
             return True
             
         except Exception as e:
             logger.error(f"Erro ao configurar bases de dados: {e}")
             return False
     
+    def migrate(self, database):
+        """Aplica na base ('crm' ou 'dw') os scripts de esquema ainda não aplicados"""
+        connection = self.conn_crm if database == 'crm' else self.conn_dw
+        try:
+            SchemaMigrator(connection, database, self.scripts_dir).migrate()
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o esquema da base {database}: {e}")
+            return False
+    
+    def crm_populated(self):
+        """Indica se o CRM já tem vendas carregadas (item_vendas é a última tabela da carga inicial)"""
+        cursor = self.conn_crm.cursor()
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM item_vendas)")
+        populated = cursor.fetchone()[0]
+        cursor.close()
+        self.conn_crm.commit()
+        return populated
+    
     def execute_sql_file(self, connection, file_path, description=""):
-        """Executa um arquivo SQL"""
+        """Executa um arquivo SQL em fluxo, em lotes de comandos (INSERTs simples viram COPY)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                sql_script = file.read()
-            
-            # Limpar SQL para PostgreSQL
-            sql_script = self.clean_sql_for_postgresql(sql_script)
-            
-            cursor = connection.cursor()
-            
-            # Executar o script completo
-            try:
-                cursor.execute(sql_script)
-                connection.commit()
-                logger.info(f"{description} executado com sucesso")
-                cursor.close()
+            executor = ScriptExecutor(connection, batch_size=self.script_batch_size,
+                                      copy_rows=self.batch_size,
+                                      transform=self.clean_sql_for_postgresql)
+            success = executor.run_file(file_path)
+            
+            if success:
+                logger.info(f"{description} executado com sucesso "
+                            f"({executor.executed} comandos, {executor.copied_rows} linhas via COPY)")
                 return True
-            except Exception as e:
-                logger.error(f"Erro ao executar script completo: {e}")
-                connection.rollback()
-                
-                # Tentar executar comando por comando como fallback
-                commands = sql_script.split(';')
-                executed_count = 0
-                
-                for command in commands:
-                    command = command.strip()
-                    if command and not command.startswith('--') and len(command) > 5:
-                        try:
-                            cursor.execute(command)
-                            connection.commit()
-                            executed_count += 1
-                            if executed_count % 10 == 0:
-                                logger.info(f"{description}: {executed_count} comandos executados...")
-                        except Exception as cmd_error:
-                            logger.error(f"Erro ao executar comando: {cmd_error}")
-                            logger.error(f"Comando: {command[:100]}...")
-                            connection.rollback()
-                
-                logger.info(f"{description} executado. Total: {executed_count} comandos")
-                cursor.close()
-                return executed_count > 0
+            
+            logger.info(f"{description} executado. Total: {executor.executed} comandos, "
+                        f"{executor.failed} com erro")
+            return executor.executed > 0
             
         except Exception as e:
             logger.error(f"Erro ao executar {file_path}: {e}")
@@ -137,588 +234,495 @@ class ETLProcessor:
     
     def clean_sql_for_postgresql(self, sql_content):
         """Remove/substitui comandos específicos do MySQL para PostgreSQL"""
+        if strip_leading_comments(sql_content).upper().startswith('SET FOREIGN_KEY_CHECKS'):
+            return ''
         sql_content = sql_content.replace('SET FOREIGN_KEY_CHECKS=0;', '')
         sql_content = sql_content.replace('SET FOREIGN_KEY_CHECKS=1;', '')
         sql_content = sql_content.replace(' VALUE ', ' VALUES ')
         return sql_content
     
+    def extract_rows(self, query, name, params=None):
+        """Extrai linhas do CRM: sob demanda com cursor nomeado ou de uma vez (fetchall)"""
+        if self.streaming:
+            return stream_rows(self.conn_crm, query, name, params, self.itersize)
+        
+        cursor = self.conn_crm.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    
+    def _id_range_filter(self, since_id=None, until_id=None):
+        """Monta o filtro (WHERE, parâmetros) da faixa since_id < v.id_venda <= until_id"""
+        conditions = []
+        params = []
+        if since_id is not None:
+            conditions.append("v.id_venda > %s")
+            params.append(since_id)
+        if until_id is not None:
+            conditions.append("v.id_venda <= %s")
+            params.append(until_id)
+        if not conditions:
+            return "", None
+        return "WHERE " + " AND ".join(conditions), tuple(params)
+    
+    def _key_after_filter(self, filtro, params, last_key):
+        """Acrescenta ao filtro de faixa a condição (v.id_venda, iv.id_produto) > last_key"""
+        condition = "(v.id_venda, iv.id_produto) > (%s, %s)"
+        filtro = f"{filtro} AND {condition}" if filtro else f"WHERE {condition}"
+        return filtro, tuple(params or ()) + tuple(last_key)
+    
+    def _bulk_loader(self, table, columns, on_conflict=None):
+        """Cria um carregador em lote para uma tabela do DW"""
+        return BulkLoader(self.conn_dw, table, columns,
+                          buffer_size=self.batch_size, on_conflict=on_conflict)
+    
+    def _dimension_loader(self, table, key, columns, untracked=()):
+        """Cria um carregador com histórico (SCD tipo 2) para uma dimensão do DW"""
+        return DimensionHistory(self.conn_dw, table, key, columns,
+                                buffer_size=self.batch_size, untracked=untracked)
+    
+    def _transform_names(self, names, default, standardize):
+        """Nomes limpos (default quando vazios) e padronizados de uma coluna inteira do lote,
+        com cada valor distinto transformado uma única vez (transformacoes.transform_column)"""
+        clean = transformacoes.transform_column(lambda name: self.clean_text(name) if name else default, names)
+        return clean, transformacoes.transform_column(standardize, clean)
+    
     def extract_and_transform_localidade(self):
         """ETL para dimensão Localidade"""
         logger.info("Iniciando ETL da dimensão Localidade...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_localidade', 'id_localidade', ['id_localidade', 'cidade', 'estado', 'regiao', 'regiao_padronizada', 'eh_capital'])
             
             # Extração
-            cursor_crm.execute("""
+            localidades = self.extract_rows("""
                 SELECT DISTINCT id_localidade, cidade, estado, regiao 
                 FROM localidade 
                 ORDER BY id_localidade
-            """)
-            
-            localidades = cursor_crm.fetchall()
+            """, 'extract_localidades')
             
-            for row in localidades:
-                id_loc, cidade, estado, regiao = row
+            for lote in batched(localidades, self.batch_size):
+                ids, cidades, estados, regioes = zip(*lote)
                 
-                # Transformações
-                cidade_clean = self.clean_text(cidade) if cidade else 'N/A'
-                estado_clean = self.clean_text(estado) if estado else 'N/A'
-                regiao_clean = self.standardize_region(regiao) if regiao else 'N/A'
-                eh_capital = self.is_capital(cidade_clean, estado_clean)
+                # Transformações por coluna: cada valor distinto do lote é transformado uma única vez
+                cidades_clean = transformacoes.transform_column(
+                    lambda cidade: self.clean_text(cidade) if cidade else 'N/A', cidades)
+                estados_clean = transformacoes.transform_column(
+                    lambda estado: self.clean_text(estado) if estado else 'N/A', estados)
+                regioes_clean = transformacoes.transform_column(
+                    lambda regiao: self.standardize_region(regiao) if regiao else 'N/A', regioes)
+                capitais = transformacoes.transform_column(self.is_capital, cidades_clean, estados_clean)
                 
                 # Carga
-                cursor_dw.execute("""
-                    INSERT INTO dim_localidade 
-                    (id_localidade, cidade, estado, regiao, regiao_padronizada, eh_capital)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_loc, cidade_clean, estado_clean, regiao, regiao_clean, eh_capital))
+                for row in zip(ids, cidades_clean, estados_clean, regioes, regioes_clean, capitais):
+                    loader.add(row)
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Localidade carregada: {len(localidades)} registros")
+            logger.info(f"Dimensão Localidade carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Localidade: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_categoria_cliente(self):
         """ETL para dimensão Categoria Cliente"""
         logger.info("Iniciando ETL da dimensão Categoria Cliente...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_categoria_cliente', 'id_categoria_cliente', ['id_categoria_cliente', 'nome_categoria_cliente', 'categoria_padronizada'])
             
-            cursor_crm.execute("""
+            categorias = self.extract_rows("""
                 SELECT id_categoria_cliente, nome_categoria_cliente 
                 FROM categoria_cliente 
                 ORDER BY id_categoria_cliente
-            """)
+            """, 'extract_categorias_cliente')
             
-            categorias = cursor_crm.fetchall()
-            
-            for row in categorias:
-                id_cat, nome_cat = row
+            for lote in batched(categorias, self.batch_size):
+                ids, nomes = zip(*lote)
                 
-                # Transformações
-                nome_clean = self.clean_text(nome_cat) if nome_cat else 'Não Definido'
-                nome_padronizado = self.standardize_customer_category(nome_clean)
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    nomes, 'Não Definido', self.standardize_customer_category)
                 
-                cursor_dw.execute("""
-                    INSERT INTO dim_categoria_cliente 
-                    (id_categoria_cliente, nome_categoria_cliente, categoria_padronizada)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_cat, nome_clean, nome_padronizado))
+                for row in zip(ids, nomes_clean, nomes_padronizados):
+                    loader.add(row)
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Categoria Cliente carregada: {len(categorias)} registros")
+            logger.info(f"Dimensão Categoria Cliente carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Categoria Cliente: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_categoria_produto(self):
         """ETL para dimensão Categoria Produto"""
         logger.info("Iniciando ETL da dimensão Categoria Produto...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_categoria_produto', 'id_categoria_produto', ['id_categoria_produto', 'nome_categoria_produto', 'categoria_padronizada'])
             
-            cursor_crm.execute("""
+            categorias = self.extract_rows("""
                 SELECT id_categoria_produto, nome_categoria_produto 
                 FROM categoria_produto 
                 ORDER BY id_categoria_produto
-            """)
-            
-            categorias = cursor_crm.fetchall()
+            """, 'extract_categorias_produto')
             
-            for row in categorias:
-                id_cat, nome_cat = row
+            for lote in batched(categorias, self.batch_size):
+                ids, nomes = zip(*lote)
                 
-                # Transformações
-                nome_clean = self.clean_text(nome_cat) if nome_cat else 'Não Definido'
-                nome_padronizado = self.standardize_product_category(nome_clean)
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    nomes, 'Não Definido', self.standardize_product_category)
                 
-                cursor_dw.execute("""
-                    INSERT INTO dim_categoria_produto 
-                    (id_categoria_produto, nome_categoria_produto, categoria_padronizada)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_cat, nome_clean, nome_padronizado))
+                for row in zip(ids, nomes_clean, nomes_padronizados):
+                    loader.add(row)
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Categoria Produto carregada: {len(categorias)} registros")
+            logger.info(f"Dimensão Categoria Produto carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Categoria Produto: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_fornecedor(self):
         """ETL para dimensão Fornecedor"""
         logger.info("Iniciando ETL da dimensão Fornecedor...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_fornecedor', 'id_fornecedor', ['id_fornecedor', 'nome_fornecedor', 'nome_padronizado', 'sk_localidade', 'status_fornecedor'])
             
-            cursor_crm.execute("""
+            fornecedores = self.extract_rows("""
                 SELECT f.id_fornecedor, f.nome_fornecedor, f.pais_origem
                 FROM fornecedores f
                 ORDER BY f.id_fornecedor
-            """)
-            
-            fornecedores = cursor_crm.fetchall()
+            """, 'extract_fornecedores')
             
-            for row in fornecedores:
-                id_forn, nome_forn, pais_origem = row
+            for lote in batched(fornecedores, self.batch_size):
+                ids, nomes, _ = zip(*lote)
                 
-                # Transformações
-                nome_clean = self.clean_text(nome_forn) if nome_forn else 'Fornecedor N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    nomes, 'Fornecedor N/A', self.standardize_name)
                 
                 # Para fornecedores, vamos usar sk_localidade = NULL já que não temos localidade
-                cursor_dw.execute("""
-                    INSERT INTO dim_fornecedor 
-                    (id_fornecedor, nome_fornecedor, nome_padronizado, sk_localidade, status_fornecedor)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_forn, nome_clean, nome_padronizado, None, 'ATIVO'))
+                for id_forn, nome_clean, nome_padronizado in zip(ids, nomes_clean, nomes_padronizados):
+                    loader.add((id_forn, nome_clean, nome_padronizado, None, 'ATIVO'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Fornecedor carregada: {len(fornecedores)} registros")
+            logger.info(f"Dimensão Fornecedor carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Fornecedor: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_cliente(self):
         """ETL para dimensão Cliente"""
         logger.info("Iniciando ETL da dimensão Cliente...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_cliente', 'id_cliente', [
+                'id_cliente', 'nome_cliente', 'nome_padronizado', 'sk_categoria_cliente',
+                'sk_localidade', 'data_cadastro', 'status_cliente'
+            ], untracked=('data_cadastro',))
             
-            cursor_crm.execute("""
+            clientes = self.extract_rows("""
                 SELECT c.id_cliente, c.nome_cliente, c.id_categoria_cliente, c.id_localidade
                 FROM cliente c
                 ORDER BY c.id_cliente
-            """)
-            
-            clientes = cursor_crm.fetchall()
-            
-            for row in clientes:
-                id_cli, nome_cli, id_cat_cli, id_loc = row
-                
-                # Buscar chaves surrogadas no DW
-                sk_cat_cli = None
-                sk_loc = None
-                
-                if id_cat_cli:
-                    cursor_dw.execute("SELECT sk_categoria_cliente FROM dim_categoria_cliente WHERE id_categoria_cliente = %s", (id_cat_cli,))
-                    cat_result = cursor_dw.fetchone()
-                    if cat_result:
-                        sk_cat_cli = cat_result[0]
-                
-                if id_loc:
-                    cursor_dw.execute("SELECT sk_localidade FROM dim_localidade WHERE id_localidade = %s", (id_loc,))
-                    loc_result = cursor_dw.fetchone()
-                    if loc_result:
-                        sk_loc = loc_result[0]
-                
-                # Transformações
-                nome_clean = self.clean_text(nome_cli) if nome_cli else 'Cliente N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_cliente 
-                    (id_cliente, nome_cliente, nome_padronizado, sk_categoria_cliente, 
-                     sk_localidade, data_cadastro, status_cliente)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_cli, nome_clean, nome_padronizado, sk_cat_cli, sk_loc, 
-                     datetime.now().date(), 'ATIVO'))
+            """, 'extract_clientes')
+            self.sk_cache.load(self.conn_dw, ['categoria_cliente', 'localidade'])
+            
+            for lote in batched(clientes, self.batch_size):
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    [row[1] for row in lote], 'Cliente N/A', self.standardize_name)
+                
+                for (id_cli, _, id_cat_cli, id_loc), nome_clean, nome_padronizado in zip(
+                        lote, nomes_clean, nomes_padronizados):
+                    # Buscar chaves surrogadas no cache
+                    sk_cat_cli = self.sk_cache.sk('categoria_cliente', id_cat_cli)
+                    sk_loc = self.sk_cache.sk('localidade', id_loc)
+                    
+                    loader.add((id_cli, nome_clean, nome_padronizado, sk_cat_cli, sk_loc,
+                                datetime.now().date(), 'ATIVO'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Cliente carregada: {len(clientes)} registros")
+            logger.info(f"Dimensão Cliente carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Cliente: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_produto(self):
         """ETL para dimensão Produto"""
         logger.info("Iniciando ETL da dimensão Produto...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_produto', 'id_produto', [
+                'id_produto', 'nome_produto', 'nome_padronizado', 'sk_categoria_produto',
+                'preco_unitario', 'custo_unitario', 'margem_lucro', 'status_produto'
+            ])
             
-            cursor_crm.execute("""
+            produtos = self.extract_rows("""
                 SELECT p.id_produto, p.nome_produto, p.id_categoria_produto
                 FROM produto p
                 ORDER BY p.id_produto
-            """)
-            
-            produtos = cursor_crm.fetchall()
-            
-            for row in produtos:
-                id_prod, nome_prod, id_cat_prod = row
-                
-                # Buscar sk_categoria_produto no DW
-                sk_cat_prod = None
-                if id_cat_prod:
-                    cursor_dw.execute("SELECT sk_categoria_produto FROM dim_categoria_produto WHERE id_categoria_produto = %s", (id_cat_prod,))
-                    cat_result = cursor_dw.fetchone()
-                    if cat_result:
-                        sk_cat_prod = cat_result[0]
-                
-                # Buscar preço médio do produto nas vendas
-                cursor_crm.execute("""
-                    SELECT AVG(preco_venda) FROM item_vendas WHERE id_produto = %s
-                """, (id_prod,))
-                preco_result = cursor_crm.fetchone()
-                preco_medio = float(preco_result[0]) if preco_result[0] else 0.0
-                
-                # Transformações
-                nome_clean = self.clean_text(nome_prod) if nome_prod else 'Produto N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
-                custo_estimado = preco_medio * 0.7 if preco_medio > 0 else 0.0  # Estimar custo como 70% do preço
-                margem = ((preco_medio - custo_estimado) / preco_medio * 100) if preco_medio > 0 else 0.0
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_produto 
-                    (id_produto, nome_produto, nome_padronizado, sk_categoria_produto,
-                     preco_unitario, custo_unitario, margem_lucro, status_produto)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_prod, nome_clean, nome_padronizado, sk_cat_prod, 
-                     preco_medio, custo_estimado, margem, 'ATIVO'))
+            """, 'extract_produtos')
+            precos = self.aggregate_product_prices()
+            self.sk_cache.load(self.conn_dw, ['categoria_produto'])
+            
+            for lote in batched(produtos, self.batch_size):
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    [row[1] for row in lote], 'Produto N/A', self.standardize_name)
+                
+                for (id_prod, _, id_cat_prod), nome_clean, nome_padronizado in zip(
+                        lote, nomes_clean, nomes_padronizados):
+                    # Buscar sk_categoria_produto no cache
+                    sk_cat_prod = self.sk_cache.sk('categoria_produto', id_cat_prod)
+                    
+                    # Preço médio nas vendas e custo médio de compra (agregados uma única vez)
+                    preco_medio, custo_compra = precos.get(id_prod, (0.0, None))
+                    
+                    if self.supplier_costs and custo_compra is not None:
+                        custo_unitario = custo_compra
+                    else:
+                        custo_unitario = preco_medio * 0.7 if preco_medio > 0 else 0.0  # Estimar custo como 70% do preço
+                    margem = ((preco_medio - custo_unitario) / preco_medio * 100) if preco_medio > 0 else 0.0
+                    margem = max(-999.99, min(margem, 999.99))  # Limite de DECIMAL(5,2)
+                    
+                    loader.add((id_prod, nome_clean, nome_padronizado, sk_cat_prod,
+                                preco_medio, custo_unitario, margem, 'ATIVO'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Produto carregada: {len(produtos)} registros")
+            logger.info(f"Dimensão Produto carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Produto: {e}")
             self.conn_dw.rollback()
+            return False
     
-    def extract_and_transform_vendedor(self):
-        """ETL para dimensão Vendedor"""
-        logger.info("Iniciando ETL da dimensão Vendedor...")
+    def aggregate_product_prices(self):
+        """Calcula em uma única passada o preço médio de venda e o custo médio de compra por produto"""
+        cursor = self.conn_crm.cursor()
+        cursor.execute("""
+            SELECT COALESCE(iv.id_produto, pf.id_produto), iv.preco_medio, pf.custo_medio
+            FROM (
+                SELECT id_produto, AVG(preco_venda) AS preco_medio
+                FROM item_vendas
+                GROUP BY id_produto
+            ) iv
+            FULL OUTER JOIN (
+                SELECT id_produto, AVG(custo_compra_unitario) AS custo_medio
+                FROM produto_fornecedor
+                GROUP BY id_produto
+            ) pf ON pf.id_produto = iv.id_produto
+        """)
         
-        try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
-            
-            cursor_crm.execute("""
-                SELECT v.id_vendedor, v.nome_vendedor, v.telefone, v.email
-                FROM vendedor v
-                ORDER BY v.id_vendedor
-            """)
-            
-            vendedores = cursor_crm.fetchall()
-            
-            for row in vendedores:
-                id_vend, nome_vend, telefone, email = row
-                
-                # Transformações
-                nome_clean = self.clean_text(nome_vend) if nome_vend else 'Vendedor N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
-                telefone_clean = self.clean_text(telefone) if telefone else None
-                email_clean = self.clean_text(email) if email else None
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_vendedor 
-                    (id_vendedor, nome_vendedor, nome_padronizado, telefone, 
-                     email, data_cadastro, status_vendedor)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_vend, nome_clean, nome_padronizado, telefone_clean, 
-                     email_clean, datetime.now().date(), 'ATIVO'))
-            
-            self.conn_dw.commit()
-            logger.info(f"Dimensão Vendedor carregada: {len(vendedores)} registros")
-            
-        except Exception as e:
-            logger.error(f"Erro no ETL de Vendedor: {e}")
-            self.conn_dw.rollback()
-    
-    def extract_and_transform_loja(self):
-        """ETL para dimensão Loja"""
-        logger.info("Iniciando ETL da dimensão Loja...")
+        precos = {}
+        for id_prod, preco_medio, custo_medio in cursor:
+            precos[id_prod] = (
+                float(preco_medio) if preco_medio else 0.0,
+                float(custo_medio) if custo_medio is not None else None
+            )
+        cursor.close()
         
-        try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
-            
-            cursor_crm.execute("""
-                SELECT l.id_loja, l.nome_loja, l.cidade, l.estado, l.telefone
-                FROM loja l
-                ORDER BY l.id_loja
-            """)
-            
-            lojas = cursor_crm.fetchall()
-            
-            for row in lojas:
-                id_loja, nome_loja, cidade, estado, telefone = row
-                
-                # Buscar localidade correspondente por cidade/estado
-                sk_localidade = None
-                if cidade and estado:
-                    cursor_dw.execute("""
-                        SELECT sk_localidade 
-                        FROM dim_localidade 
-                        WHERE LOWER(cidade) = LOWER(%s) AND LOWER(estado) = LOWER(%s)
-                    """, (cidade.strip(), estado.strip()))
-                    loc_result = cursor_dw.fetchone()
-                    if loc_result:
-                        sk_localidade = loc_result[0]
-                
-                # Transformações
-                nome_clean = self.clean_text(nome_loja) if nome_loja else 'Loja N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
-                telefone_clean = self.clean_text(telefone) if telefone else None
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_loja 
-                    (id_loja, nome_loja, nome_padronizado, sk_localidade,
-                     telefone, data_abertura, status_loja)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_loja, nome_clean, nome_padronizado, sk_localidade, 
-                     telefone_clean, datetime.now().date(), 'ATIVA'))
-            
-            self.conn_dw.commit()
-            logger.info(f"Dimensão Loja carregada: {len(lojas)} registros")
-            
-        except Exception as e:
-            logger.error(f"Erro no ETL de Loja: {e}")
-            self.conn_dw.rollback()
+        logger.info(f"Preços agregados para {len(precos)} produtos")
+        return precos
     
     def extract_and_transform_vendedor(self):
         """ETL para dimensão Vendedor"""
         logger.info("Iniciando ETL da dimensão Vendedor...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_vendedor', 'id_vendedor', ['id_vendedor', 'nome_vendedor', 'nome_padronizado', 'sk_localidade', 'status_vendedor'])
             
-            cursor_crm.execute("""
+            vendedores = self.extract_rows("""
                 SELECT v.id_vendedor, v.nome_vendedor
                 FROM vendedor v
                 ORDER BY v.id_vendedor
-            """)
-            
-            vendedores = cursor_crm.fetchall()
+            """, 'extract_vendedores')
             
-            for row in vendedores:
-                id_vend, nome_vend = row
+            for lote in batched(vendedores, self.batch_size):
+                ids, nomes = zip(*lote)
                 
-                # Transformações
-                nome_clean = self.clean_text(nome_vend) if nome_vend else 'Vendedor N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    nomes, 'Vendedor N/A', self.standardize_name)
                 
                 # Para vendedores, vamos usar sk_localidade = NULL já que não temos localidade
-                cursor_dw.execute("""
-                    INSERT INTO dim_vendedor 
-                    (id_vendedor, nome_vendedor, nome_padronizado, sk_localidade, status_vendedor)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_vend, nome_clean, nome_padronizado, None, 'ATIVO'))
+                for id_vend, nome_clean, nome_padronizado in zip(ids, nomes_clean, nomes_padronizados):
+                    loader.add((id_vend, nome_clean, nome_padronizado, None, 'ATIVO'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Vendedor carregada: {len(vendedores)} registros")
+            logger.info(f"Dimensão Vendedor carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Vendedor: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_loja(self):
         """ETL para dimensão Loja"""
         logger.info("Iniciando ETL da dimensão Loja...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_loja', 'id_loja', ['id_loja', 'nome_loja', 'nome_padronizado', 'sk_localidade', 'tipo_loja', 'status_loja'])
             
-            cursor_crm.execute("""
+            lojas = self.extract_rows("""
                 SELECT l.id_loja, l.nome_loja, l.gerente_loja, l.cidade, l.estado
                 FROM lojas l
                 ORDER BY l.id_loja
-            """)
-            
-            lojas = cursor_crm.fetchall()
-            
-            for row in lojas:
-                id_loja, nome_loja, gerente_loja, cidade, estado = row
-                
-                # Buscar localidade baseada na cidade e estado da loja
-                sk_loc = None
-                if cidade and estado:
-                    cursor_dw.execute("""
-                        SELECT sk_localidade FROM dim_localidade 
-                        WHERE LOWER(cidade) = LOWER(%s) AND LOWER(estado) = LOWER(%s)
-                        LIMIT 1
-                    """, (cidade.strip(), estado.strip()))
-                    loc_result = cursor_dw.fetchone()
-                    if loc_result:
-                        sk_loc = loc_result[0]
-                
-                # Transformações
-                nome_clean = self.clean_text(nome_loja) if nome_loja else 'Loja N/A'
-                nome_padronizado = self.standardize_name(nome_clean)
-                tipo_loja = self.classify_store_type(nome_clean)
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_loja 
-                    (id_loja, nome_loja, nome_padronizado, sk_localidade, tipo_loja, status_loja)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_loja, nome_clean, nome_padronizado, sk_loc, tipo_loja, 'ATIVA'))
+            """, 'extract_lojas')
+            self.sk_cache.load(self.conn_dw, ['localidade_cidade'])
+            
+            for lote in batched(lojas, self.batch_size):
+                # Transformações por coluna
+                nomes_clean, nomes_padronizados = self._transform_names(
+                    [row[1] for row in lote], 'Loja N/A', self.standardize_name)
+                tipos_loja = transformacoes.transform_column(self.classify_store_type, nomes_clean)
+                
+                for (id_loja, _, _, cidade, estado), nome_clean, nome_padronizado, tipo_loja in zip(
+                        lote, nomes_clean, nomes_padronizados, tipos_loja):
+                    # Buscar localidade baseada na cidade e estado da loja
+                    sk_loc = None
+                    if cidade and estado:
+                        sk_loc = self.sk_cache.sk('localidade_cidade', (cidade.strip().lower(), estado.strip().lower()))
+                    
+                    loader.add((id_loja, nome_clean, nome_padronizado, sk_loc, tipo_loja, 'ATIVA'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Loja carregada: {len(lojas)} registros")
+            logger.info(f"Dimensão Loja carregada: {loader.summary()}")
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Loja: {e}")
             self.conn_dw.rollback()
+            return False
     
-    def extract_and_transform_vendas(self):
-        """ETL para fato Vendas"""
+    def extract_and_transform_vendas(self, since_id=None, until_id=None, partitioned=False, resume=None):
+        """ETL para fato Vendas.
+        
+        Carrega as vendas com since_id < id_venda <= until_id (limites opcionais).
+        Com partitioned=True roda como partição de uma carga paralela: usa o
+        cache de chaves recebido do coordenador e não avança a marca d'água.
+        
+        Com checkpoint=True, cada lote é confirmado junto com o ponto de controle
+        da execução (última chave id_venda, id_produto gravada). `resume` é o
+        ponto de controle de uma execução interrompida (CheckpointStore.pending):
+        a carga continua a partir da chave seguinte, com o mesmo id de execução.
+        """
         logger.info("Iniciando ETL da tabela fato Vendas...")
+        checkpointing = (self.checkpoint or resume is not None) and not partitioned
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
-            
-            cursor_crm.execute("""
-                SELECT v.id_venda, v.data_venda, v.id_cliente, iv.id_produto, 
-                       v.id_vendedor, v.id_loja, iv.qtd_vendida, iv.preco_venda, 0 as desconto
-                FROM vendas v
-                INNER JOIN item_vendas iv ON v.id_venda = iv.id_venda
-                ORDER BY v.data_venda, v.id_venda, iv.id_produto
-            """)
-            
-            vendas = cursor_crm.fetchall()
-            
-            for row in vendas:
-                id_venda, data_venda, id_cli, id_prod, id_vend, id_loja, qtd, preco, desconto = row
-                
-                # Buscar chaves surrogadas
-                sk_tempo = sk_cliente = sk_produto = sk_vendedor = sk_loja = None
-                
-                # SK Tempo - converter string para date
-                if data_venda and str(data_venda) not in ['Data Inválida', 'N/A', 'NULL', '']:
-                    try:
-                        # Tentar diferentes formatos de data
-                        if len(str(data_venda)) == 10 and str(data_venda).count('-') == 2:
-                            # Formato YYYY-MM-DD
-                            from datetime import datetime
-                            data_obj = datetime.strptime(str(data_venda), '%Y-%m-%d').date()
-                            cursor_dw.execute("SELECT sk_tempo FROM dim_tempo WHERE data_completa = %s", (data_obj,))
-                        elif len(str(data_venda)) == 10 and str(data_venda).count('/') == 2:
-                            # Formato DD/MM/YYYY
-                            from datetime import datetime
-                            data_obj = datetime.strptime(str(data_venda), '%d/%m/%Y').date()
-                            cursor_dw.execute("SELECT sk_tempo FROM dim_tempo WHERE data_completa = %s", (data_obj,))
-                        else:
-                            continue  # Pular datas inválidas
-                        
-                        tempo_result = cursor_dw.fetchone()
-                        if tempo_result:
-                            sk_tempo = tempo_result[0]
-                    except:
-                        continue  # Pular datas que não conseguimos converter
-                
-                # SK Cliente
-                if id_cli:
-                    cursor_dw.execute("SELECT sk_cliente FROM dim_cliente WHERE id_cliente = %s", (id_cli,))
-                    cli_result = cursor_dw.fetchone()
-                    if cli_result:
-                        sk_cliente = cli_result[0]
-                
-                # SK Produto
-                if id_prod:
-                    cursor_dw.execute("SELECT sk_produto FROM dim_produto WHERE id_produto = %s", (id_prod,))
-                    prod_result = cursor_dw.fetchone()
-                    if prod_result:
-                        sk_produto = prod_result[0]
-                
-                # SK Vendedor
-                if id_vend:
-                    cursor_dw.execute("SELECT sk_vendedor FROM dim_vendedor WHERE id_vendedor = %s", (id_vend,))
-                    vend_result = cursor_dw.fetchone()
-                    if vend_result:
-                        sk_vendedor = vend_result[0]
-                
-                # SK Loja
-                if id_loja:
-                    cursor_dw.execute("SELECT sk_loja FROM dim_loja WHERE id_loja = %s", (id_loja,))
-                    loja_result = cursor_dw.fetchone()
-                    if loja_result:
-                        sk_loja = loja_result[0]
-                
-                # Calcular métricas
-                qtd_clean = float(qtd) if qtd and qtd > 0 else 0.0
-                preco_clean = float(preco) if preco and preco > 0 else 0.0
-                desconto_clean = float(desconto) if desconto and desconto >= 0 else 0.0
-                
-                valor_bruto = qtd_clean * preco_clean
-                valor_desconto = valor_bruto * (desconto_clean / 100) if desconto_clean > 0 else 0.0
-                valor_liquido = valor_bruto - valor_desconto
-                
-                # Buscar custo unitário do produto
-                custo_unitario = 0.0
-                if sk_produto:
-                    cursor_dw.execute("SELECT custo_unitario FROM dim_produto WHERE sk_produto = %s", (sk_produto,))
-                    custo_result = cursor_dw.fetchone()
-                    if custo_result and custo_result[0]:
-                        custo_unitario = float(custo_result[0])
-                
-                custo_total = qtd_clean * custo_unitario
-                lucro_bruto = valor_liquido - custo_total
-                
-                # Gerar ID único para o fato (combinação de id_venda + id_produto)
-                id_fato = f"{id_venda}_{id_prod}"
-                
-                cursor_dw.execute("""
-                    INSERT INTO fato_vendas 
-                    (id_venda, sk_tempo, sk_cliente, sk_produto, sk_vendedor, sk_loja,
-                     quantidade_vendida, preco_unitario_venda, valor_total_item, 
-                     percentual_desconto, valor_desconto, valor_final, 
-                     custo_unitario, custo_total_item, lucro_bruto)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_fato, sk_tempo, sk_cliente, sk_produto, sk_vendedor, sk_loja,
-                     qtd_clean, preco_clean, valor_bruto, desconto_clean, 
-                     valor_desconto, valor_liquido, custo_unitario, custo_total, lucro_bruto))
-            
+            loader = self._bulk_loader('fato_vendas', FACT_LOAD_COLUMNS)
+            
+            filtro, params = self._id_range_filter(since_id, until_id)
+            loaded_before = 0
+            max_id_venda = None
+            if resume is not None:
+                self.run_id = resume['id_execucao']
+                loaded_before = resume['linhas']
+                if resume['ultima_chave'] is not None:
+                    max_id_venda = resume['ultima_chave'][0]
+                    filtro, params = self._key_after_filter(filtro, params, resume['ultima_chave'])
+                logger.info(f"Retomando a execução {self.run_id} após a chave {resume['ultima_chave']} "
+                            f"({loaded_before} registros já carregados)")
+            elif checkpointing:
+                self.checkpoints.start(self.conn_dw, self.run_id, 'vendas', since_id)
+                self.conn_dw.commit()
+            
+            # O ponto de controle exige a extração na ordem da chave (id_venda, id_produto)
+            ordem = "v.id_venda, iv.id_produto" if checkpointing else "v.data_venda, v.id_venda, iv.id_produto"
+            vendas = self.extract_rows(f"""
+                {_VENDAS_SELECT}
+                {filtro}
+                ORDER BY {ordem}
+            """, 'extract_vendas', params)
+            if not partitioned:
+                self.sk_cache.load(self.conn_dw, FACT_DIMENSIONS)
+            datas = DateNormalizer(self.sk_cache.sk_map('tempo'))
+            # Última chave de cada lote transformado, consumida na mesma ordem pela carga
+            batch_keys = deque()
+            
+            def transform(batch):
+                nonlocal max_id_venda
+                if checkpointing:
+                    batch_keys.append((batch[-1][0], batch[-1][3]))
+                max_lote = max(row[0] for row in batch)
+                if max_id_venda is None or max_lote > max_id_venda:
+                    max_id_venda = max_lote
+                return self._transform_sales(batch, datas)
+            
+            add = loader.add_batch if self.columnar else loader.add_many
+            
+            def load(rows):
+                # Lote inteiro gravado e ponto de controle na mesma transação
+                add(rows)
+                loader.flush()
+                last_key = batch_keys.popleft()
+                count = loaded_before + loader.rows_loaded
+                self.checkpoints.save(self.conn_dw, self.run_id, last_key, count)
+                self.conn_dw.commit()
+                logger.info(f"Fato Vendas: {count} registros processados (até {last_key})...")
+            
+            self._run_batches(vendas, transform, load if checkpointing else add, 'Fato Vendas')
+            
+            loader.flush()
+            if max_id_venda is not None and not partitioned:
+                # Marca d'água avança na mesma transação dos fatos
+                self.watermarks.advance(self.conn_dw, 'vendas', 'id_venda', max_id_venda)
+            if checkpointing:
+                self.checkpoints.finish(self.conn_dw, self.run_id)
             self.conn_dw.commit()
-            logger.info(f"Fato Vendas carregado: {len(vendas)} registros")
+            count = loaded_before + loader.rows_loaded
+            self.load_stats['fato_vendas'] = (count, max_id_venda)
+            logger.info(f"Fato Vendas carregado: {count} registros")
+            datas.log_stats('Fato Vendas')
+            self.sk_cache.log_stats()
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Vendas: {e}")
             self.conn_dw.rollback()
+            return False
     
     def extract_and_transform_promocao(self):
         """ETL para dimensão Promoção"""
         logger.info("Iniciando ETL da dimensão Promoção...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
+            loader = self._dimension_loader('dim_promocao', 'id_promocao', [
+                'id_promocao', 'nome_promocao', 'tipo_promocao', 'percentual_desconto',
+                'data_inicio', 'data_fim', 'status_promocao'
+            ])
             
-            cursor_crm.execute("""
+            promocoes = self.extract_rows("""
                 SELECT id_promocao, nome_promocao, tipo_desconto, data_inicio, data_fim
                 FROM promocoes
                 ORDER BY id_promocao
-            """)
-            
-            promocoes = cursor_crm.fetchall()
+            """, 'extract_promocoes')
+            datas = DateNormalizer()
             
             for row in promocoes:
                 id_promo, nome_promo, tipo_desc, data_ini, data_fim = row
@@ -728,210 +732,213 @@ class ETLProcessor:
                 tipo_promo = self.classify_promotion_type(nome_clean)
                 
                 # Extrair percentual do tipo_desconto (assumindo formato "10%" ou similar)
-                perc_clean = 0.0
-                if tipo_desc:
-                    try:
-                        # Tentar extrair número do campo tipo_desconto
-                        import re
-                        match = re.search(r'(\d+(?:\.\d+)?)', str(tipo_desc))
-                        if match:
-                            perc_clean = float(match.group(1))
-                    except:
-                        perc_clean = 0.0
+                perc_clean = transformacoes.parse_discount_percentage(tipo_desc)
                 
-                # Validar datas
-                data_ini_clean = None
-                data_fim_clean = None
+                # Validar datas (varchar no CRM, em formatos variados)
+                data_ini_clean = datas.parse(data_ini)
+                data_fim_clean = datas.parse(data_fim)
                 
-                if data_ini and str(data_ini) not in ['Data Inválida', 'N/A', 'NULL', '']:
-                    data_ini_clean = data_ini
-                    
-                if data_fim and str(data_fim) not in ['Data Inválida', 'N/A', 'NULL', '']:
-                    data_fim_clean = data_fim
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_promocao 
-                    (id_promocao, nome_promocao, tipo_promocao, percentual_desconto,
-                     data_inicio, data_fim, status_promocao)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (id_promo, nome_clean, tipo_promo, perc_clean, 
-                     data_ini_clean, data_fim_clean, 'ATIVA'))
+                loader.add((id_promo, nome_clean, tipo_promo, perc_clean,
+                            data_ini_clean, data_fim_clean, 'ATIVA'))
             
+            loader.merge()
             self.conn_dw.commit()
-            logger.info(f"Dimensão Promoção carregada: {len(promocoes)} registros")
+            logger.info(f"Dimensão Promoção carregada: {loader.summary()}")
+            datas.log_stats('Promoção')
+            return True
             
         except Exception as e:
             logger.error(f"Erro no ETL de Promoção: {e}")
             self.conn_dw.rollback()
+            return False
     
-    def generate_dim_tempo(self):
-        """Gera a dimensão tempo"""
+    def generate_dim_tempo(self, since_id=None):
+        """Gera (ou estende) a dimensão tempo a partir das datas presentes no CRM"""
         logger.info("Gerando dimensão Tempo...")
         
         try:
-            cursor_dw = self.conn_dw.cursor()
-            
-            # Gerar datas de 2020 a 2025
-            start_date = datetime(2020, 1, 1)
-            end_date = datetime(2025, 12, 31)
-            
-            current_date = start_date
-            while current_date <= end_date:
-                ano = current_date.year
-                mes = current_date.month
-                dia = current_date.day
-                trimestre = (mes - 1) // 3 + 1
-                semestre = 1 if mes <= 6 else 2
-                dia_semana = current_date.weekday() + 1  # 1=Segunda, 7=Domingo
-                nome_dia_semana = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'][current_date.weekday()]
-                nome_mes = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                           'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'][mes-1]
-                eh_fim_semana = dia_semana in [6, 7]  # Sábado e Domingo
-                
-                cursor_dw.execute("""
-                    INSERT INTO dim_tempo 
-                    (data_completa, ano, mes, dia, trimestre, semestre, dia_semana,
-                     nome_dia_semana, nome_mes, eh_fim_semana)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT DO NOTHING
-                """, (current_date.date(), ano, mes, dia, trimestre, semestre, dia_semana,
-                     nome_dia_semana, nome_mes, eh_fim_semana))
-                
-                current_date += timedelta(days=1)
-            
+            self.calendar.extend(self.conn_crm, self.conn_dw, since_id)
+            # Partições mensais da fato para os meses das vendas a carregar (não para a margem
+            # do calendário); vendas sem data válida vão para a partição padrão
+            first, last = self.calendar.sales_date_range(self.conn_crm, since_id)
+            if first is not None:
+                self.partitions.ensure_range(self.conn_dw, first, last)
             self.conn_dw.commit()
             logger.info("Dimensão Tempo gerada com sucesso")
+            return True
             
         except Exception as e:
             logger.error(f"Erro ao gerar dimensão Tempo: {e}")
             self.conn_dw.rollback()
+            return False
     
-    def extract_and_transform_fato_vendas(self):
-        """ETL para tabela de fato Vendas"""
-        logger.info("Iniciando ETL da tabela Fato Vendas...")
+    def load_fato_vendas_sql(self, since_id=None):
+        """ETL da tabela de fato resolvido no DW: staging + um INSERT ... SELECT com as junções.
+        
+        Aplica as mesmas regras de extract_and_transform_vendas: as duas cargas gravam as mesmas linhas.
+        """
+        logger.info("Iniciando carga da tabela Fato Vendas em SQL (staging)...")
         
         try:
-            cursor_crm = self.conn_crm.cursor()
-            cursor_dw = self.conn_dw.cursor()
-            
-            # Query para extrair dados do CRM
-            cursor_crm.execute("""
-                SELECT 
-                    v.id_venda, v.data_venda, v.id_cliente, v.id_vendedor, v.id_loja,
-                    iv.id_produto, iv.qtd_vendida, iv.preco_venda, iv.id_promocao_aplicada
-                FROM vendas v
-                JOIN item_vendas iv ON v.id_venda = iv.id_venda
-                ORDER BY v.id_venda, iv.id_produto
-            """)
-            
-            vendas = cursor_crm.fetchall()
-            count = 0
-            
-            for row in vendas:
-                (id_venda, data_venda, id_cliente, id_vendedor, id_loja,
-                 id_produto, qtd_vendida, preco_venda, id_promocao) = row
-                
-                # Buscar chaves surrogadas no DW
-                sk_tempo = None
-                sk_cliente = None
-                sk_vendedor = None
-                sk_loja = None
-                sk_produto = None
-                sk_promocao = None
-                
-                # SK Tempo
-                if data_venda:
-                    cursor_dw.execute("SELECT sk_tempo FROM dim_tempo WHERE data_completa = %s", (data_venda,))
-                    tempo_result = cursor_dw.fetchone()
-                    if tempo_result:
-                        sk_tempo = tempo_result[0]
-                
-                # SK Cliente
-                if id_cliente:
-                    cursor_dw.execute("SELECT sk_cliente FROM dim_cliente WHERE id_cliente = %s", (id_cliente,))
-                    cliente_result = cursor_dw.fetchone()
-                    if cliente_result:
-                        sk_cliente = cliente_result[0]
-                
-                # SK Vendedor
-                if id_vendedor:
-                    cursor_dw.execute("SELECT sk_vendedor FROM dim_vendedor WHERE id_vendedor = %s", (id_vendedor,))
-                    vendedor_result = cursor_dw.fetchone()
-                    if vendedor_result:
-                        sk_vendedor = vendedor_result[0]
-                
-                # SK Loja
-                if id_loja:
-                    cursor_dw.execute("SELECT sk_loja FROM dim_loja WHERE id_loja = %s", (id_loja,))
-                    loja_result = cursor_dw.fetchone()
-                    if loja_result:
-                        sk_loja = loja_result[0]
-                
-                # SK Produto
-                if id_produto:
-                    cursor_dw.execute("SELECT sk_produto FROM dim_produto WHERE id_produto = %s", (id_produto,))
-                    produto_result = cursor_dw.fetchone()
-                    if produto_result:
-                        sk_produto = produto_result[0]
-                
-                # SK Promoção
-                if id_promocao:
-                    cursor_dw.execute("SELECT sk_promocao FROM dim_promocao WHERE id_promocao = %s", (id_promocao,))
-                    promocao_result = cursor_dw.fetchone()
-                    if promocao_result:
-                        sk_promocao = promocao_result[0]
-                
-                # Transformações e cálculos
-                qtd_clean = int(qtd_vendida) if qtd_vendida and qtd_vendida > 0 else 1
-                preco_clean = float(preco_venda) if preco_venda and preco_venda > 0 else 0.0
-                valor_total_item = qtd_clean * preco_clean
-                
-                # Buscar custo do produto
-                custo_unitario = 0.0
-                if sk_produto:
-                    cursor_dw.execute("SELECT custo_unitario FROM dim_produto WHERE sk_produto = %s", (sk_produto,))
-                    custo_result = cursor_dw.fetchone()
-                    if custo_result and custo_result[0]:
-                        custo_unitario = float(custo_result[0])
-                
-                custo_total_item = qtd_clean * custo_unitario
-                lucro_bruto = valor_total_item - custo_total_item
-                
-                # Calcular desconto
-                percentual_desconto = 0.0
-                valor_desconto = 0.0
-                if sk_promocao:
-                    cursor_dw.execute("SELECT percentual_desconto FROM dim_promocao WHERE sk_promocao = %s", (sk_promocao,))
-                    desc_result = cursor_dw.fetchone()
-                    if desc_result and desc_result[0]:
-                        percentual_desconto = float(desc_result[0])
-                        valor_desconto = valor_total_item * (percentual_desconto / 100)
-                
-                valor_final = valor_total_item - valor_desconto
-                
-                # Inserir na tabela de fato
-                cursor_dw.execute("""
-                    INSERT INTO fato_vendas 
-                    (id_venda, sk_tempo, sk_cliente, sk_vendedor, sk_loja, sk_produto, sk_promocao,
-                     quantidade_vendida, preco_unitario_venda, valor_total_item, custo_unitario,
-                     custo_total_item, lucro_bruto, percentual_desconto, valor_desconto, valor_final)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (id_venda, sk_tempo, sk_cliente, sk_vendedor, sk_loja, sk_produto, sk_promocao,
-                     qtd_clean, preco_clean, valor_total_item, custo_unitario, custo_total_item,
-                     lucro_bruto, percentual_desconto, valor_desconto, valor_final))
-                
-                count += 1
-                if count % 1000 == 0:
-                    logger.info(f"Fato Vendas: {count} registros processados...")
-                    self.conn_dw.commit()
+            # Lotes já confirmados por uma carga com ponto de controle seriam carregados de novo
+            if self.checkpoints.pending(self.conn_dw, 'vendas') is not None:
+                logger.error("Há uma carga da fato interrompida com ponto de controle: execute --resume primeiro")
+                return False
             
+            # Carga em uma única transação: a execução é registrada já concluída
+            if self.checkpoint:
+                self.checkpoints.start(self.conn_dw, self.run_id, 'vendas', since_id)
+            self.sk_cache.load(self.conn_dw, ['tempo'])
+            datas = DateNormalizer(self.sk_cache.sk_map('tempo'))
+            loader = StagedFactLoader(self.conn_crm, self.conn_dw)
+            loader.load(datas, since_id=since_id)
+            
+            if loader.max_id is not None:
+                self.watermarks.advance(self.conn_dw, 'vendas', 'id_venda', loader.max_id)
+            if self.checkpoint:
+                self.checkpoints.finish(self.conn_dw, self.run_id)
             self.conn_dw.commit()
-            logger.info(f"Tabela Fato Vendas carregada: {count} registros")
+            self.load_stats['fato_vendas'] = (loader.inserted, loader.max_id)
+            logger.info(f"Tabela Fato Vendas carregada em SQL: {loader.inserted} registros")
+            datas.log_stats('Fato Vendas')
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro na carga em SQL de Fato Vendas: {e}")
+            self.conn_dw.rollback()
+            return False
+    
+    def reload_fact_month(self, year, month):
+        """Recarrega um único mês da tabela de fato, trocando a partição do mês (DETACH/ATTACH).
+        
+        Usa a carga em SQL (regras de extract_and_transform_vendas) só com
+        as vendas cujas datas brutas caem no mês; o custo é o do mês recarregado.
+        """
+        logger.info(f"Recarregando o mês {year:04d}-{month:02d} da tabela Fato Vendas...")
+        
+        try:
+            self.sk_cache.load(self.conn_dw, ['tempo'])
+            datas = DateNormalizer(self.sk_cache.sk_map('tempo'))
+            
+            # Cada valor distinto de data_venda é interpretado uma vez para achar os do mês
+            cursor = self.conn_crm.cursor()
+            cursor.execute("SELECT DISTINCT data_venda FROM vendas")
+            raw_dates = []
+            for (raw,) in cursor.fetchall():
+                parsed = parse_date(raw)[0]
+                if parsed is not None and (parsed.year, parsed.month) == (year, month):
+                    raw_dates.append(raw)
+            cursor.close()
+            
+            loader = StagedFactLoader(self.conn_crm, self.conn_dw)
+            rows = self.partitions.replace_month(
+                self.conn_dw, year, month,
+                lambda table: loader.load(datas, target=table, raw_dates=raw_dates)
+            )
+            self.aggregates.refresh(self.conn_dw, [(year, month)])
+            self.conn_dw.commit()
+            logger.info(f"Mês {year:04d}-{month:02d} recarregado: {rows} registros "
+                        f"({len(raw_dates)} valores distintos de data)")
+            return True
             
         except Exception as e:
-            logger.error(f"Erro no ETL de Fato Vendas: {e}")
+            logger.error(f"Erro ao recarregar o mês {year:04d}-{month:02d}: {e}")
             self.conn_dw.rollback()
+            return False
+    
+    def _transform_sales(self, batch, datas):
+        """Transforma um lote de vendas (colunas de VENDAS_COLUMNS) nas linhas da fato
+        (FACT_LOAD_COLUMNS), por colunas (ColumnBatch) com columnar=True. Regras únicas de
+        todas as cargas da fato (a carga em SQL as reproduz em carga_sql)"""
+        if self.columnar:
+            return self._transform_sales_columns(batch, datas)
+        
+        rows = []
+        for row in batch:
+            id_venda, data_venda, id_cli, id_prod, id_vend, id_loja, qtd, preco = row
+            # SK Tempo - datas em formato não reconhecido são rejeitadas (e contadas)
+            data_obj, sk_tempo, status_data = datas.resolve(data_venda)
+            if status_data == DATE_REJECTED:
+                continue
+            
+            sk_cliente = self.sk_cache.sk('cliente', id_cli)
+            sk_vendedor = self.sk_cache.sk('vendedor', id_vend)
+            sk_loja = self.sk_cache.sk('loja', id_loja)
+            
+            # SK Produto e custo unitário em uma única consulta ao cache
+            produto = self.sk_cache.get('produto', id_prod)
+            sk_produto = produto[0] if produto else None
+            
+            # Calcular métricas
+            qtd_clean = int(qtd) if qtd and qtd > 0 else 0
+            preco_clean = float(preco) if preco and preco > 0 else 0.0
+            valor_bruto = qtd_clean * preco_clean
+            
+            custo_unitario = produto[1] if produto and produto[1] else 0.0
+            custo_total = qtd_clean * custo_unitario
+            lucro_bruto = valor_bruto - custo_total
+            
+            # Data da venda (chave de partição) derivada de sk_tempo; sem ela, partição padrão
+            data_particao = data_obj if sk_tempo is not None else None
+            
+            rows.append((id_venda, sk_tempo, data_particao, sk_cliente, sk_produto, sk_vendedor, sk_loja,
+                         qtd_clean, preco_clean, valor_bruto, valor_bruto,
+                         custo_unitario, custo_total, lucro_bruto))
+        return rows
+    
+    def _transform_sales_columns(self, batch, datas):
+        """Mesmas regras de _transform_sales, por colunas: retorna um ColumnBatch com as colunas da fato"""
+        vendas_lote = ColumnBatch.from_rows(batch, VENDAS_COLUMNS)
+        
+        # SK Tempo - datas em formato não reconhecido são rejeitadas (e contadas)
+        datas_lote = vendas_lote['data_venda'].map(datas.resolve, with_counts=True)
+        keep = list(datas_lote.map(lambda resolved: resolved[2] != DATE_REJECTED))
+        if not all(keep):
+            vendas_lote = vendas_lote.filter(keep)
+            datas_lote = datas_lote.filter(keep)
+        fatos = self._fact_key_columns(vendas_lote, datas_lote)
+        
+        # Métricas calculadas sobre o lote inteiro, em centavos (metricas.FactMetrics)
+        fatos.columns.update(self.metrics.compute(
+            vendas_lote['qtd_vendida'], vendas_lote['preco_venda'],
+            vendas_lote['id_produto'].map(lambda key: (self.sk_cache.get('produto', key) or (None, None))[1], 'd'),
+        ))
+        return fatos
+    
+    def _fact_key_columns(self, vendas_lote, datas_lote):
+        """Colunas de chaves da fato de um lote por colunas: id_venda, sk_tempo, data_venda
+        (chave de partição) e as chaves surrogadas, resolvidas uma vez por valor distinto.
+        
+        `datas_lote` é a coluna data_venda mapeada por DateNormalizer.resolve.
+        """
+        fatos = ColumnBatch({'id_venda': vendas_lote['id_venda']})
+        fatos['sk_tempo'] = datas_lote.map(lambda resolved: resolved[1]).to_numeric('q')
+        fatos['data_venda'] = datas_lote.map(lambda resolved: resolved[0] if resolved[1] is not None else None)
+        for dimension in ('cliente', 'vendedor', 'loja'):
+            fatos[f'sk_{dimension}'] = vendas_lote[f'id_{dimension}'].map(
+                lambda key, dimension=dimension: self.sk_cache.sk(dimension, key))
+        fatos['sk_produto'] = vendas_lote['id_produto'].map(
+            lambda key: (self.sk_cache.get('produto', key) or (None,))[0])
+        return fatos
+    
+    def _run_batches(self, rows, transform, load, label):
+        """Processa as linhas extraídas em lotes de batch_size: transform(lote) -> load(linhas).
+        
+        Com pipeline=True, extração, transformação e carga rodam em etapas
+        concorrentes ligadas por filas limitadas (esteira.Pipeline).
+        """
+        batches = batched(rows, self.batch_size)
+        if not self.pipeline:
+            for batch in batches:
+                load(transform(batch))
+            return
+        
+        pipeline = Pipeline(queue_size=self.pipeline_queue_size)
+        try:
+            pipeline.run(batches, transform, load)
+        finally:
+            pipeline.log_stats(label)
+            self.pipeline_stats[label] = pipeline.to_dict()
     
     # =============================================
     # FUNÇÕES DE TRANSFORMAÇÃO E LIMPEZA
@@ -939,119 +946,35 @@ class ETLProcessor:
     
     def clean_text(self, text):
         """Limpa e padroniza texto"""
-        if not text:
-            return 'N/A'
-        
-        # Remove espaços extras e caracteres especiais
-        text = re.sub(r'\s+', ' ', str(text).strip())
-        # Capitaliza primeira letra de cada palavra
-        text = text.title()
-        return text
+        return transformacoes.clean_text(text)
     
     def standardize_name(self, name):
         """Padroniza nomes de pessoas/empresas"""
-        if not name or name == 'N/A':
-            return name
-        
-        # Lista de conectores que ficam em minúscula
-        conectores = ['da', 'de', 'do', 'das', 'dos', 'e', 'em', 'na', 'no', 'com']
-        
-        words = name.split()
-        result = []
-        
-        for i, word in enumerate(words):
-            if i == 0 or word.lower() not in conectores:
-                result.append(word.title())
-            else:
-                result.append(word.lower())
-        
-        return ' '.join(result)
+        return transformacoes.standardize_name(name)
     
     def standardize_region(self, region):
         """Padroniza nomes de regiões"""
-        if not region:
-            return 'Não Definido'
-        
-        region_map = {
-            'rio de janeiro': 'Rio de Janeiro',
-            'são paulo': 'São Paulo',
-            'minas gerais': 'Minas Gerais',
-            'mato grosso': 'Mato Grosso',
-            'mato grosso do sul': 'Mato Grosso do Sul',
-            'rio grande do sul': 'Rio Grande do Sul',
-            'rio grande do norte': 'Rio Grande do Norte',
-            'espírito santo': 'Espírito Santo',
-            'distrito federal': 'Distrito Federal'
-        }
-        
-        region_lower = region.lower().strip()
-        return region_map.get(region_lower, region.title())
+        return transformacoes.standardize_region(region)
     
     def is_capital(self, city, state):
         """Verifica se a cidade é capital"""
-        capitals = {
-            'Rio Branco': ['AC'], 'Maceió': ['AL'], 'Macapá': ['AP'], 'Manaus': ['AM'],
-            'Salvador': ['BA'], 'Fortaleza': ['CE'], 'Brasília': ['DF'], 'Vitória': ['ES'],
-            'Goiânia': ['GO'], 'São Luís': ['MA'], 'Cuiabá': ['MT'], 'Campo Grande': ['MS'],
-            'Belo Horizonte': ['MG'], 'Belém': ['PA'], 'João Pessoa': ['PB'], 'Curitiba': ['PR'],
-            'Recife': ['PE'], 'Teresina': ['PI'], 'Rio de Janeiro': ['RJ'], 'Natal': ['RN'],
-            'Porto Alegre': ['RS'], 'Porto Velho': ['RO'], 'Boa Vista': ['RR'], 'Florianópolis': ['SC'],
-            'São Paulo': ['SP'], 'Aracaju': ['SE'], 'Palmas': ['TO']
-        }
-        
-        return city in capitals and state in capitals.get(city, [])
+        return transformacoes.is_capital(city, state)
     
     def standardize_customer_category(self, category):
         """Padroniza categoria de cliente"""
-        if not category:
-            return 'Não Definido'
-        
-        category_lower = category.lower()
-        if 'vip' in category_lower or 'premium' in category_lower:
-            return 'Premium'
-        elif 'gold' in category_lower or 'ouro' in category_lower:
-            return 'Gold'
-        elif 'silver' in category_lower or 'prata' in category_lower:
-            return 'Silver'
-        else:
-            return 'Padrão'
+        return transformacoes.standardize_customer_category(category)
     
     def standardize_product_category(self, category):
         """Padroniza categoria de produto"""
-        if not category:
-            return 'Não Definido'
-        
-        return category.title()
+        return transformacoes.standardize_product_category(category)
     
     def classify_store_type(self, store_name):
         """Classifica tipo da loja baseado no nome"""
-        if not store_name:
-            return 'Loja Padrão'
-        
-        name_lower = store_name.lower()
-        if 'shopping' in name_lower or 'mall' in name_lower:
-            return 'Shopping'
-        elif 'centro' in name_lower:
-            return 'Centro'
-        elif 'outlet' in name_lower:
-            return 'Outlet'
-        else:
-            return 'Loja Padrão'
+        return transformacoes.classify_store_type(store_name)
     
     def classify_promotion_type(self, promo_name):
         """Classifica tipo de promoção"""
-        if not promo_name:
-            return 'Desconto Geral'
-        
-        name_lower = promo_name.lower()
-        if 'black' in name_lower:
-            return 'Black Friday'
-        elif 'natal' in name_lower:
-            return 'Natal'
-        elif 'liquidação' in name_lower:
-            return 'Liquidação'
-        else:
-            return 'Desconto Geral'
+        return transformacoes.classify_promotion_type(promo_name)
     
     def check_dw_summary(self):
         """Exibe resumo completo do Data Warehouse"""
@@ -1107,13 +1030,142 @@ class ETLProcessor:
             logger.error(f"Erro ao gerar resumo do DW: {e}")
             print(f"❌ Erro ao gerar resumo: {e}")
     
+    def refresh_aggregates(self, since_id=None):
+        """Atualiza as tabelas agregadas mensais: só os meses das vendas com id_venda > since_id,
+        ou todos os meses quando since_id é None"""
+        logger.info("Atualizando tabelas agregadas...")
+        try:
+            months = None
+            if since_id is not None:
+                months = self.aggregates.affected_months(self.conn_dw, since_id)
+                logger.info(f"Meses afetados pela carga: {len(months)}")
+            self.aggregates.refresh(self.conn_dw, months)
+            self.conn_dw.commit()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao atualizar tabelas agregadas: {e}")
+            self.conn_dw.rollback()
+            return False
+    
+    def aggregate_table(self, *attributes):
+        """Tabela agregada que responde ao agrupamento pelos atributos (ex.: 'mes', 'loja'), ou None"""
+        return AggregateManager.table_for(*attributes)
+    
+    def export_parquet(self):
+        """Exporta a fato (particionada por ano/mês) e as dimensões para Parquet, se export_dir
+        estiver definido; só as partes alteradas desde a última exportação são regravadas"""
+        if not self.export_dir:
+            return True
+        
+        logger.info(f"Exportando o Data Warehouse para Parquet em {self.export_dir}...")
+        try:
+            with self.profiler.stage("exportacao", dw=self.conn_dw) as stage:
+                exporter = ParquetExporter(self.conn_dw, self.export_dir, batch_rows=self.export_batch_rows)
+                exporter.export()
+                stage.set_rows(rows_out=sum(exporter.written.values()))
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro na exportação para Parquet: {e}")
+            self.conn_dw.rollback()
+            return False
+    
+    def load_dimensions(self, skip=()):
+        """Carrega as dimensões em paralelo, respeitando as dependências entre elas.
+        
+        As etapas em `skip` não são executadas e não bloqueiam as que dependem delas.
+        """
+        local = threading.local()
+        workers = []
+        lock = threading.Lock()
+        
+        def stage(name, method_name):
+            def run():
+                # Cada thread do pool usa um worker com conexões próprias
+                if not hasattr(local, 'worker'):
+                    local.worker = self._spawn_worker()
+                    with lock:
+                        workers.append(local.worker)
+                worker = local.worker
+                with self.profiler.stage(f"dim_{name}", crm=worker.conn_crm, dw=worker.conn_dw):
+                    return getattr(worker, method_name)()
+            return run
+        
+        scheduler = DagScheduler(max_workers=self._pool_limited(self.dimension_workers))
+        for name, method_name, depends in self.DIMENSION_STAGES:
+            if name in skip:
+                continue
+            scheduler.add(name, stage(name, method_name),
+                          tuple(dependency for dependency in depends if dependency not in skip))
+        
+        try:
+            return scheduler.run()
+        finally:
+            for worker in workers:
+                worker.close_connections()
+    
+    def load_facts(self, since_id=None, resume=None):
+        """Carrega a tabela de fato: em SQL no DW (fact_engine='sql'), em lotes com
+        ponto de controle (checkpoint=True, retomável com `resume`) ou em Python,
+        particionada em processos se fact_workers > 1"""
+        with self.profiler.stage("fato_vendas", crm=self.conn_crm, dw=self.conn_dw) as stage:
+            # A retomada segue sempre a carga em lotes com ponto de controle que foi interrompida
+            if resume is None and self.fact_engine == 'sql':
+                success = self.load_fato_vendas_sql(since_id=since_id)
+            elif resume is None and not self.checkpoint and self.fact_workers > 1:
+                success = load_facts_partitioned(self, 'extract_and_transform_vendas',
+                                                 self.fact_workers, since_id)
+            else:
+                success = self.extract_and_transform_vendas(since_id=since_id, resume=resume)
+            # Na carga particionada as linhas passam pelas conexões dos processos
+            stage.set_rows(rows_out=self.load_stats.get('fato_vendas', (0, None))[0])
+            if 'Fato Vendas' in self.pipeline_stats:
+                stage.set_details(esteira=self.pipeline_stats['Fato Vendas'])
+            return success
+    
+    def build_indexes(self, statements):
+        """Cria os índices em paralelo, cada um em uma conexão própria com o DW"""
+        return self._index_manager().build(statements)
+    
+    def _index_manager(self):
+        return IndexManager(self.open_dw_connection, workers=self._pool_limited(self.index_workers),
+                            release=self.release_dw_connection)
+    
+    def _pool_limited(self, workers):
+        """Limita os workers ao tamanho do pool, reservando a conexão da thread principal"""
+        limit = max(1, self.connections.settings.get_int('pool_max') - 1)
+        if workers > limit:
+            logger.warning(f"{workers} workers reduzidos para {limit}: o pool tem {limit + 1} conexões por base")
+        return min(workers, limit)
+    
+    def should_defer_fact_indexes(self, since_id):
+        """Indica se vale remover os índices da tabela de fato durante a carga incremental:
+        só quando as vendas novas são uma fração relevante da tabela"""
+        cursor = self.conn_crm.cursor()
+        cursor.execute("SELECT COUNT(*) FROM item_vendas WHERE id_venda > %s", (since_id,))
+        pending = cursor.fetchone()[0]
+        cursor.close()
+        
+        cursor = self.conn_dw.cursor()
+        # Tabela particionada: a estimativa de linhas está nas partições
+        cursor.execute("""
+            SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'fato_vendas'::regclass
+        """)
+        existing = cursor.fetchone()[0]
+        cursor.close()
+        return pending > existing * self.index_defer_ratio
+    
     def run_full_etl(self):
         """Executa o processo ETL completo"""
         logger.info("=== INICIANDO PROCESSO ETL COMPLETO ===")
         
         try:
-            # 1. Configurar bases de dados
-            if not self.setup_databases():
+            # 1. Configurar bases de dados (recriadas só com --rebuild)
+            if not self.setup_databases(rebuild=self.rebuild):
                 return False
             
             # 2. Conectar às bases
@@ -1122,73 +1174,291 @@ class ETLProcessor:
             
             # 3. Criar estrutura CRM e popular
             logger.info("=== ETAPA 1: PREPARANDO AMBIENTE CRM ===")
-            scripts_dir = Path("sql")
+            scripts_dir = self.scripts_dir
+            
+            with self.profiler.stage("esquema_crm", crm=self.conn_crm):
+                if not self.migrate('crm'):
+                    return False
+            
+            if self.crm_populated():
+                logger.info("CRM já populado: carga inicial dos dados ignorada")
+            else:
+                with self.profiler.stage("carga_crm", crm=self.conn_crm):
+                    if not self.execute_sql_file(self.conn_crm, scripts_dir / "dados_completos_padronizado.sql", "Populando CRM"):
+                        return False
+            
+            # 4. Criar estrutura DW (chaves naturais únicas antes da carga: buscas e deduplicação pelo índice)
+            logger.info("=== ETAPA 2: CRIANDO ESTRUTURA DW ===")
+            with self.profiler.stage("esquema_dw", dw=self.conn_dw):
+                if not self.migrate('dw'):
+                    return False
+            
+            # DW já carregado por uma execução anterior: continua de onde ela parou
+            resume = self.checkpoints.pending(self.conn_dw, 'vendas')
+            if resume is not None:
+                logger.info("Carga da fato interrompida encontrada: retomando do ponto de controle")
+                return self._resume_steps(resume)
+            since_id = self.watermarks.get(self.conn_dw, 'vendas')
+            if since_id is not None:
+                logger.info("DW já carregado: apenas as alterações do CRM serão carregadas")
+                return self._incremental_steps(since_id)
+            
+            # 5. ETL das Dimensões (dependências declaradas em DIMENSION_STAGES)
+            logger.info("=== ETAPA 3: CARREGANDO DIMENSÕES ===")
+            with self.profiler.stage("dimensoes"):
+                if not self.load_dimensions():
+                    return False
+            transformacoes.log_cache_stats()
             
-            if not self.execute_sql_file(self.conn_crm, scripts_dir / "create_tables.sql", "Criando tabelas CRM"):
+            # 6. ETL da Tabela de Fato
+            logger.info("=== ETAPA 4: CARREGANDO TABELA DE FATO ===")
+            if not self.load_facts():
                 return False
             
-            if not self.execute_sql_file(self.conn_crm, scripts_dir / "dados_completos_padronizado.sql", "Populando CRM"):
+            # 7. Criar índices para performance
+            logger.info("=== ETAPA 5: CRIANDO ÍNDICES ===")
+            with self.profiler.stage("indices"):
+                if not self.build_indexes(read_index_statements(scripts_dir / "cria_indices_dw.sql")):
+                    logger.warning("Erro ao criar índices, mas o ETL continuou")
+            
+            # 8. Tabelas agregadas mensais
+            with self.profiler.stage("agregados", dw=self.conn_dw):
+                if not self.refresh_aggregates():
+                    logger.warning("Erro ao atualizar tabelas agregadas, mas o ETL continuou")
+            
+            # 9. Exibir resumo final do Data Warehouse
+            logger.info("=== ETAPA 6: RESUMO FINAL ===")
+            with self.profiler.stage("resumo", dw=self.conn_dw):
+                self.check_dw_summary()
+            
+            # 10. Exportar para Parquet (com --export-parquet)
+            if not self.export_parquet():
+                logger.warning("Erro na exportação para Parquet, mas o ETL continuou")
+            
+            logger.info("=== PROCESSO ETL CONCLUÍDO COM SUCESSO! ===")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro no processo ETL: {e}")
+            return False
+        
+        finally:
+            self.close_connections()
+            self.connections.close_all()
+
+    def run_incremental_etl(self):
+        """Executa a carga incremental da tabela de fato a partir da marca d'água"""
+        logger.info("=== INICIANDO PROCESSO ETL INCREMENTAL ===")
+        
+        try:
+            if not self.connect_to_crm() or not self.connect_to_dw():
                 return False
             
-            # 4. Criar estrutura DW
-            logger.info("=== ETAPA 2: CRIANDO ESTRUTURA DW ===")
-            if not self.execute_sql_file(self.conn_dw, scripts_dir / "cria_dw.sql", "Criando estrutura DW"):
+            if not self.migrate('dw'):
                 return False
             
-            # 5. ETL das Dimensões (ordem importante!)
-            logger.info("=== ETAPA 3: CARREGANDO DIMENSÕES ===")
+            # Lotes confirmados por uma carga interrompida já estão além da marca d'água
+            resume = self.checkpoints.pending(self.conn_dw, 'vendas')
+            if resume is not None:
+                logger.info("Carga da fato interrompida encontrada: retomando do ponto de controle")
+                return self._resume_steps(resume)
             
-            # Dimensões básicas primeiro
-            self.extract_and_transform_localidade()
-            self.extract_and_transform_categoria_cliente()
-            self.extract_and_transform_categoria_produto()
+            since_id = self.watermarks.get(self.conn_dw, 'vendas')
+            if since_id is None:
+                logger.error("Nenhuma marca d'água encontrada para vendas. Execute a carga completa primeiro")
+                return False
             
-            # Resetar conexão após erro no produto anterior
-            self.reset_dw_connection()
+            return self._incremental_steps(since_id)
             
-            # Dimensões que dependem das básicas
-            self.extract_and_transform_fornecedor()
-            self.extract_and_transform_cliente()
-            self.extract_and_transform_produto()
-            self.extract_and_transform_vendedor()
-            self.extract_and_transform_loja()
-            self.extract_and_transform_promocao()
-            self.generate_dim_tempo()
+        except Exception as e:
+            logger.error(f"Erro no processo ETL incremental: {e}")
+            return False
+        
+        finally:
+            self.close_connections()
+            self.connections.close_all()
+
+    def run_resume_etl(self):
+        """Retoma a carga da tabela de fato interrompida, a partir do último ponto de controle,
+        sem recriar as bases nem recarregar as dimensões"""
+        logger.info("=== RETOMANDO PROCESSO ETL ===")
+        
+        try:
+            if not self.connect_to_crm() or not self.connect_to_dw():
+                return False
             
-            # 6. ETL da Tabela de Fato
-            logger.info("=== ETAPA 4: CARREGANDO TABELA DE FATO ===")
+            if not self.migrate('dw'):
+                return False
             
-            # Resetar conexão antes da tabela de fato
-            self.reset_dw_connection()
+            resume = self.checkpoints.pending(self.conn_dw, 'vendas')
+            if resume is None:
+                logger.error("Nenhuma carga interrompida com ponto de controle para retomar")
+                return False
             
-            self.extract_and_transform_vendas()
+            return self._resume_steps(resume)
             
-            # 7. Criar índices para performance
-            logger.info("=== ETAPA 5: CRIANDO ÍNDICES ===")
-            if not self.execute_sql_file(self.conn_dw, scripts_dir / "cria_indices_dw.sql", "Criando índices"):
+        except Exception as e:
+            logger.error(f"Erro ao retomar o processo ETL: {e}")
+            return False
+        
+        finally:
+            self.close_connections()
+            self.connections.close_all()
+
+    def _incremental_steps(self, since_id):
+        """Carrega as dimensões alteradas e as vendas com id_venda > since_id sobre o DW existente"""
+        # Índices removidos por uma carga anterior interrompida antes de recriá-los
+        # (CREATE INDEX IF NOT EXISTS: os existentes são mantidos)
+        with self.profiler.stage("indices"):
+            if not self.build_indexes(read_index_statements(self.scripts_dir / "cria_indices_dw.sql")):
                 logger.warning("Erro ao criar índices, mas o ETL continuou")
-            
-            # 8. Exibir resumo final do Data Warehouse
-            logger.info("=== ETAPA 6: RESUMO FINAL ===")
+        
+        logger.info(f"=== CARREGANDO VENDAS COM id_venda > {since_id} ===")
+        # Datas novas fora do calendário atual estendem dim_tempo antes dos fatos
+        with self.profiler.stage("dim_tempo", crm=self.conn_crm, dw=self.conn_dw):
+            if not self.generate_dim_tempo(since_id=since_id):
+                return False
+
+        # Demais dimensões: só as linhas novas ou alteradas no CRM são gravadas (SCD tipo 2)
+        with self.profiler.stage("dimensoes"):
+            if not self.load_dimensions(skip=('tempo',)):
+                return False
+
+        deferred_indexes = []
+        if self.should_defer_fact_indexes(since_id):
+            deferred_indexes = self._index_manager().drop(self.conn_dw, 'fato_vendas')
+            self.conn_dw.commit()
+
+        try:
+            loaded = self.load_facts(since_id=since_id)
+        finally:
+            if deferred_indexes:
+                with self.profiler.stage("indices"):
+                    self.build_indexes(deferred_indexes)
+        if not loaded:
+            return False
+
+        # Só os meses que receberam vendas novas são recalculados
+        with self.profiler.stage("agregados", dw=self.conn_dw):
+            if not self.refresh_aggregates(since_id=since_id):
+                logger.warning("Erro ao atualizar tabelas agregadas, mas o ETL continuou")
+
+        with self.profiler.stage("resumo", dw=self.conn_dw):
             self.check_dw_summary()
+
+        if not self.export_parquet():
+            logger.warning("Erro na exportação para Parquet, mas o ETL continuou")
+
+        logger.info("=== PROCESSO ETL INCREMENTAL CONCLUÍDO ===")
+        return True
+
+    def _resume_steps(self, resume):
+        """Conclui a carga da fato interrompida a partir do ponto de controle `resume`"""
+        scripts_dir = self.scripts_dir
+        self.checkpoint = True
+        if not self.load_facts(since_id=resume['id_venda_inicial'], resume=resume):
+            return False
+
+        # Índices adiados pela execução interrompida (os existentes são mantidos)
+        with self.profiler.stage("indices"):
+            if not self.build_indexes(read_index_statements(scripts_dir / "cria_indices_dw.sql")):
+                logger.warning("Erro ao criar índices, mas o ETL continuou")
+
+        with self.profiler.stage("agregados", dw=self.conn_dw):
+            if not self.refresh_aggregates(since_id=resume['id_venda_inicial']):
+                logger.warning("Erro ao atualizar tabelas agregadas, mas o ETL continuou")
+
+        with self.profiler.stage("resumo", dw=self.conn_dw):
+            self.check_dw_summary()
+
+        if not self.export_parquet():
+            logger.warning("Erro na exportação para Parquet, mas o ETL continuou")
+
+        logger.info("=== PROCESSO ETL RETOMADO E CONCLUÍDO ===")
+        return True
+
+    def run_reload_month_etl(self, year, month):
+        """Recarrega um mês da tabela de fato sobre o DW existente"""
+        logger.info(f"=== RECARREGANDO O MÊS {year:04d}-{month:02d} ===")
+        
+        try:
+            if not self.connect_to_crm() or not self.connect_to_dw():
+                return False
             
-            logger.info("=== PROCESSO ETL CONCLUÍDO COM SUCESSO! ===")
+            with self.profiler.stage("recarga_mes", crm=self.conn_crm, dw=self.conn_dw):
+                if not self.reload_fact_month(year, month):
+                    return False
+            
+            if not self.export_parquet():
+                logger.warning("Erro na exportação para Parquet, mas o ETL continuou")
             return True
             
         except Exception as e:
-            logger.error(f"Erro no processo ETL: {e}")
+            logger.error(f"Erro na recarga do mês: {e}")
             return False
         
         finally:
-            if self.conn_crm:
-                self.conn_crm.close()
-            if self.conn_dw:
-                self.conn_dw.close()
+            self.close_connections()
+            self.connections.close_all()
 
 # Execução principal
 if __name__ == "__main__":
-    etl = ETLProcessor()
-    success = etl.run_full_etl()
+    parser = argparse.ArgumentParser(description="ETL do CRM para o Data Warehouse")
+    parser.add_argument("--incremental", action="store_true",
+                        help="carrega apenas as vendas posteriores à marca d'água, sem recriar as bases")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="apaga e recria as bases antes da carga completa (por padrão, as existentes são mantidas)")
+    parser.add_argument("--dimension-workers", type=int, default=4,
+                        help="número de threads na carga das dimensões (padrão: 4)")
+    parser.add_argument("--fact-workers", type=int, default=1,
+                        help="número de processos na carga da tabela de fato (padrão: 1)")
+    parser.add_argument("--index-workers", type=int, default=4,
+                        help="número de conexões na criação dos índices (padrão: 4)")
+    parser.add_argument("--calendar-margin-days", type=int, default=365,
+                        help="dias de margem de dim_tempo além das datas do CRM (padrão: 365)")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="confirma a carga da fato em lotes com ponto de controle, permitindo --resume")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma a última carga da fato interrompida a partir do ponto de controle")
+    parser.add_argument("--reload-month", metavar="AAAA-MM",
+                        help="recarrega apenas um mês da tabela de fato, trocando a partição do mês")
+    parser.add_argument("--fact-engine", choices=("python", "sql"), default="python",
+                        help="resolve chaves e métricas da fato em Python ou no DW com staging (padrão: python)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="sobrepõe extração, transformação e carga dos fatos em etapas concorrentes")
+    parser.add_argument("--columnar", action="store_true",
+                        help="transforma os lotes da fato por colunas (buffers numéricos e textos por dicionário)")
+    parser.add_argument("--pipeline-queue-size", type=int, default=4,
+                        help="lotes por fila entre as etapas da esteira (padrão: 4)")
+    parser.add_argument("--export-parquet", metavar="DIRETORIO",
+                        help="ao final, exporta a fato (por ano/mês) e as dimensões para Parquet no diretório")
+    parser.add_argument("--profile", metavar="ARQUIVO",
+                        help="mede cada etapa e grava o perfil da execução em JSON")
+    parser.add_argument("--cprofile", metavar="DIRETORIO",
+                        help="grava um dump do cProfile por etapa no diretório (<etapa>.prof)")
+    args = parser.parse_args()
+    
+    profiler = StageProfiler(enabled=bool(args.profile), cprofile_dir=args.cprofile)
+    etl = ETLProcessor(dimension_workers=args.dimension_workers, fact_workers=args.fact_workers,
+                       profiler=profiler, calendar_margin_days=args.calendar_margin_days,
+                       index_workers=args.index_workers, pipeline=args.pipeline,
+                       pipeline_queue_size=args.pipeline_queue_size, fact_engine=args.fact_engine,
+                       checkpoint=args.checkpoint, export_dir=args.export_parquet, rebuild=args.rebuild,
+                       columnar=args.columnar)
+    if args.reload_month:
+        year, month = (int(part) for part in args.reload_month.split('-'))
+        success = etl.run_reload_month_etl(year, month)
+    elif args.resume:
+        success = etl.run_resume_etl()
+    elif args.incremental:
+        success = etl.run_incremental_etl()
+    else:
+        success = etl.run_full_etl()
+    
+    if profiler.enabled:
+        profiler.log_summary()
+        if args.profile:
+            profiler.write_json(args.profile)
     
     if success:
         print("\n🎉 ETL executado com sucesso!")
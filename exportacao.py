@@ -0,0 +1,206 @@
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from datetime import datetime
+
+from extracao import stream_rows
+from esteira import batched
+from particoes import month_start, next_month
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Dependência opcional, só necessária na exportação
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+FACT_TABLE = 'fato_vendas'
+DIMENSION_TABLES = [
+    'dim_tempo', 'dim_localidade', 'dim_categoria_cliente', 'dim_categoria_produto',
+    'dim_fornecedor', 'dim_cliente', 'dim_produto', 'dim_vendedor', 'dim_loja', 'dim_promocao',
+]
+MANIFEST = 'manifest.json'
+# Partição das vendas sem data (sem sk_tempo; mesmo nome usado pelo Hive/Spark)
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def _arrow_type(data_type, precision, scale):
+    """Tipo Arrow da coluna a partir de information_schema.columns"""
+    if data_type == 'integer':
+        return pa.int32()
+    if data_type == 'bigint':
+        return pa.int64()
+    if data_type == 'smallint':
+        return pa.int16()
+    if data_type == 'numeric':
+        return pa.decimal128(precision or 38, scale or 0)
+    if data_type in ('real', 'double precision'):
+        return pa.float64()
+    if data_type == 'boolean':
+        return pa.bool_()
+    if data_type == 'date':
+        return pa.date32()
+    if data_type.startswith('timestamp'):
+        return pa.timestamp('us')
+    return pa.string()
+
+
+class ParquetExporter:
+    """Exporta o esquema estrela do DW para Parquet.
+
+    fato_vendas é particionada por ano/mês da data da venda, o mesmo mês
+    das partições do DW (fato_vendas/ano=AAAA/mes=M/part-0.parquet); cada dimensão vira um
+    arquivo. As linhas são lidas com cursor nomeado e gravadas em lotes de
+    `batch_rows`, então a memória não depende do tamanho das tabelas; as
+    colunas de texto usam codificação por dicionário.
+
+    O manifesto (manifest.json) guarda a assinatura de cada partição e de
+    cada dimensão (quantidade de linhas e maior chave surrogada, além da
+    maior data_carga na fato), calculada com um agregado no DW. Nas
+    execuções seguintes só são regravadas as partes cuja assinatura mudou;
+    as que deixaram de existir são apagadas. Cargas e recargas geram linhas
+    com chaves novas, o que muda a assinatura; alterações feitas por UPDATE
+    direto no DW não são detectadas.
+    """
+
+    def __init__(self, connection, output_dir, batch_rows=100000, compression='snappy'):
+        if pa is None:
+            raise RuntimeError("A exportação para Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self.connection = connection
+        self.output_dir = Path(output_dir)
+        self.batch_rows = batch_rows
+        self.compression = compression
+        self.written = {}
+        self.skipped = 0
+
+    def export(self):
+        """Exporta as partes alteradas desde a última exportação. Retorna o manifesto gravado"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        previous = self._read_manifest()
+        manifest = {'gerado_em': datetime.now().isoformat(timespec='seconds'), 'partes': {}}
+
+        for table in DIMENSION_TABLES:
+            signature = self._dimension_signature(table)
+            self._export_part(previous, manifest, table, signature, table, f"SELECT {{columns}} FROM {table}")
+
+        for (ano, mes), signature in self._fact_signatures().items():
+            if ano is None:
+                key = f"{FACT_TABLE}/ano={NULL_PARTITION}"
+                query = f"SELECT {{columns}} FROM {FACT_TABLE} f WHERE f.data_venda IS NULL"
+            else:
+                key = f"{FACT_TABLE}/ano={ano}/mes={mes}"
+                # Faixa sobre a chave de partição: a consulta lê só a partição mensal do DW
+                start, end = month_start(ano, mes), month_start(*next_month(ano, mes))
+                query = (f"SELECT {{columns}} FROM {FACT_TABLE} f "
+                         f"WHERE f.data_venda >= '{start}' AND f.data_venda < '{end}'")
+            self._export_part(previous, manifest, key, signature, FACT_TABLE, query)
+
+        # Partições que não existem mais no DW
+        for key, entry in previous.get('partes', {}).items():
+            if key not in manifest['partes']:
+                self._remove(self.output_dir / entry['arquivo'])
+                logger.info(f"Exportação: {key} removida (sem linhas no DW)")
+
+        self._write_manifest(manifest)
+        self.connection.commit()  # encerra a transação dos cursores nomeados
+        logger.info(f"Exportação Parquet em {self.output_dir}: {len(self.written)} partes gravadas "
+                    f"({sum(self.written.values())} linhas), {self.skipped} inalteradas")
+        return manifest
+
+    def _export_part(self, previous, manifest, key, signature, table, query):
+        path = Path(key) / 'part-0.parquet'
+        entry = {'arquivo': path.as_posix(), 'assinatura': signature, 'linhas': signature[0]}
+        manifest['partes'][key] = entry
+
+        old = previous.get('partes', {}).get(key)
+        if old and old.get('assinatura') == signature and (self.output_dir / path).exists():
+            self.skipped += 1
+            return
+        self.written[key] = self._write_table(table, query, self.output_dir / path)
+
+    def _columns(self, table):
+        """Colunas da tabela, na ordem da tabela, com o tipo Arrow de cada uma"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT column_name, data_type, numeric_precision, numeric_scale
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            ORDER BY ordinal_position
+        """, (table,))
+        columns = [(name, _arrow_type(data_type, precision, scale))
+                   for name, data_type, precision, scale in cursor.fetchall()]
+        cursor.close()
+        return columns
+
+    def _write_table(self, table, query, path):
+        """Grava o resultado da consulta em um arquivo Parquet, lote a lote. Retorna as linhas gravadas"""
+        columns = self._columns(table)
+        prefix = 'f.' if table == FACT_TABLE else ''
+        schema = pa.schema(columns)
+        strings = [name for name, arrow_type in columns if arrow_type == pa.string()]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        rows = stream_rows(self.connection, query.format(columns=', '.join(prefix + name for name, _ in columns)),
+                           f"exporta_{table}", itersize=self.batch_rows)
+        written = 0
+        with pq.ParquetWriter(temporary, schema, compression=self.compression,
+                              use_dictionary=strings or False) as writer:
+            for batch in batched(rows, self.batch_rows):
+                arrays = [pa.array(values, type=arrow_type)
+                          for values, (_, arrow_type) in zip(zip(*batch), columns)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                written += len(batch)
+        # Troca atômica: leitores nunca veem um arquivo pela metade
+        os.replace(temporary, path)
+        return written
+
+    def _dimension_signature(self, table):
+        sk_column = 'sk_' + table[len('dim_'):]
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT COUNT(*), MAX({sk_column}) FROM {table}")
+        count, max_sk = cursor.fetchone()
+        cursor.close()
+        return [count, max_sk]
+
+    def _fact_signatures(self):
+        """Assinatura (linhas, maior sk_venda, maior data_carga) de cada partição ano/mês da fato"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT EXTRACT(YEAR FROM f.data_venda)::int AS ano, EXTRACT(MONTH FROM f.data_venda)::int AS mes,
+                   COUNT(*), MAX(f.sk_venda), MAX(f.data_carga)
+            FROM {FACT_TABLE} f
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """)
+        signatures = {
+            (ano, mes): [count, max_sk, max_loaded.isoformat() if max_loaded else None]
+            for ano, mes, count, max_sk, max_loaded in cursor.fetchall()
+        }
+        cursor.close()
+        return signatures
+
+    def _read_manifest(self):
+        path = self.output_dir / MANIFEST
+        if not path.exists():
+            return {}
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _write_manifest(self, manifest):
+        path = self.output_dir / MANIFEST
+        temporary = path.with_name(path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=2)
+        os.replace(temporary, path)
+
+    def _remove(self, path):
+        if path.exists():
+            path.unlink()
+        # Diretório da partição (ano=/mes=) vazio
+        for directory in (path.parent, path.parent.parent):
+            if directory != self.output_dir and directory.exists() and not any(directory.iterdir()):
+                shutil.rmtree(directory)
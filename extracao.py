@@ -0,0 +1,22 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def stream_rows(connection, query, name, params=None, itersize=10000):
+    """Executa a consulta com um cursor nomeado (server-side) e produz as linhas sob demanda.
+
+    O psycopg2 busca `itersize` linhas por ida ao servidor, de modo que a
+    memória ocupada não depende do tamanho do resultado.
+    """
+    cursor = connection.cursor(name=name)
+    cursor.itersize = itersize
+    try:
+        cursor.execute(query, params)
+        count = 0
+        for row in cursor:
+            count += 1
+            yield row
+        logger.debug(f"Extração {name}: {count} linhas lidas em lotes de {itersize}")
+    finally:
+        cursor.close()
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+
+from carga_bulk import BulkLoader, format_copy_value
+
+logger = logging.getLogger(__name__)
+
+HASH_COLUMN = 'hash_registro'
+# Separador entre os campos no texto do hash (não aparece nos textos limpos)
+_FIELD_SEPARATOR = '\x1f'
+
+
+def row_hash(values):
+    """Hash estável dos atributos de uma linha transformada.
+
+    Números reais entram com 2 casas, a precisão das colunas DECIMAL do DW,
+    para que diferenças que não chegam a ser gravadas não gerem versões.
+    """
+    text = _FIELD_SEPARATOR.join(
+        format_copy_value(round(value, 2) if isinstance(value, float) else value)
+        for value in values
+    )
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+class DimensionHistory:
+    """Carga de dimensão com detecção de mudanças e histórico (SCD tipo 2).
+
+    Cada linha recebe o hash dos seus atributos (menos a chave natural e as
+    colunas em `untracked`). Com a dimensão vazia, as linhas vão direto para
+    ela via COPY. Caso contrário, vão para uma tabela temporária e merge()
+    compara os hashes com os das versões atuais em dois comandos:
+    as versões com hash diferente são encerradas (valido_ate, registro_atual)
+    e as linhas sem versão atual (novas ou alteradas) são inseridas. Linhas
+    inalteradas não são regravadas. Nada é confirmado aqui.
+    """
+
+    def __init__(self, connection, table, key, columns, buffer_size=10000, untracked=()):
+        self.connection = connection
+        self.table = table
+        self.key = key
+        self.columns = tuple(columns)
+        self.buffer_size = buffer_size
+        key_index = self.columns.index(key)
+        self._tracked = [i for i, column in enumerate(self.columns)
+                         if i != key_index and column not in untracked]
+        self._loader = None
+        self._staging = None
+        self.staged = 0
+        self.inserted = 0
+        self.changed = 0
+
+    @property
+    def rows_loaded(self):
+        """Linhas gravadas na dimensão (novas e novas versões)"""
+        return self.inserted
+
+    @property
+    def unchanged(self):
+        return self.staged - self.inserted
+
+    def add(self, row):
+        """Adiciona uma linha transformada. Retorna o número de linhas enviadas (0 se não houve envio)"""
+        if self._loader is None:
+            self._loader = self._open()
+        self.staged += 1
+        return self._loader.add(tuple(row) + (row_hash([row[i] for i in self._tracked]),))
+
+    def _open(self):
+        """Escolhe o destino das linhas: a própria dimensão, se vazia, ou uma tabela temporária"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {self.table})")
+        populated = cursor.fetchone()[0]
+        target = self.table
+        if populated:
+            target = self._staging = f"stg_{self.table}"
+            cursor.execute(f"""
+                CREATE TEMP TABLE {target} ON COMMIT DROP AS
+                SELECT {', '.join(self.columns)}, {HASH_COLUMN} FROM {self.table} WITH NO DATA
+            """)
+        cursor.close()
+        return BulkLoader(self.connection, target, self.columns + (HASH_COLUMN,),
+                          buffer_size=self.buffer_size)
+
+    def merge(self):
+        """Envia as linhas pendentes e aplica as mudanças na dimensão (sem commit)"""
+        if self._loader is None:
+            return
+        self._loader.flush()
+        if self._staging is None:
+            self.inserted = self._loader.rows_loaded
+            return
+
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"ANALYZE {self._staging}")
+            cursor.execute(f"""
+                UPDATE {self.table} d
+                SET valido_ate = CURRENT_TIMESTAMP, registro_atual = FALSE
+                FROM {self._staging} s
+                WHERE d.{self.key} = s.{self.key}
+                  AND d.registro_atual
+                  AND d.{HASH_COLUMN} IS DISTINCT FROM s.{HASH_COLUMN}
+            """)
+            self.changed = cursor.rowcount
+            columns = ', '.join(self.columns + (HASH_COLUMN,))
+            cursor.execute(f"""
+                INSERT INTO {self.table} ({columns})
+                SELECT {', '.join('s.' + column for column in self.columns + (HASH_COLUMN,))}
+                FROM {self._staging} s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {self.table} d
+                    WHERE d.{self.key} = s.{self.key} AND d.registro_atual
+                )
+            """)
+            self.inserted = cursor.rowcount
+        finally:
+            cursor.close()
+
+    def summary(self):
+        """Resumo da carga para o log"""
+        return (f"{self.inserted - self.changed} novos, {self.changed} alterados, "
+                f"{self.unchanged} inalterados")
@@ -0,0 +1,35 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkStore:
+    """Marcas d'água por tabela de origem, gravadas na tabela de controle do DW.
+
+    As operações não fazem commit: a marca d'água deve avançar na mesma
+    transação que grava os dados carregados.
+    """
+
+    TABLE = 'etl_controle_carga'
+
+    def get(self, connection, source):
+        """Retorna o último valor carregado da tabela de origem ou None"""
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT ultimo_valor FROM {self.TABLE} WHERE tabela_origem = %s", (source,))
+        result = cursor.fetchone()
+        cursor.close()
+        return result[0] if result else None
+
+    def advance(self, connection, source, column, value):
+        """Avança a marca d'água da tabela de origem (nunca retrocede)"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            INSERT INTO {self.TABLE} (tabela_origem, coluna_controle, ultimo_valor, atualizado_em)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (tabela_origem) DO UPDATE
+            SET ultimo_valor = GREATEST({self.TABLE}.ultimo_valor, EXCLUDED.ultimo_valor),
+                coluna_controle = EXCLUDED.coluna_controle,
+                atualizado_em = EXCLUDED.atualizado_em
+        """, (source, column, value))
+        cursor.close()
+        logger.info(f"Marca d'água de {source}.{column} avançada para {value}")
@@ -0,0 +1,125 @@
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_INDEX_NAME = re.compile(r'INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?', re.IGNORECASE)
+
+
+def index_name(statement):
+    """Nome do índice de um comando CREATE INDEX"""
+    match = _INDEX_NAME.search(statement)
+    return match.group(1) if match else statement[:60]
+
+
+def read_index_statements(path):
+    """Lê os comandos CREATE INDEX de um script SQL, sem comentários"""
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = [line.split('--', 1)[0] for line in file]
+    return [
+        command.strip() for command in ' '.join(lines).split(';')
+        if command.strip().upper().startswith('CREATE')
+    ]
+
+
+class IndexManager:
+    """Adia a criação dos índices secundários para depois da carga em lote.
+
+    Os índices são (re)criados em paralelo, um por conexão, e o tempo de
+    cada um é registrado. `connect` obtém uma conexão com o DW e `release`
+    a devolve (por padrão, a conexão é fechada).
+    """
+
+    def __init__(self, connect, workers=4, maintenance_work_mem='256MB', release=None):
+        self.connect = connect
+        self.release = release or (lambda connection: connection.close())
+        self.workers = workers
+        self.maintenance_work_mem = maintenance_work_mem
+        self.timings = {}
+
+    def secondary_indexes(self, connection, table):
+        """Definições (nome, CREATE INDEX) dos índices não únicos da tabela"""
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass AND NOT i.indisunique AND NOT i.indisprimary
+            ORDER BY c.relname
+        """, (table,))
+        result = cursor.fetchall()
+        cursor.close()
+        return result
+
+    def drop(self, connection, table):
+        """Remove os índices secundários da tabela (sem commit). Retorna os comandos para recriá-los"""
+        indexes = self.secondary_indexes(connection, table)
+        cursor = connection.cursor()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        cursor.close()
+        if indexes:
+            logger.info(f"{len(indexes)} índices secundários de {table} removidos durante a carga")
+        return [definition for _, definition in indexes]
+
+    def build(self, statements):
+        """Executa os CREATE INDEX em paralelo. Retorna True se todos foram criados"""
+        if not statements:
+            return True
+
+        local = threading.local()
+        connections = []
+        lock = threading.Lock()
+
+        def create(statement):
+            if not hasattr(local, 'connection'):
+                local.connection = self.connect()
+                local.connection.autocommit = True
+                with lock:
+                    connections.append(local.connection)
+                if self.maintenance_work_mem:
+                    cursor = local.connection.cursor()
+                    cursor.execute("SET maintenance_work_mem = %s", (self.maintenance_work_mem,))
+                    cursor.close()
+
+            name = index_name(statement)
+            start = time.perf_counter()
+            cursor = local.connection.cursor()
+            try:
+                cursor.execute(statement)
+            finally:
+                cursor.close()
+            elapsed = time.perf_counter() - start
+            logger.info(f"Índice {name} criado em {elapsed:.2f}s")
+            return name, elapsed
+
+        failures = 0
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(statements))) as executor:
+                futures = {executor.submit(create, statement): statement for statement in statements}
+                for future, statement in futures.items():
+                    try:
+                        name, elapsed = future.result()
+                        self.timings[name] = elapsed
+                    except Exception as e:
+                        failures += 1
+                        logger.error(f"Erro ao criar índice {index_name(statement)}: {e}")
+        finally:
+            for connection in connections:
+                if self.maintenance_work_mem and not connection.closed:
+                    # A conexão pode voltar a um pool: não deixa o ajuste na sessão
+                    cursor = connection.cursor()
+                    cursor.execute("RESET maintenance_work_mem")
+                    cursor.close()
+                self.release(connection)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"{len(statements) - failures} índices criados em {elapsed:.2f}s com {self.workers} conexões "
+            f"(soma dos tempos: {sum(self.timings.values()):.2f}s)"
+        )
+        return failures == 0
@@ -0,0 +1,311 @@
+import json
+import time
+import cProfile
+import logging
+import threading
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+
+import psycopg2.extensions
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Comandos cujo rowcount corresponde a linhas gravadas
+_WRITE_COMMANDS = ('INSERT', 'UPDATE', 'DELETE', 'MERGE', 'COPY')
+
+
+class ConnectionStats:
+    """Contadores acumulados de uma conexão instrumentada"""
+
+    __slots__ = ('statements', 'round_trips', 'db_time', 'rows_fetched', 'rows_written')
+
+    def __init__(self):
+        self.statements = 0
+        self.round_trips = 0
+        self.db_time = 0.0
+        self.rows_fetched = 0
+        self.rows_written = 0
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor que contabiliza comandos, idas ao servidor, linhas e tempo dentro do psycopg2"""
+
+    def _record(self, start, statements=1, round_trips=1, writes=False):
+        stats = self.connection.stats
+        stats.db_time += time.perf_counter() - start
+        stats.statements += statements
+        stats.round_trips += round_trips
+        if not writes:
+            writes = (self.statusmessage or '').startswith(_WRITE_COMMANDS)
+        if writes and self.rowcount > 0:
+            stats.rows_written += self.rowcount
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(start)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(start, len(vars_list), len(vars_list))
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            # COPY não preenche statusmessage; o rowcount traz as linhas copiadas
+            self._record(start, writes=True)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        stats = self.connection.stats
+        stats.db_time += time.perf_counter() - start
+        if self.name:
+            stats.round_trips += 1  # cursores nomeados buscam no servidor a cada chamada
+        if isinstance(result, list):
+            stats.rows_fetched += len(result)
+        elif result is not None:
+            stats.rows_fetched += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __iter__(self):
+        stats = self.connection.stats
+        next_row = super().__next__
+        rows = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next_row()
+                except StopIteration:
+                    return
+                finally:
+                    stats.db_time += time.perf_counter() - start
+                rows += 1
+                yield row
+        finally:
+            stats.rows_fetched += rows
+            if self.name:
+                # Cursores nomeados buscam itersize linhas por ida ao servidor
+                stats.round_trips += rows // self.itersize + 1
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Conexão cujos cursores são instrumentados; os contadores ficam em `stats`"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = ConnectionStats()
+        self.cursor_factory = InstrumentedCursor
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            self.stats.db_time += time.perf_counter() - start
+            self.stats.round_trips += 1
+
+    def rollback(self):
+        start = time.perf_counter()
+        try:
+            return super().rollback()
+        finally:
+            self.stats.db_time += time.perf_counter() - start
+            self.stats.round_trips += 1
+
+
+class _NullStage:
+    """Etapa usada quando o perfilamento está desligado"""
+
+    def set_rows(self, rows_in=None, rows_out=None):
+        pass
+
+    def set_details(self, **details):
+        pass
+
+
+class _Stage:
+    def __init__(self):
+        self.rows_in = None
+        self.rows_out = None
+        self.details = {}
+
+    def set_rows(self, rows_in=None, rows_out=None):
+        """Informa as linhas da etapa quando não podem ser medidas nas conexões"""
+        if rows_in is not None:
+            self.rows_in = rows_in
+        if rows_out is not None:
+            self.rows_out = rows_out
+
+    def set_details(self, **details):
+        """Acrescenta ao registro da etapa informações próprias dela (ex.: filas da esteira)"""
+        self.details.update(details)
+
+
+class StageProfiler:
+    """Mede cada etapa do ETL: tempo, linhas, comandos SQL, idas ao servidor por
+    conexão, tempo no psycopg2 x Python e pico de memória (tracemalloc).
+
+    Desligado, não instrumenta as conexões e as etapas não têm custo.
+    Com etapas simultâneas (threads), o pico de memória é o do processo.
+    O tracemalloc deixa o código Python bem mais lento; com trace_memory=False
+    resta apenas o máximo de memória residente do processo.
+    """
+
+    def __init__(self, enabled=False, cprofile_dir=None, trace_memory=True):
+        self.enabled = enabled or cprofile_dir is not None
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        self.trace_memory = trace_memory
+        self.records = []
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Usado ao enviar o processador a outros processos: registros ficam no coordenador
+        state = self.__dict__.copy()
+        state['records'] = []
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def connection_factory(self):
+        """Fábrica de conexões a usar em psycopg2.connect (None se desligado)"""
+        return InstrumentedConnection if self.enabled else None
+
+    @contextmanager
+    def stage(self, name, **connections):
+        """Mede a etapa `name`; as conexões nomeadas (ex.: crm=..., dw=...) têm seus contadores comparados"""
+        if not self.enabled:
+            yield _NullStage()
+            return
+
+        connections = {
+            label: conn for label, conn in connections.items()
+            if conn is not None and hasattr(conn, 'stats')
+        }
+        before = {label: conn.stats.snapshot() for label, conn in connections.items()}
+        stage = _Stage()
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        profile = None
+        if self.cprofile_dir:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Outro perfilador já ativo (etapa aninhada); mede só tempo e contadores
+                profile = None
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield stage
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile:
+                profile.disable()
+                self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(self.cprofile_dir / f"{name}.prof")
+            self._add_record(name, elapsed, stage, connections, before, failed)
+
+    def _add_record(self, name, elapsed, stage, connections, before, failed):
+        per_connection = {}
+        for label, conn in connections.items():
+            after = conn.stats.snapshot()
+            per_connection[label] = {key: after[key] - before[label][key] for key in after}
+
+        db_time = sum(stats['db_time'] for stats in per_connection.values())
+        rows_in = stage.rows_in
+        if rows_in is None:
+            rows_in = sum(stats['rows_fetched'] for stats in per_connection.values())
+        rows_out = stage.rows_out
+        if rows_out is None:
+            rows_out = sum(stats['rows_written'] for stats in per_connection.values())
+
+        record = {
+            'etapa': name,
+            'sucesso': not failed,
+            'tempo_s': round(elapsed, 4),
+            'tempo_banco_s': round(db_time, 4),
+            'tempo_python_s': round(max(elapsed - db_time, 0.0), 4),
+            'linhas_lidas': rows_in,
+            'linhas_gravadas': rows_out,
+            'linhas_por_s': round(max(rows_in, rows_out) / elapsed, 1) if elapsed else 0.0,
+            'conexoes': per_connection,
+        }
+        record.update(stage.details)
+        if self.trace_memory and tracemalloc.is_tracing():
+            record['pico_memoria_bytes'] = tracemalloc.get_traced_memory()[1]
+        if resource is not None:
+            # Máximo de memória residente do processo até o fim da etapa (ru_maxrss em KB no Linux)
+            record['rss_maximo_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+        with self._lock:
+            self.records.append(record)
+
+    def to_dict(self):
+        return {
+            'inicio': self.started_at.isoformat(timespec='seconds'),
+            'tempo_total_s': round(time.perf_counter() - self._start, 4),
+            'etapas': self.records,
+        }
+
+    def write_json(self, path):
+        """Grava o perfil da execução em JSON"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+        logger.info(f"Perfil da execução gravado em {path}")
+
+    def log_summary(self):
+        """Registra no log uma linha por etapa medida"""
+        for record in self.records:
+            round_trips = sum(stats['round_trips'] for stats in record['conexoes'].values())
+            statements = sum(stats['statements'] for stats in record['conexoes'].values())
+            memory = record.get('pico_memoria_bytes')
+            logger.info(
+                f"Perfil {record['etapa']}: {record['tempo_s']:.2f}s "
+                f"(banco {record['tempo_banco_s']:.2f}s / python {record['tempo_python_s']:.2f}s), "
+                f"{record['linhas_lidas']} lidas, {record['linhas_gravadas']} gravadas, "
+                f"{record['linhas_por_s']:.0f} linhas/s, {statements} comandos, {round_trips} idas ao servidor"
+                + (f", pico {memory / 1024 / 1024:.1f} MB" if memory is not None else "")
+            )
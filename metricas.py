@@ -0,0 +1,73 @@
+from colunas import NumericColumn
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional, só necessária na transformação por colunas
+    np = None
+
+# Casas decimais das colunas monetárias na fato (DECIMAL(p,2))
+SCALE = 2
+
+
+def to_scaled(values, scale=SCALE):
+    """Valores com até `scale` casas decimais (float) como inteiros escalados (ex.: centavos).
+
+    Os preços e custos vêm de colunas DECIMAL(p,2), então
+    values * 10**scale está sempre a menos de 1e-6 de um inteiro.
+    """
+    return np.rint(values * 10 ** scale).astype(np.int64)
+
+
+def _values(column):
+    """(valores, máscara de nulos) da coluna como ndarrays, com máscara vazia quando não há nulos"""
+    values, nulls = column.to_numpy()
+    return values, nulls if nulls is not None else np.zeros(len(values), dtype=bool)
+
+
+class FactMetrics:
+    """Métricas da tabela de fato calculadas com NumPy sobre lotes inteiros.
+
+    Os valores monetários são inteiros em centavos, então totais, custos e
+    lucro são exatos, iguais aos que o DW calcularia em NUMERIC (e que a
+    carga com --fact-engine sql grava). As colunas resultantes são
+    NumericColumn em centavos (scale=2), gravadas pelo COPY com duas casas
+    decimais. Promoções não são aplicadas: as colunas de desconto da fato
+    ficam com o padrão 0 da tabela.
+    """
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("A transformação por colunas requer o pacote numpy (pip install numpy)")
+
+    def compute(self, quantidade, preco, custo):
+        """Métricas de um lote a partir das colunas (NumericColumn) de quantidade, preço de venda
+        e custo unitário, alinhadas por linha.
+
+        Quantidades e preços nulos ou não positivos e custos nulos viram 0.
+        Retorna um dict coluna da fato -> NumericColumn.
+        """
+        qtd, qtd_nulls = _values(quantidade)
+        qtd = np.where(~qtd_nulls & (qtd > 0), qtd, 0).astype(np.int64)
+
+        preco, preco_nulls = _values(preco)
+        preco = np.where(~preco_nulls & (preco > 0), to_scaled(preco), 0)
+
+        custo, custo_nulls = _values(custo)
+        custo = np.where(custo_nulls, 0, to_scaled(custo))
+
+        valor_total = qtd * preco
+        custo_total = qtd * custo
+        lucro_bruto = valor_total - custo_total
+
+        def money(values):
+            return NumericColumn.from_numpy(values, scale=SCALE)
+
+        return {
+            'quantidade_vendida': NumericColumn.from_numpy(qtd),
+            'preco_unitario_venda': money(preco),
+            'valor_total_item': money(valor_total),
+            'custo_unitario': money(custo),
+            'custo_total_item': money(custo_total),
+            'lucro_bruto': money(lucro_bruto),
+            'valor_final': money(valor_total),
+        }
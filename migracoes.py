@@ -0,0 +1,175 @@
+import hashlib
+import logging
+
+from scripts_sql import iter_statements
+
+logger = logging.getLogger(__name__)
+
+# Scripts de esquema de cada base, na ordem de aplicação: (versão, arquivo em sql/, descrição).
+# Uma versão aplicada nunca é reaplicada; mudanças de esquema entram como versões novas.
+MIGRATIONS = {
+    'crm': [
+        (1, 'create_tables.sql', 'Tabelas do CRM'),
+    ],
+    'dw': [
+        (1, 'cria_dw.sql', 'Dimensões e tabela de fato'),
+        (2, 'cria_controle_dw.sql', "Controle de carga, staging e pontos de controle"),
+        (3, 'cria_chaves_naturais_dw.sql', 'Chaves naturais das dimensões'),
+        (4, 'cria_agregados_dw.sql', 'Tabelas agregadas mensais'),
+        (5, 'remove_promocao_staging_dw.sql', 'Staging da fato sem a promoção aplicada'),
+    ],
+}
+
+# Base criada antes do controle de versões: se a tabela existir, as versões
+# até a indicada são registradas como aplicadas sem executar os scripts, desde
+# que o esquema passe nas verificações (descrição, consulta que retorna verdadeiro)
+BASELINES = {
+    'crm': ('vendas', 1, []),
+    'dw': ('fato_vendas', 1, [
+        ("fato_vendas particionada por data_venda", """
+            SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'fato_vendas'::regclass)
+        """),
+        ("índice único ux_fato_vendas_sk", """
+            SELECT to_regclass('ux_fato_vendas_sk') IS NOT NULL
+        """),
+        ("coluna registro_atual nas dimensões com histórico", """
+            SELECT NOT EXISTS (
+                SELECT 1 FROM pg_tables t
+                WHERE t.schemaname = current_schema() AND t.tablename LIKE 'dim\\_%' AND t.tablename <> 'dim_tempo'
+                  AND NOT EXISTS (SELECT 1 FROM information_schema.columns c
+                                  WHERE c.table_schema = t.schemaname AND c.table_name = t.tablename
+                                    AND c.column_name = 'registro_atual')
+            )
+        """),
+        ("chaves naturais das dimensões com histórico únicas só entre as versões atuais", """
+            SELECT NOT EXISTS (
+                SELECT 1 FROM pg_index i
+                JOIN pg_class t ON t.oid = i.indrelid
+                WHERE t.relnamespace = current_schema()::regnamespace
+                  AND t.relname LIKE 'dim\\_%' AND t.relname <> 'dim_tempo'
+                  AND i.indisunique AND NOT i.indisprimary AND i.indpred IS NULL
+            )
+        """),
+    ]),
+}
+
+
+def _checksum(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SchemaMigrator:
+    """Aplica somente os scripts de esquema pendentes de uma base.
+
+    A versão de cada script aplicado fica em etl_versao_esquema, na própria
+    base. Cada script roda em uma única transação junto com o registro da
+    sua versão: ou é aplicado inteiro, ou nada muda. Scripts já aplicados
+    cujo conteúdo mudou geram um aviso, mas não são reexecutados.
+    """
+
+    TABLE = 'etl_versao_esquema'
+
+    def __init__(self, connection, database, scripts_dir, migrations=None):
+        self.connection = connection
+        self.database = database
+        self.scripts_dir = scripts_dir
+        self.migrations = migrations if migrations is not None else MIGRATIONS[database]
+
+    def applied(self):
+        """Versões aplicadas: versão -> checksum do script"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                versao INTEGER PRIMARY KEY,
+                script VARCHAR(200) NOT NULL,
+                descricao VARCHAR(200),
+                checksum CHAR(32),
+                aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute(f"SELECT versao, checksum FROM {self.TABLE}")
+        versions = dict(cursor.fetchall())
+        cursor.close()
+        self.connection.commit()
+
+        if not versions:
+            versions = self._baseline()
+        return versions
+
+    def _baseline(self):
+        """Registra como aplicadas as versões de uma base que já existia sem controle de versões"""
+        table, version, checks = BASELINES.get(self.database, (None, 0, []))
+        if table is None:
+            return {}
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        exists = cursor.fetchone()[0]
+        versions = {}
+        if exists:
+            failed = []
+            for description, query in checks:
+                cursor.execute(query)
+                if not cursor.fetchone()[0]:
+                    failed.append(description)
+            if failed:
+                cursor.close()
+                self.connection.rollback()
+                raise RuntimeError(f"Base {self.database} existente sem controle de versões não corresponde "
+                                   f"à versão {version} ({'; '.join(failed)}); recrie-a com --rebuild")
+            for number, script, description in self.migrations:
+                if number <= version:
+                    checksum = _checksum(self.scripts_dir / script)
+                    self._record(cursor, number, script, description, checksum)
+                    versions[number] = checksum
+            logger.info(f"Base {self.database} existente sem controle de versões: "
+                        f"registrada como versão {version}")
+        cursor.close()
+        self.connection.commit()
+        return versions
+
+    def pending(self):
+        """Scripts ainda não aplicados, em ordem"""
+        applied = self.applied()
+        pending = []
+        for number, script, description in self.migrations:
+            if number not in applied:
+                pending.append((number, script, description))
+            elif applied[number] and applied[number] != _checksum(self.scripts_dir / script):
+                logger.warning(f"{script} mudou depois de aplicado (versão {number}); "
+                               f"mudanças de esquema devem entrar como uma versão nova")
+        return pending
+
+    def migrate(self):
+        """Aplica os scripts pendentes. Retorna quantos foram aplicados"""
+        pending = self.pending()
+        for number, script, description in pending:
+            path = self.scripts_dir / script
+            cursor = self.connection.cursor()
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    for statement in iter_statements(file):
+                        cursor.execute(statement)
+                self._record(cursor, number, script, description, _checksum(path))
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                logger.error(f"Falha ao aplicar {script} (versão {number}) na base {self.database}")
+                raise
+            finally:
+                cursor.close()
+            logger.info(f"Base {self.database}: versão {number} aplicada ({description})")
+
+        if not pending:
+            logger.info(f"Base {self.database}: esquema atualizado, nada a aplicar")
+        return len(pending)
+
+    def _record(self, cursor, number, script, description, checksum):
+        cursor.execute(f"""
+            INSERT INTO {self.TABLE} (versao, script, descricao, checksum)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (versao) DO NOTHING
+        """, (number, script, description, checksum))
@@ -0,0 +1,72 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Situação de uma execução na tabela de pontos de controle
+RUNNING = 'em_andamento'
+FINISHED = 'concluida'
+
+
+class CheckpointStore:
+    """Pontos de controle da carga da tabela de fato, por execução.
+
+    Guarda a última chave (id_venda, id_produto) gravada de cada execução.
+    Como WatermarkStore, as operações não fazem commit: o ponto de controle
+    deve ser gravado na mesma transação do lote que ele registra, de modo
+    que o que está no DW e o ponto de controle nunca divergem.
+    """
+
+    TABLE = 'etl_ponto_controle'
+
+    def start(self, connection, run_id, source, since_id=None):
+        """Registra o início da carga de uma execução (a partir de id_venda > since_id)"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            INSERT INTO {self.TABLE} (id_execucao, tabela_origem, id_venda_inicial, situacao)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (id_execucao) DO NOTHING
+        """, (run_id, source, since_id, RUNNING))
+        cursor.close()
+
+    def save(self, connection, run_id, last_key, rows):
+        """Grava a última chave (id_venda, id_produto) e o total de linhas carregadas"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            UPDATE {self.TABLE}
+            SET ultimo_id_venda = %s, ultimo_id_produto = %s, linhas = %s,
+                atualizado_em = CURRENT_TIMESTAMP
+            WHERE id_execucao = %s
+        """, (last_key[0], last_key[1], rows, run_id))
+        cursor.close()
+
+    def finish(self, connection, run_id):
+        """Marca a execução como concluída"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            UPDATE {self.TABLE} SET situacao = %s, atualizado_em = CURRENT_TIMESTAMP
+            WHERE id_execucao = %s
+        """, (FINISHED, run_id))
+        cursor.close()
+
+    def pending(self, connection, source):
+        """Última execução não concluída da tabela de origem, como dict, ou None"""
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT id_execucao, id_venda_inicial, ultimo_id_venda, ultimo_id_produto, linhas
+            FROM {self.TABLE}
+            WHERE tabela_origem = %s AND situacao = %s
+            ORDER BY iniciado_em DESC
+            LIMIT 1
+        """, (source, RUNNING))
+        result = cursor.fetchone()
+        cursor.close()
+        if result is None:
+            return None
+
+        run_id, since_id, last_id_venda, last_id_produto, rows = result
+        return {
+            'id_execucao': run_id,
+            'id_venda_inicial': since_id,
+            'ultima_chave': (last_id_venda, last_id_produto) if last_id_venda is not None else None,
+            'linhas': rows,
+        }
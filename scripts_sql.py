@@ -0,0 +1,294 @@
+import io
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Início de algo que muda o contexto léxico: fim de comando, texto, identificador,
+# comentário ou texto entre cifrões ($$ ou $tag$)
+_TOKEN = re.compile(r"""[;'"]|--|/\*|\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$""")
+# Trecho sem nada disso (textos sem barra invertida inclusos), pulado de uma vez
+_PLAIN = re.compile(r"""(?:[^;'"$/-]+|'[^'\\]*'|"[^"]*"|-(?=[^-])|/(?=[^*])|\$(?=[^$A-Za-z_]))*""")
+_BLOCK_COMMENT = re.compile(r'/\*|\*/')
+_ESCAPE_STRING_END = re.compile(r"\\.|'", re.DOTALL)
+_LEADING_COMMENTS = re.compile(r'(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*', re.DOTALL)
+
+_INSERT_HEADER = re.compile(
+    r'INSERT\s+INTO\s+((?:"[^"]+"|[A-Za-z_][\w$]*)(?:\.(?:"[^"]+"|[A-Za-z_][\w$]*))?)\s*'
+    r'(?:\(([^()]*)\))?\s*VALUES\s*',
+    re.IGNORECASE,
+)
+# Literais aceitos na conversão; NULL só em maiúsculas, por ser o marcador de nulo do COPY
+_LITERAL = r"'[^']*(?:''[^']*)*'|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|NULL|TRUE|FALSE|true|false"
+_ROW = re.compile(rf"\(\s*(?:{_LITERAL})(?:\s*,\s*(?:{_LITERAL}))*\s*\)")
+# Extração dos campos depois que o comando inteiro já foi validado
+_FIELD = re.compile(r"'[^']*(?:''[^']*)*'|[^\s,()']+")
+
+# Com aspas simples como delimitador, um literal SQL simples já é um campo CSV válido
+# ('' dentro do texto é o escape das aspas nos dois formatos)
+COPY_OPTIONS = "(FORMAT csv, QUOTE '''', NULL 'NULL')"
+
+
+def iter_statements(file, chunk_size=1 << 20):
+    """Lê comandos SQL de um arquivo texto em blocos, sem carregá-lo inteiro.
+
+    Respeita textos ('...', E'...'), identificadores entre aspas, comentários
+    (--, /* */ aninhados) e textos entre cifrões ($$...$$, $tag$...$tag$):
+    um ';' só encerra o comando fora deles. Comandos vazios ou só com
+    comentários são ignorados.
+    """
+    buffer = ''
+    start = 0   # início do comando atual no buffer
+    pos = 0     # posição da varredura
+    eof = False
+
+    def read_more():
+        nonlocal buffer, start, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        # Descarta o que já foi emitido antes de crescer o buffer
+        buffer = buffer[start:] + chunk
+        pos -= start
+        start = 0
+        return True
+
+    while True:
+        pos = _PLAIN.match(buffer, pos).end()
+        match = _TOKEN.search(buffer, pos)
+        if match is None:
+            if read_more():
+                continue
+            statement = buffer[start:]
+            if _has_code(statement):
+                yield statement.strip()
+            return
+
+        token = match.group()
+        if token == ';':
+            statement = buffer[start:match.start()]
+            if _has_code(statement):
+                yield statement.strip()
+            start = pos = match.end()
+            continue
+
+        end = _closing(buffer, match)
+        if end is None:
+            # Fechamento ainda não lido: relê a partir do mesmo token com mais dados
+            pos = match.start()
+            if read_more():
+                continue
+            statement = buffer[start:]
+            if _has_code(statement):
+                yield statement.strip()
+            return
+        pos = end
+
+
+def _closing(buffer, match):
+    """Posição logo após o fechamento do token aberto em `match`, ou None se não estiver no buffer"""
+    token = match.group()
+    after = match.end()
+
+    if token == '--':
+        end = buffer.find('\n', after)
+        return None if end < 0 else end + 1
+
+    if token == '/*':
+        depth = 1
+        for inner in _BLOCK_COMMENT.finditer(buffer, after):
+            depth += 1 if inner.group() == '/*' else -1
+            if depth == 0:
+                return inner.end()
+        return None
+
+    if token == "'":
+        prefix = buffer[match.start() - 1:match.start()] if match.start() else ''
+        before = buffer[match.start() - 2:match.start() - 1] if match.start() > 1 else ''
+        if prefix in ('E', 'e') and not (before.isalnum() or before == '_'):
+            # E'...': barra invertida escapa o próximo caractere
+            for inner in _ESCAPE_STRING_END.finditer(buffer, after):
+                if inner.group() == "'":
+                    return inner.end()
+            return None
+        # '' dentro do texto fecha e reabre, o que dá no mesmo para a varredura
+        end = buffer.find("'", after)
+        return None if end < 0 else end + 1
+
+    if token == '"':
+        end = buffer.find('"', after)
+        return None if end < 0 else end + 1
+
+    # $tag$ ... $tag$
+    end = buffer.find(token, after)
+    return None if end < 0 else end + len(token)
+
+
+def _has_code(statement):
+    return _LEADING_COMMENTS.match(statement).end() < len(statement)
+
+
+def strip_leading_comments(statement):
+    """Remove espaços e comentários antes do primeiro token do comando"""
+    return statement[_LEADING_COMMENTS.match(statement).end():]
+
+
+def insert_to_copy(statement):
+    """Converte INSERT INTO t [(colunas)] VALUES (...), (...) só com literais simples
+    em linhas CSV para COPY ... WITH COPY_OPTIONS.
+
+    Retorna (tabela, colunas ou None, linhas) ou None se o comando tiver
+    expressões, E'...', ON CONFLICT, RETURNING etc.
+    """
+    text = strip_leading_comments(statement)
+    header = _INSERT_HEADER.match(text)
+    if header is None:
+        return None
+
+    table = header.group(1)
+    columns = _parse_columns(header.group(2))
+    if columns is not None:
+        width = len(columns)
+    else:
+        first = _ROW.match(text, header.end())
+        if first is None:
+            return None
+        width = len(_FIELD.findall(text, first.start(), first.end()))
+
+    # Valida todas as linhas (e a quantidade de campos) de uma vez, sem laço em Python
+    if _rows_pattern(width).fullmatch(text, header.end()) is None:
+        return None
+
+    fields = _FIELD.findall(text, header.end())
+    lines = [','.join(fields[i:i + width]) + '\n' for i in range(0, len(fields), width)]
+    return table, columns, lines
+
+
+@lru_cache(maxsize=64)
+def _rows_pattern(width):
+    """VALUES com uma ou mais linhas de exatamente `width` literais"""
+    row = rf"\(\s*(?:{_LITERAL})(?:\s*,\s*(?:{_LITERAL})){{{width - 1}}}\s*\)"
+    return re.compile(rf"{row}(?:\s*,\s*{row})*\s*")
+
+
+@lru_cache(maxsize=256)
+def _parse_columns(column_list):
+    if column_list is None:
+        return None
+    return tuple(column.strip() for column in column_list.split(','))
+
+
+class _CopyRun:
+    """INSERTs simples na mesma tabela e colunas, enviados como um COPY"""
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns
+        self.rows = []
+        self.statements = 0
+
+
+class ScriptExecutor:
+    """Executa scripts SQL em fluxo, em transações de até batch_size comandos.
+
+    Dentro de um lote, os INSERTs simples de cada tabela são agrupados em
+    COPY (até copy_rows linhas por COPY), na ordem em que a tabela aparece;
+    qualquer outro comando encerra os grupos, de modo que a ordem entre
+    INSERTs e os demais comandos é mantida. Se um lote falhar, ele é
+    dividido ao meio recursivamente até isolar os comandos com erro, que
+    são registrados e pulados; as partes corretas são confirmadas. Comandos
+    isolados são executados como estão, sem COPY.
+    """
+
+    def __init__(self, connection, batch_size=1000, copy_rows=10000, use_copy=True,
+                 transform=None, chunk_size=1 << 20):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.copy_rows = copy_rows
+        self.use_copy = use_copy
+        self.transform = transform
+        self.chunk_size = chunk_size
+        self.executed = 0
+        self.copied_rows = 0
+        self.failed = 0
+
+    def run_file(self, path):
+        """Executa o script do arquivo. Retorna True se nenhum comando falhou"""
+        with open(path, 'r', encoding='utf-8') as file:
+            return self.run(iter_statements(file, self.chunk_size))
+
+    def run(self, statements):
+        """Executa uma sequência de comandos. Retorna True se nenhum falhou"""
+        batch = []
+        for statement in statements:
+            if self.transform:
+                statement = self.transform(statement)
+                if not statement:
+                    continue
+            batch.append(statement)
+            if len(batch) >= self.batch_size:
+                self._run_batch(batch)
+                batch = []
+
+        if batch:
+            self._run_batch(batch)
+        return self.failed == 0
+
+    def _plan(self, batch):
+        """Agrupa os INSERTs simples do lote em COPYs por tabela"""
+        plan = []
+        groups = {}
+        for statement in batch:
+            parsed = insert_to_copy(statement) if self.use_copy else None
+            if parsed is None:
+                plan.append(statement)
+                groups = {}
+                continue
+
+            table, columns, rows = parsed
+            copy_run = groups.get((table, columns))
+            if copy_run is None or len(copy_run.rows) >= self.copy_rows:
+                copy_run = groups[(table, columns)] = _CopyRun(table, columns)
+                plan.append(copy_run)
+            copy_run.rows.extend(rows)
+            copy_run.statements += 1
+        return plan
+
+    def _execute(self, cursor, item):
+        if isinstance(item, _CopyRun):
+            columns = f" ({', '.join(item.columns)})" if item.columns else ''
+            data = io.StringIO(''.join(item.rows))
+            cursor.copy_expert(f"COPY {item.table}{columns} FROM STDIN WITH {COPY_OPTIONS}", data)
+            self.copied_rows += len(item.rows)
+        else:
+            cursor.execute(item)
+
+    def _run_batch(self, batch):
+        """Executa o lote em uma transação; se falhar, divide-o até isolar os comandos com erro"""
+        plan = self._plan(batch) if len(batch) > 1 else batch
+        copied_rows = self.copied_rows
+        cursor = self.connection.cursor()
+        try:
+            for item in plan:
+                self._execute(cursor, item)
+            self.connection.commit()
+            self.executed += len(batch)
+            return
+        except Exception as e:
+            self.connection.rollback()
+            self.copied_rows = copied_rows
+            error = e
+        finally:
+            cursor.close()
+
+        if len(batch) == 1:
+            self.failed += 1
+            logger.error(f"Erro ao executar comando: {error}")
+            logger.error(f"Comando: {batch[0][:100]}...")
+            return
+
+        middle = len(batch) // 2
+        self._run_batch(batch[:middle])
+        self._run_batch(batch[middle:])
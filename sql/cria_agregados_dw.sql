@@ -0,0 +1,64 @@
+-- Tabelas agregadas das vendas por mês (mantidas por agregados.py)
+-- Idempotente: pode ser executado sobre um DW já existente
+
+-- =============================================
+-- REGISTRO DAS TABELAS AGREGADAS
+-- =============================================
+
+CREATE TABLE IF NOT EXISTS etl_agregados (
+    tabela VARCHAR(100) PRIMARY KEY,
+    atributos VARCHAR(200) NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- =============================================
+-- AGREGADOS MENSAIS DE FATO_VENDAS
+-- =============================================
+
+-- Mês x Loja
+CREATE TABLE IF NOT EXISTS agg_vendas_mes_loja (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    sk_loja INTEGER,
+    quantidade_vendida BIGINT NOT NULL,
+    itens BIGINT NOT NULL,
+    vendas BIGINT NOT NULL,
+    valor_total_item DECIMAL(16,2) NOT NULL,
+    valor_desconto DECIMAL(16,2) NOT NULL,
+    valor_final DECIMAL(16,2) NOT NULL,
+    custo_total_item DECIMAL(16,2) NOT NULL,
+    lucro_bruto DECIMAL(16,2) NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_agg_vendas_mes_loja ON agg_vendas_mes_loja(ano, mes, sk_loja);
+
+-- Mês x Categoria de Produto
+CREATE TABLE IF NOT EXISTS agg_vendas_mes_categoria (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    sk_categoria_produto INTEGER,
+    quantidade_vendida BIGINT NOT NULL,
+    itens BIGINT NOT NULL,
+    vendas BIGINT NOT NULL,
+    valor_total_item DECIMAL(16,2) NOT NULL,
+    valor_desconto DECIMAL(16,2) NOT NULL,
+    valor_final DECIMAL(16,2) NOT NULL,
+    custo_total_item DECIMAL(16,2) NOT NULL,
+    lucro_bruto DECIMAL(16,2) NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_agg_vendas_mes_categoria ON agg_vendas_mes_categoria(ano, mes, sk_categoria_produto);
+
+-- Mês x Vendedor
+CREATE TABLE IF NOT EXISTS agg_vendas_mes_vendedor (
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    sk_vendedor INTEGER,
+    quantidade_vendida BIGINT NOT NULL,
+    itens BIGINT NOT NULL,
+    vendas BIGINT NOT NULL,
+    valor_total_item DECIMAL(16,2) NOT NULL,
+    valor_desconto DECIMAL(16,2) NOT NULL,
+    valor_final DECIMAL(16,2) NOT NULL,
+    custo_total_item DECIMAL(16,2) NOT NULL,
+    lucro_bruto DECIMAL(16,2) NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_agg_vendas_mes_vendedor ON agg_vendas_mes_vendedor(ano, mes, sk_vendedor);
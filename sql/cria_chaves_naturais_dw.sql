@@ -0,0 +1,18 @@
+-- Script para criação dos índices únicos das chaves naturais das dimensões
+-- Executar antes da carga das dimensões
+-- Dimensões com histórico: a chave natural é única entre as versões atuais
+
+-- =============================================
+-- CHAVES NATURAIS DAS DIMENSÕES
+-- =============================================
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_tempo_data ON dim_tempo(data_completa);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_localidade_id ON dim_localidade(id_localidade) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_categoria_cliente_id ON dim_categoria_cliente(id_categoria_cliente) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_categoria_produto_id ON dim_categoria_produto(id_categoria_produto) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_fornecedor_id ON dim_fornecedor(id_fornecedor) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_cliente_id ON dim_cliente(id_cliente) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_produto_id ON dim_produto(id_produto) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_vendedor_id ON dim_vendedor(id_vendedor) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_loja_id ON dim_loja(id_loja) WHERE registro_atual;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_promocao_id ON dim_promocao(id_promocao) WHERE registro_atual;
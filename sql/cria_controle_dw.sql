@@ -0,0 +1,38 @@
+-- Tabelas de controle da carga do Data Warehouse
+-- Idempotente: pode ser executado sobre um DW já existente
+
+-- Marca d'água por tabela de origem (maior chave já carregada)
+CREATE TABLE IF NOT EXISTS etl_controle_carga (
+    tabela_origem VARCHAR(100) PRIMARY KEY,
+    coluna_controle VARCHAR(100) NOT NULL,
+    ultimo_valor BIGINT NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Staging da carga da tabela de fato em SQL (carga_sql.py): linhas brutas de
+-- vendas x item_vendas copiadas do CRM, esvaziada ao fim de cada carga
+CREATE UNLOGGED TABLE IF NOT EXISTS stg_vendas (
+    id_venda INTEGER,
+    data_venda VARCHAR(50),
+    id_cliente INTEGER,
+    id_vendedor INTEGER,
+    id_loja INTEGER,
+    id_produto INTEGER,
+    qtd_vendida INTEGER,
+    preco_venda DECIMAL(10,2),
+    id_promocao_aplicada INTEGER
+);
+
+-- Ponto de controle da carga da tabela de fato por execução (última chave
+-- gravada), atualizado na mesma transação de cada lote confirmado
+CREATE TABLE IF NOT EXISTS etl_ponto_controle (
+    id_execucao VARCHAR(50) PRIMARY KEY,
+    tabela_origem VARCHAR(100) NOT NULL,
+    id_venda_inicial BIGINT,
+    ultimo_id_venda BIGINT,
+    ultimo_id_produto BIGINT,
+    linhas BIGINT NOT NULL DEFAULT 0,
+    situacao VARCHAR(20) NOT NULL,
+    iniciado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -1,5 +1,7 @@
 -- Script de criação do Data Warehouse (DW)
 -- Estrutura OLAP com tabelas de dimensão e fato
+-- Dimensões com chave natural guardam histórico (SCD tipo 2): uma versão por
+-- mudança nos atributos, com registro_atual marcando a versão vigente
 
 -- =============================================
 -- TABELAS DE DIMENSÃO
@@ -28,7 +30,12 @@ CREATE TABLE dim_localidade (
     estado VARCHAR(50),
     regiao VARCHAR(50),
     regiao_padronizada VARCHAR(50),
-    eh_capital BOOLEAN DEFAULT FALSE
+    eh_capital BOOLEAN DEFAULT FALSE,
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Categoria Cliente
@@ -36,7 +43,12 @@ CREATE TABLE dim_categoria_cliente (
     sk_categoria_cliente SERIAL PRIMARY KEY,
     id_categoria_cliente INTEGER,
     nome_categoria_cliente VARCHAR(100),
-    categoria_padronizada VARCHAR(100)
+    categoria_padronizada VARCHAR(100),
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Cliente
@@ -48,7 +60,12 @@ CREATE TABLE dim_cliente (
     sk_categoria_cliente INTEGER,
     sk_localidade INTEGER,
     data_cadastro DATE,
-    status_cliente VARCHAR(20) DEFAULT 'ATIVO'
+    status_cliente VARCHAR(20) DEFAULT 'ATIVO',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Categoria Produto
@@ -56,7 +73,12 @@ CREATE TABLE dim_categoria_produto (
     sk_categoria_produto SERIAL PRIMARY KEY,
     id_categoria_produto INTEGER,
     nome_categoria_produto VARCHAR(100),
-    categoria_padronizada VARCHAR(100)
+    categoria_padronizada VARCHAR(100),
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Fornecedor
@@ -66,7 +88,12 @@ CREATE TABLE dim_fornecedor (
     nome_fornecedor VARCHAR(200),
     nome_padronizado VARCHAR(200),
     sk_localidade INTEGER,
-    status_fornecedor VARCHAR(20) DEFAULT 'ATIVO'
+    status_fornecedor VARCHAR(20) DEFAULT 'ATIVO',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Produto
@@ -79,7 +106,12 @@ CREATE TABLE dim_produto (
     preco_unitario DECIMAL(10,2),
     custo_unitario DECIMAL(10,2),
     margem_lucro DECIMAL(5,2),
-    status_produto VARCHAR(20) DEFAULT 'ATIVO'
+    status_produto VARCHAR(20) DEFAULT 'ATIVO',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Vendedor
@@ -89,7 +121,12 @@ CREATE TABLE dim_vendedor (
     nome_vendedor VARCHAR(200),
     nome_padronizado VARCHAR(200),
     sk_localidade INTEGER,
-    status_vendedor VARCHAR(20) DEFAULT 'ATIVO'
+    status_vendedor VARCHAR(20) DEFAULT 'ATIVO',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Loja
@@ -100,7 +137,12 @@ CREATE TABLE dim_loja (
     nome_padronizado VARCHAR(200),
     sk_localidade INTEGER,
     tipo_loja VARCHAR(50),
-    status_loja VARCHAR(20) DEFAULT 'ATIVA'
+    status_loja VARCHAR(20) DEFAULT 'ATIVA',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- Dimensão Promoção
@@ -112,7 +154,12 @@ CREATE TABLE dim_promocao (
     percentual_desconto DECIMAL(5,2),
     data_inicio DATE,
     data_fim DATE,
-    status_promocao VARCHAR(20) DEFAULT 'ATIVA'
+    status_promocao VARCHAR(20) DEFAULT 'ATIVA',
+    -- Histórico (SCD tipo 2)
+    hash_registro CHAR(32),
+    valido_de TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    valido_ate TIMESTAMP,
+    registro_atual BOOLEAN NOT NULL DEFAULT TRUE
 );
 
 -- =============================================
@@ -120,10 +167,17 @@ CREATE TABLE dim_promocao (
 -- =============================================
 
 -- Fato Vendas
+-- Particionada por mês da data da venda (data_completa de sk_tempo); as
+-- partições mensais são criadas por particoes.py para os meses das vendas carregadas.
+-- Vendas sem data válida ficam na partição padrão. A chave primária teria de
+-- incluir a chave de partição, que pode ser nula: o índice único é composto
+-- (sk_venda, data_venda), como o PostgreSQL exige em tabelas particionadas, e
+-- sk_venda sozinho é único porque vem da sequência do SERIAL
 CREATE TABLE fato_vendas (
-    sk_venda SERIAL PRIMARY KEY,
+    sk_venda SERIAL,
     id_venda INTEGER,
     sk_tempo INTEGER,
+    data_venda DATE,
     sk_cliente INTEGER,
     sk_vendedor INTEGER,
     sk_loja INTEGER,
@@ -142,4 +196,8 @@ CREATE TABLE fato_vendas (
     -- Campos de controle
     data_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     origem_dados VARCHAR(50) DEFAULT 'SISTEMA_CRM'
-);
+) PARTITION BY RANGE (data_venda);
+
+CREATE TABLE fato_vendas_sem_data PARTITION OF fato_vendas DEFAULT;
+
+CREATE UNIQUE INDEX ux_fato_vendas_sk ON fato_vendas(sk_venda, data_venda);
@@ -21,17 +21,17 @@ CREATE INDEX IF NOT EXISTS idx_fato_vendas_vendedor ON fato_vendas(sk_vendedor);
 CREATE INDEX IF NOT EXISTS idx_fato_vendas_loja ON fato_vendas(sk_loja);
 CREATE INDEX IF NOT EXISTS idx_fato_vendas_promocao ON fato_vendas(sk_promocao);
 
+-- Vendas posteriores a uma marca d'água (meses afetados pela carga incremental nos agregados)
+CREATE INDEX IF NOT EXISTS idx_fato_vendas_id_venda ON fato_vendas(id_venda);
+
+-- Índices BRIN nas colunas de tempo: pequenos e eficientes com as linhas
+-- gravadas em ordem de data dentro de cada partição mensal
+CREATE INDEX IF NOT EXISTS brin_fato_vendas_data ON fato_vendas USING BRIN (data_venda);
+CREATE INDEX IF NOT EXISTS brin_fato_vendas_tempo ON fato_vendas USING BRIN (sk_tempo);
+
 -- Índices compostos para consultas temporais
 CREATE INDEX IF NOT EXISTS idx_fato_vendas_tempo_cliente ON fato_vendas(sk_tempo, sk_cliente);
 CREATE INDEX IF NOT EXISTS idx_fato_vendas_tempo_produto ON fato_vendas(sk_tempo, sk_produto);
 
--- Índices nas chaves naturais das dimensões
-CREATE INDEX IF NOT EXISTS idx_dim_localidade_id ON dim_localidade(id_localidade);
-CREATE INDEX IF NOT EXISTS idx_dim_cliente_id ON dim_cliente(id_cliente);
-CREATE INDEX IF NOT EXISTS idx_dim_produto_id ON dim_produto(id_produto);
-CREATE INDEX IF NOT EXISTS idx_dim_vendedor_id ON dim_vendedor(id_vendedor);
-CREATE INDEX IF NOT EXISTS idx_dim_loja_id ON dim_loja(id_loja);
-CREATE INDEX IF NOT EXISTS idx_dim_promocao_id ON dim_promocao(id_promocao);
-CREATE INDEX IF NOT EXISTS idx_dim_categoria_cliente_id ON dim_categoria_cliente(id_categoria_cliente);
-CREATE INDEX IF NOT EXISTS idx_dim_categoria_produto_id ON dim_categoria_produto(id_categoria_produto);
-CREATE INDEX IF NOT EXISTS idx_dim_fornecedor_id ON dim_fornecedor(id_fornecedor);
+-- Os índices únicos das chaves naturais das dimensões ficam em
+-- cria_chaves_naturais_dw.sql e são criados antes da carga
@@ -0,0 +1,5 @@
+-- Staging da carga da tabela de fato em SQL (carga_sql.py) sem id_promocao_aplicada:
+-- nenhuma carga da fato aplica promoções, então a coluna nunca era preenchida
+-- Idempotente: pode ser executado sobre um DW já existente
+
+ALTER TABLE stg_vendas DROP COLUMN IF EXISTS id_promocao_aplicada;
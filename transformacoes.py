@@ -0,0 +1,218 @@
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo do cache de cada transformação
+CACHE_SIZE = 65536
+
+# =============================================
+# TABELAS DE APOIO (montadas uma única vez)
+# =============================================
+
+_WHITESPACE = re.compile(r'\s+')
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)')
+
+# Conectores que ficam em minúscula nos nomes
+CONNECTORS = frozenset(['da', 'de', 'do', 'das', 'dos', 'e', 'em', 'na', 'no', 'com'])
+
+REGION_MAP = {
+    'rio de janeiro': 'Rio de Janeiro',
+    'são paulo': 'São Paulo',
+    'minas gerais': 'Minas Gerais',
+    'mato grosso': 'Mato Grosso',
+    'mato grosso do sul': 'Mato Grosso do Sul',
+    'rio grande do sul': 'Rio Grande do Sul',
+    'rio grande do norte': 'Rio Grande do Norte',
+    'espírito santo': 'Espírito Santo',
+    'distrito federal': 'Distrito Federal'
+}
+
+# Pares (capital, UF)
+CAPITALS = frozenset([
+    ('Rio Branco', 'AC'), ('Maceió', 'AL'), ('Macapá', 'AP'), ('Manaus', 'AM'),
+    ('Salvador', 'BA'), ('Fortaleza', 'CE'), ('Brasília', 'DF'), ('Vitória', 'ES'),
+    ('Goiânia', 'GO'), ('São Luís', 'MA'), ('Cuiabá', 'MT'), ('Campo Grande', 'MS'),
+    ('Belo Horizonte', 'MG'), ('Belém', 'PA'), ('João Pessoa', 'PB'), ('Curitiba', 'PR'),
+    ('Recife', 'PE'), ('Teresina', 'PI'), ('Rio de Janeiro', 'RJ'), ('Natal', 'RN'),
+    ('Porto Alegre', 'RS'), ('Porto Velho', 'RO'), ('Boa Vista', 'RR'), ('Florianópolis', 'SC'),
+    ('São Paulo', 'SP'), ('Aracaju', 'SE'), ('Palmas', 'TO')
+])
+
+# Regras de classificação: (palavras-chave, resultado), avaliadas em ordem
+CUSTOMER_CATEGORY_RULES = (
+    (('vip', 'premium'), 'Premium'),
+    (('gold', 'ouro'), 'Gold'),
+    (('silver', 'prata'), 'Silver'),
+)
+
+STORE_TYPE_RULES = (
+    (('shopping', 'mall'), 'Shopping'),
+    (('centro',), 'Centro'),
+    (('outlet',), 'Outlet'),
+)
+
+PROMOTION_TYPE_RULES = (
+    (('black',), 'Black Friday'),
+    (('natal',), 'Natal'),
+    (('liquidação',), 'Liquidação'),
+)
+
+
+def _classify(text, rules, default):
+    text_lower = text.lower()
+    for keywords, result in rules:
+        if any(keyword in text_lower for keyword in keywords):
+            return result
+    return default
+
+
+# =============================================
+# TRANSFORMAÇÕES (com cache LRU por função)
+# =============================================
+
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_text(text):
+    """Limpa e padroniza texto"""
+    if not text:
+        return 'N/A'
+
+    # Remove espaços extras e capitaliza a primeira letra de cada palavra
+    return _WHITESPACE.sub(' ', str(text).strip()).title()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def standardize_name(name):
+    """Padroniza nomes de pessoas/empresas"""
+    if not name or name == 'N/A':
+        return name
+
+    words = name.split()
+    return ' '.join(
+        word.lower() if i > 0 and word.lower() in CONNECTORS else word.title()
+        for i, word in enumerate(words)
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def standardize_region(region):
+    """Padroniza nomes de regiões"""
+    if not region:
+        return 'Não Definido'
+
+    return REGION_MAP.get(region.lower().strip(), region.title())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def is_capital(city, state):
+    """Verifica se a cidade é capital"""
+    return (city, state) in CAPITALS
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def standardize_customer_category(category):
+    """Padroniza categoria de cliente"""
+    if not category:
+        return 'Não Definido'
+
+    return _classify(category, CUSTOMER_CATEGORY_RULES, 'Padrão')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def standardize_product_category(category):
+    """Padroniza categoria de produto"""
+    if not category:
+        return 'Não Definido'
+
+    return category.title()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_store_type(store_name):
+    """Classifica tipo da loja baseado no nome"""
+    if not store_name:
+        return 'Loja Padrão'
+
+    return _classify(store_name, STORE_TYPE_RULES, 'Loja Padrão')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_promotion_type(promo_name):
+    """Classifica tipo de promoção"""
+    if not promo_name:
+        return 'Desconto Geral'
+
+    return _classify(promo_name, PROMOTION_TYPE_RULES, 'Desconto Geral')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_discount_percentage(discount):
+    """Extrai o percentual de um texto de desconto (ex.: "10%", "15.5")"""
+    if not discount:
+        return 0.0
+
+    match = _NUMBER.search(str(discount))
+    return float(match.group(1)) if match else 0.0
+
+
+CACHED_TRANSFORMS = (
+    clean_text, standardize_name, standardize_region, is_capital,
+    standardize_customer_category, standardize_product_category,
+    classify_store_type, classify_promotion_type, parse_discount_percentage,
+)
+
+
+# =============================================
+# API EM LOTE E ESTATÍSTICAS
+# =============================================
+
+def transform_column(func, *columns):
+    """Aplica a transformação a colunas inteiras, avaliando cada valor distinto uma única vez.
+
+    Com mais de uma coluna, a função recebe um argumento por coluna
+    (ex.: transform_column(is_capital, cidades, estados)).
+    """
+    values = columns[0] if len(columns) == 1 else zip(*columns)
+    unpack = len(columns) > 1
+    memo = {}
+    result = []
+    for value in values:
+        try:
+            result.append(memo[value])
+        except KeyError:
+            transformed = memo[value] = func(*value) if unpack else func(value)
+            result.append(transformed)
+    return result
+
+
+def cache_stats():
+    """Estatísticas do cache de cada transformação"""
+    stats = {}
+    for func in CACHED_TRANSFORMS:
+        info = func.cache_info()
+        calls = info.hits + info.misses
+        stats[func.__name__] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'tamanho': info.currsize,
+            'limite': info.maxsize,
+            'hit_rate': info.hits / calls if calls else 0.0,
+        }
+    return stats
+
+
+def log_cache_stats():
+    """Registra no log a taxa de acerto do cache das transformações usadas"""
+    for name, info in cache_stats().items():
+        if info['hits'] or info['misses']:
+            logger.info(
+                f"Cache {name}: {info['hits']} hits, {info['misses']} misses "
+                f"({info['hit_rate']:.1%}), {info['tamanho']}/{info['limite']} entradas"
+            )
+
+
+def clear_caches():
+    """Esvazia o cache de todas as transformações"""
+    for func in CACHED_TRANSFORMS:
+        func.cache_clear()